@@ -1,16 +1,33 @@
 ﻿import os
+import weakref
 
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from config import Config
+from .admission import init_admission_control, reset_admission
+from .cache import LRUCache
+from .cli import register_commands
+from .downloads import check_download_config
 from .extensions import db, migrate
+from .icscache import build_ics_cache
+from .memprofile import init_request_profiling
+from .routes.api import bp as api_bp
 from .routes.main import bp as main_bp
 from .routes.persons import bp as persons_bp
 
+# Ein Fork-Hook pro Prozess; er setzt alle noch lebenden App-Instanzen zurueck.
+_live_apps = weakref.WeakSet()
+_fork_hook_registered = False
+
 
 def create_app(config_class=Config):
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object(config_class)
+    check_download_config(app.config)
+    if app.config["PROXY_FIX_X_FOR"] > 0:
+        # Client-Adresse aus X-Forwarded-For, sonst zaehlt das Upload-Limit nur den Proxy.
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
 
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
     os.makedirs(app.config["EXPORT_FOLDER"], exist_ok=True)
@@ -18,13 +35,48 @@ def create_app(config_class=Config):
 
     db.init_app(app)
     migrate.init_app(app, db)
+    app.extensions["caches"] = {
+        "preview": LRUCache(app.config["PREVIEW_CACHE_SIZE"]),
+        "conflicts": LRUCache(app.config["CONFLICT_CACHE_SIZE"]),
+        "names": LRUCache(app.config["NAME_CACHE_SIZE"]),
+        "search": LRUCache(app.config["SEARCH_CACHE_SIZE"]),
+    }
+    app.extensions["name_index"] = None
+    app.extensions["ics_cache"] = build_ics_cache(app.config)
 
     app.register_blueprint(main_bp)
     app.register_blueprint(persons_bp)
+    app.register_blueprint(api_bp)
+    register_commands(app)
+    init_request_profiling(app)
+    init_admission_control(app)
+
+    _register_fork_hooks(app)
 
     return app
 
 
+def _register_fork_hooks(app):
+    global _fork_hook_registered
+    if not hasattr(os, "register_at_fork"):
+        return
+    _live_apps.add(app)
+    if not _fork_hook_registered:
+        os.register_at_fork(after_in_child=_reset_after_fork)
+        _fork_hook_registered = True
+
+
+def _reset_after_fork():
+    for app in list(_live_apps):
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+        for cache in app.extensions["caches"].values():
+            cache.clear()
+        app.extensions["name_index"] = None
+        reset_admission(app)
+
+
 def _load_app_version(root_path):
     version_path = os.path.join(root_path, "VERSION")
     try:
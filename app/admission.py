@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+from collections import deque
+
+from flask import current_app, g, render_template, request
+
+try:
+    import fcntl
+except ImportError:  # Windows: kein flock, dann gilt nur das Limit pro Worker
+    fcntl = None
+
+ADMISSION_ENDPOINTS = {
+    ("main.index", "POST"): "parse",
+    ("persons.import_persons", "POST"): "parse",
+    ("main.send", "POST"): "export",
+}
+UPLOAD_ENDPOINTS = {("main.index", "POST"), ("persons.import_persons", "POST")}
+LIMIT_SETTINGS = {
+    "parse": "ADMISSION_PARSE_LIMIT",
+    "preview": "ADMISSION_PREVIEW_LIMIT",
+    "export": "ADMISSION_EXPORT_LIMIT",
+}
+POLL_INTERVAL = 0.05
+MAX_TRACKED_CLIENTS = 10000
+
+
+class AdmissionTicket:
+    def __init__(self, kind, semaphore=None, slot=None):
+        self.kind = kind
+        self.semaphore = semaphore
+        self.slot = slot
+
+    def release(self):
+        if self.slot is not None:
+            fcntl.flock(self.slot.fileno(), fcntl.LOCK_UN)
+            self.slot.close()
+            self.slot = None
+        if self.semaphore is not None:
+            self.semaphore.release()
+            self.semaphore = None
+
+
+class AdmissionController:
+    def __init__(self, limits, global_limit=0, lock_dir=None, queue_timeout=5.0):
+        self.limits = limits
+        self.queue_timeout = max(queue_timeout, 0)
+        self.global_limit = global_limit if fcntl is not None and lock_dir else 0
+        self.lock_dir = lock_dir
+        self.rejected = {kind: 0 for kind in limits}
+        self._semaphores = {
+            kind: threading.BoundedSemaphore(limit)
+            for kind, limit in limits.items()
+            if limit > 0
+        }
+        self._lock = threading.Lock()
+        if self.global_limit:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def acquire(self, kind):
+        deadline = time.monotonic() + self.queue_timeout
+        semaphore = self._semaphores.get(kind)
+        if semaphore is not None and not semaphore.acquire(timeout=self.queue_timeout):
+            return self._reject(kind)
+        slot = None
+        if self.global_limit:
+            slot = self._acquire_slot(deadline)
+            if slot is None:
+                if semaphore is not None:
+                    semaphore.release()
+                return self._reject(kind)
+        return AdmissionTicket(kind, semaphore, slot)
+
+    def _acquire_slot(self, deadline):
+        while True:
+            for index in range(self.global_limit):
+                handle = open(os.path.join(self.lock_dir, f"slot-{index}.lock"), "ab")
+                try:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    handle.close()
+                    continue
+                return handle
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(POLL_INTERVAL)
+
+    def _reject(self, kind):
+        with self._lock:
+            self.rejected[kind] = self.rejected.get(kind, 0) + 1
+        return None
+
+
+class RateLimiter:
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self._hits = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.setdefault(key, deque())
+            while hits and hits[0] <= now - self.window:
+                hits.popleft()
+            if len(hits) >= self.limit:
+                return hits[0] + self.window - now
+            hits.append(now)
+            if len(self._hits) > MAX_TRACKED_CLIENTS:
+                self._prune(now)
+        return 0
+
+    def _prune(self, now):
+        for key in list(self._hits):
+            hits = self._hits[key]
+            if not hits or hits[-1] <= now - self.window:
+                del self._hits[key]
+
+
+def parse_rate_limit(value):
+    text = (value or "").strip()
+    if not text:
+        return None
+    count, _, seconds = text.partition("/")
+    try:
+        count = int(count)
+        seconds = float(seconds or 60)
+    except ValueError:
+        raise ValueError(f"Ungueltiges Upload-Limit: {value}") from None
+    if count <= 0 or seconds <= 0:
+        return None
+    return count, seconds
+
+
+def build_admission(config):
+    controller = AdmissionController(
+        {kind: config.get(setting, 0) for kind, setting in LIMIT_SETTINGS.items()},
+        global_limit=config.get("ADMISSION_GLOBAL_LIMIT", 0),
+        lock_dir=config.get("ADMISSION_LOCK_DIR"),
+        queue_timeout=config.get("ADMISSION_QUEUE_TIMEOUT", 5.0),
+    )
+    rate = parse_rate_limit(config.get("UPLOAD_RATE_LIMIT"))
+    limiter = RateLimiter(*rate) if rate else None
+    return {"controller": controller, "upload_limiter": limiter}
+
+
+def reset_admission(app):
+    app.extensions["admission"] = build_admission(app.config)
+
+
+def shed_response(status, title, message, retry_after):
+    body = render_template("error.html", title=title, message=message, missing=[])
+    response = current_app.make_response((body, status))
+    response.headers["Retry-After"] = str(max(int(retry_after + 0.999), 1))
+    return response
+
+
+def admit(kind):
+    ticket = current_app.extensions["admission"]["controller"].acquire(kind)
+    if ticket is None:
+        current_app.logger.warning(
+            "Anfrage %s abgewiesen (%s ausgelastet)", request.endpoint, kind
+        )
+        retry_after = current_app.config.get("ADMISSION_RETRY_AFTER", 10)
+        return shed_response(
+            503,
+            "Server ausgelastet",
+            "Gerade werden sehr viele Dateien verarbeitet. "
+            f"Bitte in {retry_after} Sekunden erneut versuchen.",
+            retry_after,
+        )
+    g.admission_ticket = ticket
+    return None
+
+
+def release_admission_ticket():
+    ticket = g.pop("admission_ticket", None)
+    if ticket is not None:
+        ticket.release()
+
+
+def init_admission_control(app):
+    reset_admission(app)
+
+    @app.before_request
+    def admit_request():
+        key = (request.endpoint, request.method)
+        admission = app.extensions["admission"]
+        limiter = admission["upload_limiter"]
+        if limiter is not None and key in UPLOAD_ENDPOINTS:
+            wait = limiter.hit(request.remote_addr or "-")
+            if wait:
+                app.logger.warning(
+                    "Upload von %s abgewiesen (Upload-Limit)", request.remote_addr
+                )
+                return shed_response(
+                    429,
+                    "Zu viele Uploads",
+                    "Es wurden in kurzer Zeit zu viele Dateien hochgeladen. "
+                    f"Bitte in {max(int(wait + 0.999), 1)} Sekunden erneut versuchen.",
+                    wait,
+                )
+
+        kind = ADMISSION_ENDPOINTS.get(key)
+        if kind is None:
+            return None
+        return admit(kind)
+
+    @app.teardown_request
+    def release_admission(exc):
+        release_admission_ticket()
@@ -0,0 +1,341 @@
+import glob
+import hashlib
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from sqlalchemy import tuple_
+from werkzeug.utils import secure_filename
+
+from .excel import (
+    SCHEDULE_EXTENSIONS,
+    normalize_name,
+    prepare_event_data,
+    probe_schedule,
+    read_excel,
+    row_fingerprint,
+)
+from .extensions import db
+from .ics import build_ics_calendar
+from .icscache import IcsBlobCache, render_ics
+from .imports import build_person_index, file_content_hash
+from .maillog import EXPORTED_STATUSES, insert_mail_logs
+from .models import MailLog
+from .naming import build_ics_filename, default_calendar_name
+from .tokens import split_names
+
+EXPORT_MODES = ("bundles", "calendar")
+BATCH_ROLE = "aufsicht"
+LOOKUP_CHUNK = 500
+
+
+def collect_workbooks(sources, recursive=False):
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            pattern = "**/*" if recursive else "*"
+            matches = glob.glob(os.path.join(source, pattern), recursive=recursive)
+        else:
+            matches = glob.glob(source, recursive=recursive) or [source]
+        for path in matches:
+            name = os.path.basename(path)
+            if name.startswith("~$") or not name.lower().endswith(SCHEDULE_EXTENSIONS):
+                continue
+            if os.path.isfile(path):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+
+def workbook_label(path, content_hash):
+    stem = secure_filename(os.path.splitext(os.path.basename(path))[0]) or "plan"
+    return f"{stem}_{content_hash[:8]}"
+
+
+def calendar_filename(name):
+    return secure_filename(f"Aufsicht_{name}.ics") or "Aufsicht.ics"
+
+
+def export_workbook(
+    path, mode="bundles", uid_domain=None, calendar_name=None, ics_cache=None
+):
+    started = time.perf_counter()
+    cache = IcsBlobCache(*ics_cache) if ics_cache else None
+    result = {
+        "path": path,
+        "content_hash": file_content_hash(path),
+        "rows": 0,
+        "events": 0,
+        "errors": [],
+        "supervisors": [],
+    }
+    try:
+        probe_schedule(path)
+        rows = read_excel(path)
+    except ValueError as exc:
+        result["errors"].append({"row": "-", "reason": str(exc)})
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    result["rows"] = len(rows)
+    events = []
+    supervisors = {}
+    for idx, row in enumerate(rows, start=1):
+        try:
+            event_data = prepare_event_data(row)
+        except ValueError as exc:
+            result["errors"].append({"row": idx, "reason": str(exc)})
+            continue
+        event_data["row_fingerprint"] = row_fingerprint(event_data)
+        events.append(event_data)
+        for name in split_names(row.get("Aufsicht")):
+            name_key = normalize_name(name)
+            if not name_key:
+                continue
+            entry = supervisors.setdefault(
+                name_key, {"name": name, "name_key": name_key, "events": {}}
+            )
+            entry["events"].setdefault(event_data["row_fingerprint"], event_data)
+
+    result["events"] = len(events)
+    result["calendar_name"] = calendar_name = calendar_name or default_calendar_name(
+        rows
+    )
+    for entry in supervisors.values():
+        supervisor_events = list(entry["events"].values())
+        item = {
+            "name": entry["name"],
+            "name_key": entry["name_key"],
+            "events": supervisor_events,
+            "files": [],
+        }
+        if mode == "calendar":
+            payload, event_uids = build_ics_calendar(
+                supervisor_events, BATCH_ROLE, uid_domain, calendar_name=calendar_name
+            )
+            item["event_uids"] = event_uids
+            item["files"].append((calendar_filename(entry["name"]), payload))
+        else:
+            item["event_uids"] = []
+            for event_data in supervisor_events:
+                payload, event_uid = render_ics(
+                    cache,
+                    "event",
+                    event_data,
+                    BATCH_ROLE,
+                    uid_domain,
+                    calendar_name=calendar_name,
+                )
+                item["event_uids"].append(event_uid)
+                filename = build_ics_filename("Aufsicht", event_data, entry["name"])
+                item["files"].append((filename, payload))
+        result["supervisors"].append(item)
+
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def existing_log_keys(keys):
+    found = set()
+    keys = list(keys)
+    for start in range(0, len(keys), LOOKUP_CHUNK):
+        chunk = keys[start : start + LOOKUP_CHUNK]
+        found.update(
+            db.session.execute(
+                db.select(
+                    MailLog.row_fingerprint, MailLog.role, MailLog.recipient_email
+                ).where(
+                    tuple_(
+                        MailLog.row_fingerprint, MailLog.role, MailLog.recipient_email
+                    ).in_(chunk),
+                    MailLog.status.in_(EXPORTED_STATUSES),
+                )
+            ).all()
+        )
+    return {tuple(key) for key in found}
+
+
+def write_supervisor_files(output_dir, label, mode, name, files):
+    target_dir = os.path.join(output_dir, label)
+    os.makedirs(target_dir, exist_ok=True)
+    if mode == "calendar":
+        filename, payload = files[0]
+        path = os.path.join(target_dir, filename)
+        with open(path, "wb") as handle:
+            handle.write(payload)
+        return path
+
+    digest = hashlib.sha256(name.encode("utf-8")).hexdigest()[:8]
+    filename = secure_filename(f"ical_{name}.zip") or f"ical_{digest}.zip"
+    path = os.path.join(target_dir, filename)
+    used = set()
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for entry_name, payload in files:
+            if entry_name in used:
+                stem, ext = os.path.splitext(entry_name)
+                entry_name = f"{stem}_{len(used)}{ext}"
+            used.add(entry_name)
+            bundle.writestr(entry_name, payload)
+    return path
+
+
+def record_workbook(
+    result, output_dir, mode, person_index, seen_exports, force, uid_domain=None
+):
+    label = workbook_label(result["path"], result["content_hash"])
+    summary = {
+        "path": result["path"],
+        "label": label,
+        "rows": result["rows"],
+        "events": result["events"],
+        "supervisors": len(result["supervisors"]),
+        "files": [],
+        "generated": 0,
+        "skipped": 0,
+        "errors": result["errors"],
+        "parse_seconds": result.get("seconds"),
+    }
+
+    candidates = []
+    for item in result["supervisors"]:
+        person = person_index.get(item["name_key"])
+        email = person.email if person and person.email else ""
+        item["email"] = email
+        if email:
+            candidates.extend(
+                (event["row_fingerprint"], BATCH_ROLE, email)
+                for event in item["events"]
+            )
+    logged = set() if force else existing_log_keys(set(candidates))
+
+    now = datetime.utcnow()
+    log_params = []
+    for item in result["supervisors"]:
+        keep = []
+        for position, event_data in enumerate(item["events"]):
+            row_fp = event_data["row_fingerprint"]
+            export_key = (row_fp, BATCH_ROLE, item["name_key"])
+            log_key = (row_fp, BATCH_ROLE, item["email"])
+            if export_key in seen_exports or (item["email"] and log_key in logged):
+                summary["skipped"] += 1
+                continue
+            seen_exports.add(export_key)
+            keep.append(position)
+            if item["email"]:
+                log_params.append(
+                    {
+                        "event_uid": item["event_uids"][position],
+                        "role": BATCH_ROLE,
+                        "recipient_email": item["email"],
+                        "row_fingerprint": row_fp,
+                        "sent_at": now,
+                        "status": "generated",
+                        "error": None,
+                    }
+                )
+        if not keep:
+            continue
+        summary["generated"] += len(keep)
+
+        files = item["files"]
+        if mode != "calendar":
+            files = [files[position] for position in keep]
+        elif len(keep) < len(item["events"]):
+            payload, _ = build_ics_calendar(
+                [item["events"][position] for position in keep],
+                BATCH_ROLE,
+                uid_domain,
+                calendar_name=result["calendar_name"],
+            )
+            files = [(files[0][0], payload)]
+        path = write_supervisor_files(output_dir, label, mode, item["name"], files)
+        summary["files"].append(
+            {
+                "name": item["name"],
+                "email": item["email"] or None,
+                "events": len(keep),
+                "path": os.path.relpath(path, output_dir),
+            }
+        )
+
+    insert_mail_logs(log_params, replace=force)
+    summary["mail_log_entries"] = len(log_params)
+    return summary
+
+
+def run_batch_export(
+    paths,
+    output_dir,
+    mode="bundles",
+    workers=None,
+    uid_domain=None,
+    calendar_name=None,
+    force=False,
+    progress=None,
+    ics_cache=None,
+):
+    if mode not in EXPORT_MODES:
+        raise ValueError(f"Unbekannter Exportmodus: {mode}")
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    person_index = build_person_index()
+    seen_exports = set()
+    workbooks = []
+    cache_settings = (ics_cache.root, ics_cache.max_bytes) if ics_cache else None
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(paths), 1))) as pool:
+        futures = {
+            pool.submit(
+                export_workbook, path, mode, uid_domain, calendar_name, cache_settings
+            ): path
+            for path in paths
+        }
+        completed = {}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                completed[path] = future.result()
+            except Exception as exc:
+                completed[path] = {
+                    "path": path,
+                    "content_hash": "",
+                    "rows": 0,
+                    "events": 0,
+                    "errors": [{"row": "-", "reason": str(exc)}],
+                    "supervisors": [],
+                }
+            if progress:
+                progress(completed[path])
+
+    for path in paths:
+        workbooks.append(
+            record_workbook(
+                completed[path],
+                output_dir,
+                mode,
+                person_index,
+                seen_exports,
+                force,
+                uid_domain,
+            )
+        )
+    elapsed = time.perf_counter() - started
+
+    totals = {
+        key: sum(item[key] for item in workbooks)
+        for key in ("rows", "events", "generated", "skipped", "mail_log_entries")
+    }
+    totals["workbooks"] = len(workbooks)
+    totals["files"] = sum(len(item["files"]) for item in workbooks)
+    totals["errors"] = sum(len(item["errors"]) for item in workbooks)
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "mode": mode,
+        "workers": workers,
+        "output_dir": os.path.abspath(output_dir),
+        "elapsed_s": round(elapsed, 2),
+        "totals": totals,
+        "workbooks": workbooks,
+    }
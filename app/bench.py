@@ -0,0 +1,256 @@
+import gc
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+from .conflicts import find_conflicts, record_intervals
+from .excel import (
+    extract_aufsichten,
+    filter_rows_by_aufsicht,
+    prepare_event_data,
+    probe_schedule,
+    read_excel,
+    row_fingerprint,
+)
+from .fuzzy import TrigramIndex
+from .ics import build_ics_event
+from .icscache import IcsBlobCache, render_ics
+from .preview import format_preview_rows
+from .search import index_records
+from .synthetic import write_schedule
+from .tokens import (
+    clear_token_caches,
+    name_candidates,
+    split_display_names,
+    split_display_rooms,
+    split_names,
+    token_cache_info,
+)
+
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+
+
+def schedule_path(
+    workdir, rows, broken_xml=False, seed=0, extension=".xlsx", headers="merged"
+):
+    suffix = "_broken" if broken_xml else ""
+    if headers != "merged":
+        suffix += f"_{headers}"
+    return os.path.join(workdir, f"bench_{rows}_{seed}{suffix}{extension}")
+
+
+def ensure_schedule(
+    workdir, rows, broken_xml=False, seed=0, extension=".xlsx", headers="merged"
+):
+    path = schedule_path(workdir, rows, broken_xml, seed, extension, headers)
+    if not os.path.exists(path):
+        write_schedule(
+            path,
+            rows=rows,
+            supervisors=max(20, rows // 25),
+            headers=headers,
+            title_rows=2,
+            broken_xml=broken_xml,
+            seed=seed,
+        )
+    return path
+
+
+def measure(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+
+def cache_hit_rate(before, after):
+    hits = sum(after[name]["hits"] - before[name]["hits"] for name in after)
+    misses = sum(after[name]["misses"] - before[name]["misses"] for name in after)
+    return round(hits / (hits + misses), 4) if hits + misses else None
+
+
+def tokenize_rows(rows, cold=False):
+    if cold:
+        clear_token_caches()
+    before = token_cache_info()
+    for row in rows:
+        split_names(row.get("Aufsicht"))
+        name_candidates(row.get("Aufsicht"))
+        split_display_names(row.get("Prüfer"))
+        split_display_names(row.get("Ablösung"))
+        split_display_rooms(row.get("Raum"))
+    return cache_hit_rate(before, token_cache_info())
+
+
+def fingerprint_rows(rows):
+    events = []
+    for row in rows:
+        try:
+            event_data = prepare_event_data(row)
+        except ValueError:
+            continue
+        event_data["row_fingerprint"] = row_fingerprint(event_data)
+        events.append(event_data)
+    return events
+
+
+def build_ics_events(events):
+    return [
+        build_ics_event(event, "aufsicht", "bench.local", calendar_name="Bench")[0]
+        for event in events
+    ]
+
+
+def render_cached_events(cache, events):
+    return [
+        render_ics(cache, "event", event, "aufsicht", "bench.local", None, "Bench")[0]
+        for event in events
+    ]
+
+
+def build_name_index(names):
+    index = TrigramIndex()
+    for position, name in enumerate(names):
+        index.add(("person", position), name, position, name)
+    return index
+
+
+def reject_schedule(reader, path):
+    try:
+        reader(path)
+    except ValueError as exc:
+        return str(exc)
+    raise RuntimeError(f"Datei wurde nicht abgelehnt: {path}")
+
+
+def typo_names(names):
+    return [name[:2] + name[3:] if len(name) > 3 else name for name in names]
+
+
+def search_queries(parsed, selected):
+    rooms = split_display_rooms(parsed[0].get("Raum")) if parsed else []
+    queries = [selected, selected[:3], f"aufsicht:{selected[:4]}"]
+    if rooms:
+        queries.append(f"raum:{rooms[0]} {selected[:2]}")
+    return queries
+
+
+def build_cases(workdir, rows, seed=0):
+    path = ensure_schedule(workdir, rows, seed=seed)
+    broken_path = ensure_schedule(workdir, rows, broken_xml=True, seed=seed)
+    csv_path = ensure_schedule(workdir, rows, seed=seed, extension=".csv")
+    ods_path = ensure_schedule(workdir, rows, seed=seed, extension=".ods")
+    wrong_path = ensure_schedule(workdir, rows, seed=seed, headers="incomplete")
+    parsed = read_excel(path)
+    names = extract_aufsichten(parsed)
+    selected = names[len(names) // 2] if names else ""
+    events = fingerprint_rows(parsed)
+    name_index = build_name_index(names)
+    typos = typo_names(names)
+    search_index = index_records(parsed)
+    queries = search_queries(parsed, selected)
+    ics_cache = IcsBlobCache(os.path.join(workdir, f"ics_cache_{rows}_{seed}"), 1 << 30)
+    render_cached_events(ics_cache, events)
+
+    return [
+        ("parse", lambda: read_excel(path)),
+        ("parse_fallback", lambda: read_excel(broken_path)),
+        ("parse_csv", lambda: read_excel(csv_path)),
+        ("parse_ods", lambda: read_excel(ods_path)),
+        ("probe", lambda: probe_schedule(path)),
+        ("reject_parse", lambda: reject_schedule(read_excel, wrong_path)),
+        ("reject_probe", lambda: reject_schedule(probe_schedule, wrong_path)),
+        ("extract_aufsichten", lambda: extract_aufsichten(parsed)),
+        ("filter", lambda: filter_rows_by_aufsicht(parsed, selected)),
+        ("tokenize_cold", lambda: tokenize_rows(parsed, cold=True)),
+        ("tokenize", lambda: tokenize_rows(parsed)),
+        ("preview_format", lambda: format_preview_rows(parsed)),
+        ("fingerprint", lambda: fingerprint_rows(parsed)),
+        ("ics", lambda: build_ics_events(events)),
+        ("ics_cached", lambda: render_cached_events(ics_cache, events)),
+        ("conflicts", lambda: find_conflicts(record_intervals(parsed))),
+        ("name_match", lambda: [name_index.search(name) for name in typos]),
+        ("search_index", lambda: index_records(parsed)),
+        ("search", lambda: [search_index.search(query) for query in queries]),
+    ]
+
+
+def git_revision():
+    try:
+        return (
+            subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+            ).stdout.strip()
+            or None
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, workdir, repeat=3, only=None, seed=0, progress=None):
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+    for rows in sizes:
+        for name, func in build_cases(workdir, rows, seed):
+            if only and name not in only:
+                continue
+            timings, outcome = measure(func, repeat)
+            median_ms = statistics.median(timings)
+            result = {
+                "benchmark": name,
+                "rows": rows,
+                "repeat": repeat,
+                "min_ms": round(min(timings), 3),
+                "median_ms": round(median_ms, 3),
+                "max_ms": round(max(timings), 3),
+                "us_per_row": round(median_ms * 1000 / rows, 3),
+            }
+            if name.startswith("tokenize"):
+                result["cache_hit_rate"] = outcome
+            results.append(result)
+            if progress:
+                progress(result)
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare_results(previous, current):
+    baseline = {
+        (item["benchmark"], item["rows"]): item for item in previous.get("results", [])
+    }
+    rows = []
+    for item in current.get("results", []):
+        old = baseline.get((item["benchmark"], item["rows"]))
+        ratio = None
+        if old and old["median_ms"]:
+            ratio = round(item["median_ms"] / old["median_ms"], 3)
+        rows.append(
+            {
+                "benchmark": item["benchmark"],
+                "rows": item["rows"],
+                "previous_ms": old["median_ms"] if old else None,
+                "current_ms": item["median_ms"],
+                "ratio": ratio,
+            }
+        )
+    return rows
@@ -0,0 +1,481 @@
+import json
+import os
+import tempfile
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .bench import DEFAULT_SIZES, compare_results, run_benchmarks
+from .startup import COLD_START_BUDGET_MS
+from .synthetic import DATE_MODES, HEADER_VARIANTS, write_schedule
+
+
+def parse_sizes(value):
+    try:
+        return [int(part) for part in value.split(",") if part.strip()]
+    except ValueError as exc:
+        raise click.BadParameter("Kommagetrennte Zeilenzahlen erwartet") from exc
+
+
+@click.command("generate-schedule")
+@click.argument("path", type=click.Path(dir_okay=False, writable=True))
+@click.option("--rows", default=1000, show_default=True)
+@click.option("--supervisors", default=60, show_default=True)
+@click.option(
+    "--headers",
+    type=click.Choice(sorted(HEADER_VARIANTS)),
+    default="standard",
+    show_default=True,
+)
+@click.option(
+    "--dates", type=click.Choice(DATE_MODES), default="date", show_default=True
+)
+@click.option("--title-rows", default=0, show_default=True)
+@click.option(
+    "--broken-xml", is_flag=True, help="styles.xml beschaedigen (Fallback-Parser)"
+)
+@click.option("--seed", default=0, show_default=True)
+def generate_schedule_command(
+    path, rows, supervisors, headers, dates, title_rows, broken_xml, seed
+):
+    """Synthetischen Pruefungsplan als .xlsx, .ods oder .csv erzeugen."""
+    try:
+        write_schedule(
+            path,
+            rows=rows,
+            supervisors=supervisors,
+            headers=headers,
+            date_mode=dates,
+            title_rows=title_rows,
+            broken_xml=broken_xml,
+            seed=seed,
+        )
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    click.echo(f"{rows} Zeilen geschrieben: {path}")
+
+
+@click.command("bench")
+@click.option(
+    "--sizes",
+    default=",".join(str(size) for size in DEFAULT_SIZES),
+    show_default=True,
+)
+@click.option("--repeat", default=3, show_default=True)
+@click.option("--only", multiple=True, help="Nur diese Benchmarks ausfuehren")
+@click.option("--workdir", type=click.Path(file_okay=False), default=None)
+@click.option("--output", type=click.Path(dir_okay=False), default=None)
+@click.option("--compare", "compare_path", type=click.Path(exists=True), default=None)
+@click.option("--seed", default=0, show_default=True)
+def bench_command(sizes, repeat, only, workdir, output, compare_path, seed):
+    """Micro-Benchmarks fuer Excel-Import, Vorschau und ICS-Erzeugung."""
+    workdir = workdir or os.path.join(tempfile.gettempdir(), "aufsichtshelper-bench")
+
+    def progress(result):
+        hit_rate = result.get("cache_hit_rate")
+        cache = f"  Cache-Treffer {hit_rate:.0%}" if hit_rate is not None else ""
+        click.echo(
+            f"{result['benchmark']:<20} {result['rows']:>7} Zeilen "
+            f"{result['median_ms']:>10.1f} ms  {result['us_per_row']:>9.1f} us/Zeile"
+            f"{cache}"
+        )
+
+    report = run_benchmarks(
+        parse_sizes(sizes),
+        workdir,
+        repeat=repeat,
+        only=set(only),
+        seed=seed,
+        progress=progress,
+    )
+
+    if output:
+        with open(output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        click.echo(f"Ergebnis gespeichert: {output}")
+
+    if compare_path:
+        with open(compare_path, "r", encoding="utf-8") as handle:
+            previous = json.load(handle)
+        click.echo("")
+        click.echo("Vergleich (Median, Faktor < 1 = schneller):")
+        for item in compare_results(previous, report):
+            previous_ms = (
+                f"{item['previous_ms']:.1f}" if item["previous_ms"] is not None else "-"
+            )
+            ratio = f"{item['ratio']:.2f}x" if item["ratio"] is not None else "-"
+            click.echo(
+                f"{item['benchmark']:<20} {item['rows']:>7} "
+                f"{previous_ms:>10} -> {item['current_ms']:>10.1f} ms  {ratio}"
+            )
+
+
+@click.command("loadtest")
+@click.option("--users", default=30, show_default=True)
+@click.option("--iterations", default=10, show_default=True, help="Klicks pro Nutzer")
+@click.option("--rows", default=2000, show_default=True)
+@click.option("--workbooks", default=3, show_default=True)
+@click.option("--supervisors", default=80, show_default=True)
+@click.option("--send-ratio", default=0.2, show_default=True)
+@click.option(
+    "--url",
+    default=None,
+    help="Laufenden Server testen (z.B. http://127.0.0.1:5000) statt WSGI-Testclient",
+)
+@click.option("--workdir", type=click.Path(file_okay=False), default=None)
+@click.option("--output", type=click.Path(dir_okay=False), default=None)
+@click.option("--seed", default=0, show_default=True)
+def loadtest_command(
+    users,
+    iterations,
+    rows,
+    workbooks,
+    supervisors,
+    send_ratio,
+    url,
+    workdir,
+    output,
+    seed,
+):
+    """Lasttest Upload -> Vorschau -> Export mit simulierten Nutzern."""
+    from .loadtest import run_load_test
+
+    report = run_load_test(
+        users=users,
+        iterations=iterations,
+        rows=rows,
+        workbooks=workbooks,
+        supervisors=supervisors,
+        send_ratio=send_ratio,
+        base_url=url,
+        workdir=workdir,
+        seed=seed,
+    )
+
+    click.echo(
+        f"{report['requests']} Anfragen in {report['elapsed_s']} s "
+        f"({report['throughput_rps']} Anfragen/s), "
+        f"DB-Lock-Fehler: {report['db_lock_errors']}, "
+        f"abgewiesen (503/429): {report['shed']}"
+    )
+    for endpoint, item in report["endpoints"].items():
+        click.echo(
+            f"{endpoint:<10} n={item['requests']:<6} Fehler={item['errors']:<4} "
+            f"Abgewiesen={item['shed']:<4} "
+            f"{item['throughput_rps']:>7.2f}/s  p50={item['p50_ms']:>8.1f} ms  "
+            f"p95={item['p95_ms']:>8.1f} ms  p99={item['p99_ms']:>8.1f} ms"
+        )
+
+    if output:
+        with open(output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        click.echo(f"Ergebnis gespeichert: {output}")
+
+
+@click.command("memprofile")
+@click.option("--sizes", default="1000,10000", show_default=True)
+@click.option("--top", default=5, show_default=True, help="Allokationsstellen je Stufe")
+@click.option(
+    "--check",
+    is_flag=True,
+    help="Exit-Code 1, wenn eine Speichergrenze ueberschritten ist",
+)
+@click.option("--workdir", type=click.Path(file_okay=False), default=None)
+@click.option("--output", type=click.Path(dir_okay=False), default=None)
+@click.option("--seed", default=0, show_default=True)
+def memprofile_command(sizes, top, check, workdir, output, seed):
+    """Spitzen- und Restspeicher je Verarbeitungsstufe mit tracemalloc messen."""
+    from .memprofile import profile_pipeline
+
+    workdir = workdir or os.path.join(tempfile.gettempdir(), "aufsichtshelper-bench")
+    os.makedirs(workdir, exist_ok=True)
+
+    results = []
+    for rows in parse_sizes(sizes):
+        for entry in profile_pipeline(workdir, rows, top=top, seed=seed):
+            results.append(entry)
+            status = "ok" if entry["within_ceiling"] else "UEBERSCHRITTEN"
+            click.echo(
+                f"{entry['stage']:<16} {rows:>7} Zeilen  "
+                f"Spitze {entry['peak_kib']:>10.1f} KiB  "
+                f"behalten {entry['retained_kib']:>10.1f} KiB  "
+                f"Grenze {entry['ceiling_kib']:>10.1f} KiB  {status}"
+            )
+            for site in entry["top"]:
+                click.echo(f"    {site['size_diff_kib']:>10.1f} KiB  {site['site']}")
+
+    if output:
+        with open(output, "w", encoding="utf-8") as handle:
+            json.dump({"results": results}, handle, indent=2)
+        click.echo(f"Ergebnis gespeichert: {output}")
+
+    exceeded = [entry for entry in results if not entry["within_ceiling"]]
+    if check and exceeded:
+        raise click.ClickException(
+            f"{len(exceeded)} Speichergrenze(n) ueberschritten: "
+            + ", ".join(f"{entry['stage']} ({entry['rows']})" for entry in exceeded)
+        )
+
+
+@click.command("profile-startup")
+@click.option("--runs", default=5, show_default=True)
+@click.option("--top", default=20, show_default=True, help="Langsamste Module anzeigen")
+@click.option("--depth", default=None, type=int, help="Nur Module bis zu dieser Tiefe")
+@click.option(
+    "--budget-ms",
+    default=COLD_START_BUDGET_MS,
+    show_default=True,
+    help="Zeitbudget fuer create_app (Median)",
+)
+@click.option(
+    "--check",
+    is_flag=True,
+    help="Exit-Code 1 bei ueberschrittenem Budget oder vorzeitig geladenen Modulen",
+)
+@click.option("--output", type=click.Path(dir_okay=False), default=None)
+def profile_startup_command(runs, top, depth, budget_ms, check, output):
+    """Kaltstart von create_app messen und Importzeit je Modul ausgeben."""
+    from .startup import profile_startup
+
+    report = profile_startup(runs=runs, top=top, max_depth=depth)
+    report["budget_ms"] = budget_ms
+
+    click.echo(
+        f"create_app: Median {report['median_ms']:.1f} ms "
+        f"(min {report['min_ms']:.1f}, max {report['max_ms']:.1f}, {runs} Laeufe), "
+        f"Budget {budget_ms} ms"
+    )
+    click.echo("")
+    click.echo(f"{'kumuliert':>12} {'eigen':>10}  Modul")
+    for item in report["modules"]:
+        click.echo(
+            f"{item['cumulative_ms']:>9.1f} ms {item['self_ms']:>7.1f} ms  "
+            f"{'  ' * item['depth']}{item['module']}"
+        )
+
+    if output:
+        with open(output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        click.echo(f"Ergebnis gespeichert: {output}")
+
+    problems = []
+    if report["median_ms"] > budget_ms:
+        problems.append(f"Kaltstart {report['median_ms']:.1f} ms > {budget_ms} ms")
+    if report["eager_lazy_modules"]:
+        problems.append(
+            "beim Start geladen: " + ", ".join(report["eager_lazy_modules"])
+        )
+    if problems:
+        message = "; ".join(problems)
+        if check:
+            raise click.ClickException(message)
+        click.echo(f"Warnung: {message}")
+
+
+@click.command("export-batch")
+@click.argument("sources", nargs=-1, required=True)
+@click.option(
+    "--output",
+    "output_dir",
+    type=click.Path(file_okay=False),
+    required=True,
+    help="Zielverzeichnis fuer ZIP-/ICS-Dateien und summary.json",
+)
+@click.option(
+    "--mode",
+    type=click.Choice(["bundles", "calendar"]),
+    default="bundles",
+    show_default=True,
+    help="ZIP mit einer ICS je Termin oder eine ICS-Datei je Aufsicht",
+)
+@click.option(
+    "--workers", default=None, type=int, help="Prozesse (Standard: alle Kerne)"
+)
+@click.option("--recursive", is_flag=True, help="Unterverzeichnisse durchsuchen")
+@click.option("--calendar-name", default=None, help="Kalendername fuer alle Termine")
+@click.option(
+    "--force", is_flag=True, help="Bereits erstellte Termine erneut exportieren"
+)
+@click.option(
+    "--summary",
+    "summary_path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Pfad fuer die JSON-Zusammenfassung (Standard: <output>/summary.json)",
+)
+@with_appcontext
+def export_batch_command(
+    sources, output_dir, mode, workers, recursive, calendar_name, force, summary_path
+):
+    """Mehrere Plaene (.xlsx/.ods/.csv, Verzeichnis oder Glob) parallel exportieren."""
+    from .batch import collect_workbooks, run_batch_export
+    from .ics import get_uid_domain
+
+    paths = collect_workbooks(sources, recursive=recursive)
+    if not paths:
+        raise click.ClickException("Keine Plaene (.xlsx, .ods, .csv) gefunden.")
+    click.echo(f"{len(paths)} Arbeitsmappe(n) gefunden.")
+
+    def progress(result):
+        status = "Fehler" if result["errors"] and not result["events"] else "ok"
+        click.echo(
+            f"{os.path.basename(result['path']):<40} {result['rows']:>7} Zeilen "
+            f"{len(result['supervisors']):>5} Aufsichten  {status}"
+        )
+
+    report = run_batch_export(
+        paths,
+        output_dir,
+        mode=mode,
+        workers=workers,
+        uid_domain=get_uid_domain(current_app.config.get("APP_BASE_URL", "")),
+        calendar_name=calendar_name,
+        force=force,
+        progress=progress,
+        ics_cache=current_app.extensions["ics_cache"],
+    )
+
+    totals = report["totals"]
+    click.echo(
+        f"{totals['generated']} Termine in {totals['files']} Dateien erzeugt, "
+        f"{totals['skipped']} uebersprungen, {totals['errors']} Fehler, "
+        f"{totals['mail_log_entries']} Log-Eintraege "
+        f"({report['elapsed_s']} s, {report['workers']} Prozesse)"
+    )
+
+    summary_path = summary_path or os.path.join(output_dir, "summary.json")
+    with open(summary_path, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2, ensure_ascii=False)
+    click.echo(f"Zusammenfassung gespeichert: {summary_path}")
+
+
+@click.command("import-persons")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--dry-run", is_flag=True, help="Nur pruefen, nichts speichern")
+@click.option(
+    "--deactivate-missing",
+    is_flag=True,
+    help="Personen, die nicht in der Datei stehen, deaktivieren",
+)
+@with_appcontext
+def import_persons_command(path, dry_run, deactivate_missing):
+    """Personen und Aliase aus CSV/XLSX anlegen, aktualisieren, deaktivieren."""
+    from .person_import import apply_roster, plan_roster, read_roster
+
+    try:
+        entries, columns = read_roster(path)
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    plan = plan_roster(entries, columns, deactivate_missing=deactivate_missing)
+
+    for item in plan["insert"]:
+        click.echo(f"+ {item['name']} <{item['email'] or '-'}>")
+    for item in plan["update"]:
+        changes = ", ".join(
+            f"{field}: {old} -> {new}" for field, (old, new) in item["changes"].items()
+        )
+        click.echo(f"~ {item['name']} ({changes})")
+    for item in plan["deactivate"]:
+        click.echo(f"- {item['name']} (deaktiviert)")
+    for item in plan["aliases"]:
+        click.echo(f"@ {item['alias_name']} -> {item['person_name']}")
+    for item in plan["errors"]:
+        click.echo(f"! Zeile {item['row']}: {item['reason']}", err=True)
+
+    click.echo(
+        f"{plan['rows']} Zeilen: {len(plan['insert'])} neu, "
+        f"{len(plan['update'])} geaendert, {len(plan['deactivate'])} deaktiviert, "
+        f"{len(plan['aliases'])} Aliase, {plan['unchanged']} unveraendert, "
+        f"{len(plan['errors'])} Fehler"
+    )
+    if plan["errors"]:
+        raise click.ClickException("Fehler in der Datei, nichts gespeichert.")
+    if dry_run:
+        click.echo("Probelauf, nichts gespeichert.")
+        return
+    try:
+        apply_roster(plan)
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    click.echo("Gespeichert.")
+
+
+@click.command("archive-mail-log")
+@click.option(
+    "--semesters",
+    type=int,
+    default=None,
+    help="Aktuelles Semester plus so viele vorherige behalten (Standard aus Konfig.)",
+)
+@click.option(
+    "--before",
+    "before_date",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help="Statt Semestern alle Eintraege vor diesem Datum archivieren",
+)
+@click.option("--batch-size", type=int, default=None, help="Eintraege pro Transaktion")
+@click.option("--pause", default=0.0, show_default=True, help="Sekunden je Stapel")
+@click.option(
+    "--file",
+    "archive_file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="In gzip-JSONL-Datei statt in die Archivtabelle schreiben",
+)
+@click.option("--dry-run", is_flag=True, help="Nur zaehlen, nichts verschieben")
+@with_appcontext
+def archive_mail_log_command(
+    semesters, before_date, batch_size, pause, archive_file, dry_run
+):
+    """Alte Export-Protokolleintraege stapelweise ins Archiv verschieben."""
+    from .maillog import (
+        archive_mail_log,
+        count_archivable,
+        retention_cutoff,
+        semester_label,
+    )
+
+    if before_date is not None:
+        cutoff = before_date
+        click.echo(f"Grenze: {cutoff:%d.%m.%Y}")
+    else:
+        if semesters is None:
+            semesters = current_app.config["MAIL_LOG_RETENTION_SEMESTERS"]
+        if semesters <= 0:
+            raise click.ClickException(
+                "Aufbewahrung ist deaktiviert (MAIL_LOG_RETENTION_SEMESTERS=0)."
+            )
+        cutoff = retention_cutoff(semesters)
+        click.echo(
+            f"Grenze: {cutoff:%d.%m.%Y} (Beginn {semester_label(cutoff)}, "
+            f"{semesters} Semester zurueck)"
+        )
+
+    pending = count_archivable(cutoff)
+    click.echo(f"{pending} Eintraege aelter als die Grenze.")
+    if dry_run or not pending:
+        if dry_run:
+            click.echo("Probelauf, nichts verschoben.")
+        return
+
+    batch_size = batch_size or current_app.config["MAIL_LOG_ARCHIVE_BATCH"]
+    if batch_size <= 0:
+        raise click.BadParameter("Muss groesser als 0 sein", param_hint="--batch-size")
+    moved = archive_mail_log(
+        cutoff, batch_size=batch_size, pause=pause, archive_file=archive_file
+    )
+    target = archive_file or "Archivtabelle mail_log_archive"
+    click.echo(f"{moved} Eintraege verschoben nach {target}.")
+
+
+def register_commands(app):
+    app.cli.add_command(generate_schedule_command)
+    app.cli.add_command(bench_command)
+    app.cli.add_command(loadtest_command)
+    app.cli.add_command(memprofile_command)
+    app.cli.add_command(profile_startup_command)
+    app.cli.add_command(export_batch_command)
+    app.cli.add_command(import_persons_command)
+    app.cli.add_command(archive_mail_log_command)
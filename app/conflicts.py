@@ -0,0 +1,272 @@
+import csv
+import heapq
+import io
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from .cache import get_cache
+from .diff import exam_key, room_key
+from .excel import (
+    PERSON_COLUMNS,
+    normalize_name,
+    parse_date_value,
+    parse_duration_minutes,
+    parse_time_value,
+)
+from .extensions import db
+from .models import ImportRow, ImportRowPerson
+from .tokens import split_display_rooms, split_names
+
+CONFLICT_KINDS = {"person": "Person", "room": "Raum"}
+
+
+def build_interval(
+    position, pruefungsname, datum, startzeit, dauer_minuten, raum, persons
+):
+    start = datetime.combine(datum, startzeit)
+    rooms = {}
+    for room in split_display_rooms(raum):
+        key = room_key(room)
+        if key:
+            rooms.setdefault(key, room)
+    return {
+        "position": position,
+        "pruefungsname": pruefungsname or "",
+        "exam_key": exam_key(pruefungsname),
+        "start": start,
+        "end": start + timedelta(minutes=dauer_minuten or 0),
+        "raum": raum or "",
+        "rooms": rooms,
+        "persons": persons,
+    }
+
+
+def record_intervals(records):
+    intervals = []
+    for position, record in enumerate(records):
+        try:
+            datum = parse_date_value(record.get("Datum"))
+            startzeit = parse_time_value(record.get("Startzeit"))
+            dauer = parse_duration_minutes(record.get("Dauer"))
+        except ValueError:
+            continue
+        persons = []
+        for role, column in PERSON_COLUMNS.items():
+            for name in split_names(record.get(column)):
+                name_norm = normalize_name(name)
+                if name_norm:
+                    persons.append((role, name_norm, name))
+        intervals.append(
+            build_interval(
+                position,
+                record.get("Prüfungsname"),
+                datum,
+                startzeit,
+                dauer,
+                record.get("Raum"),
+                persons,
+            )
+        )
+    return intervals
+
+
+def import_intervals(import_id):
+    rows = db.session.execute(
+        db.select(
+            ImportRow.id,
+            ImportRow.position,
+            ImportRow.pruefungsname,
+            ImportRow.datum,
+            ImportRow.startzeit,
+            ImportRow.dauer_minuten,
+            ImportRow.raum,
+        )
+        .where(
+            ImportRow.import_id == import_id,
+            ImportRow.datum.isnot(None),
+            ImportRow.startzeit.isnot(None),
+            ImportRow.dauer_minuten.isnot(None),
+        )
+        .order_by(ImportRow.position)
+    ).all()
+    persons = {}
+    person_rows = db.session.execute(
+        db.select(
+            ImportRowPerson.import_row_id,
+            ImportRowPerson.role,
+            ImportRowPerson.name_norm,
+            ImportRowPerson.name,
+        )
+        .join(ImportRow, ImportRow.id == ImportRowPerson.import_row_id)
+        .where(ImportRow.import_id == import_id)
+        .order_by(ImportRowPerson.id)
+    )
+    for row_id, role, name_norm, name in person_rows:
+        persons.setdefault(row_id, []).append((role, name_norm, name))
+
+    return [
+        build_interval(
+            row.position,
+            row.pruefungsname,
+            row.datum,
+            row.startzeit,
+            row.dauer_minuten,
+            row.raum,
+            persons.get(row.id, []),
+        )
+        for row in rows
+    ]
+
+
+def sweep_clusters(items):
+    items.sort(key=lambda item: (item[0]["start"], item[0]["end"]))
+    cluster = []
+    cluster_end = None
+    for item in items:
+        interval = item[0]
+        if cluster and interval["start"] < cluster_end:
+            cluster.append(item)
+            cluster_end = max(cluster_end, interval["end"])
+            continue
+        if len(cluster) > 1:
+            yield cluster
+        cluster = [item]
+        cluster_end = interval["end"]
+    if len(cluster) > 1:
+        yield cluster
+
+
+def max_concurrency(intervals):
+    active = []
+    peak = 0
+    for interval in intervals:
+        while active and active[0] <= interval["start"]:
+            heapq.heappop(active)
+        heapq.heappush(active, interval["end"])
+        peak = max(peak, len(active))
+    return peak
+
+
+def find_conflicts(intervals):
+    by_person = {}
+    by_room = {}
+    for interval in intervals:
+        if interval["end"] <= interval["start"]:
+            continue
+        seen = set()
+        for role, name_norm, name in interval["persons"]:
+            if name_norm in seen:
+                continue
+            seen.add(name_norm)
+            by_person.setdefault(name_norm, []).append((interval, (role, name)))
+        for key, label in interval["rooms"].items():
+            by_room.setdefault(key, []).append((interval, label))
+
+    conflicts = []
+    for kind, groups in (("person", by_person), ("room", by_room)):
+        for key, items in groups.items():
+            if len(items) < 2:
+                continue
+            for cluster in sweep_clusters(items):
+                members = [interval for interval, _ in cluster]
+                if len({member["exam_key"] or id(member) for member in members}) < 2:
+                    continue
+                first_extra = cluster[0][1]
+                roles = []
+                if kind == "person":
+                    roles = [extra[0] for _, extra in cluster]
+                conflicts.append(
+                    {
+                        "kind": kind,
+                        "key": key,
+                        "label": first_extra[1] if kind == "person" else first_extra,
+                        "roles": roles,
+                        "intervals": members,
+                        "start": members[0]["start"],
+                        "end": max(member["end"] for member in members),
+                        "concurrency": max_concurrency(members),
+                    }
+                )
+    conflicts.sort(
+        key=lambda item: (
+            item["kind"],
+            item["start"],
+            item["key"],
+            item["intervals"][0]["position"],
+        )
+    )
+    return conflicts
+
+
+def import_conflicts(import_obj):
+    cache = get_cache(current_app, "conflicts")
+    key = (import_obj.content_hash, import_obj.id)
+    conflicts = cache.get(key)
+    if conflicts is None:
+        conflicts = find_conflicts(import_intervals(import_obj.id))
+        cache.set(key, conflicts)
+    return conflicts
+
+
+def summarize_conflicts(conflicts):
+    summary = {kind: 0 for kind in CONFLICT_KINDS}
+    keys = {kind: set() for kind in CONFLICT_KINDS}
+    for conflict in conflicts:
+        summary[conflict["kind"]] += 1
+        keys[conflict["kind"]].add(conflict["key"])
+    return {
+        "total": len(conflicts),
+        "person": summary["person"],
+        "room": summary["room"],
+        "persons_affected": len(keys["person"]),
+        "rooms_affected": len(keys["room"]),
+    }
+
+
+def conflicts_for_person(conflicts, name):
+    name_norm = normalize_name(name)
+    return [
+        conflict
+        for conflict in conflicts
+        if conflict["kind"] == "person" and conflict["key"] == name_norm
+    ]
+
+
+def conflicts_csv(conflicts):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    writer.writerow(
+        [
+            "Nr.",
+            "Art",
+            "Person/Raum",
+            "Gleichzeitig",
+            "Rolle",
+            "Zeile",
+            "Pruefung",
+            "Datum",
+            "Beginn",
+            "Ende",
+            "Raum",
+        ]
+    )
+    for number, conflict in enumerate(conflicts, start=1):
+        for index, interval in enumerate(conflict["intervals"]):
+            role = conflict["roles"][index] if conflict["roles"] else ""
+            writer.writerow(
+                [
+                    number,
+                    CONFLICT_KINDS[conflict["kind"]],
+                    conflict["label"],
+                    conflict["concurrency"],
+                    PERSON_COLUMNS.get(role, ""),
+                    interval["position"] + 1,
+                    interval["pruefungsname"],
+                    interval["start"].strftime("%d.%m.%Y"),
+                    interval["start"].strftime("%H:%M"),
+                    interval["end"].strftime("%H:%M"),
+                    interval["raum"],
+                ]
+            )
+    return "\ufeff" + buffer.getvalue()
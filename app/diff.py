@@ -0,0 +1,163 @@
+import re
+from difflib import SequenceMatcher
+
+from .excel import normalize_name, prepare_event_data, row_fingerprint
+
+CHANGE_ADDED = "added"
+CHANGE_CHANGED = "changed"
+CHANGE_UNCHANGED = "unchanged"
+CHANGE_REMOVED = "removed"
+
+CHANGE_LABELS = {
+    CHANGE_ADDED: "Neu",
+    CHANGE_CHANGED: "Geaendert",
+    CHANGE_UNCHANGED: "Unveraendert",
+    CHANGE_REMOVED: "Entfallen",
+}
+
+DIFF_FIELDS = {
+    "pruefungsname": "Prüfungsname",
+    "datum": "Datum",
+    "startzeit": "Startzeit",
+    "dauer_minuten": "Dauer",
+    "raum": "Raum",
+    "pruefer": "Prüfer",
+    "aufsicht": "Aufsicht",
+    "abloesung": "Ablösung",
+}
+
+MIN_MATCH_SCORE = 2
+FUZZY_NAME_RATIO = 0.85
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def exam_key(value):
+    return _NON_WORD.sub(" ", normalize_name(value)).strip()
+
+
+def room_key(value):
+    return _NON_WORD.sub("", normalize_name(value))
+
+
+def event_entry(record, ref=None):
+    try:
+        event_data = prepare_event_data(record)
+    except ValueError:
+        return None
+    event_data["row_fingerprint"] = row_fingerprint(event_data)
+    return {
+        "ref": ref,
+        "event": event_data,
+        "fingerprint": event_data["row_fingerprint"],
+        "exam_key": exam_key(event_data["pruefungsname"]),
+        "room_key": room_key(event_data["raum"]),
+    }
+
+
+def match_score(old, new):
+    old_event, new_event = old["event"], new["event"]
+    score = 0
+    if old_event["datum"] == new_event["datum"]:
+        score += 2
+    if old_event["startzeit"] == new_event["startzeit"]:
+        score += 1
+    if old["room_key"] == new["room_key"]:
+        score += 2
+    return score
+
+
+def changed_fields(old_event, new_event):
+    return [
+        label
+        for field, label in DIFF_FIELDS.items()
+        if old_event.get(field) != new_event.get(field)
+    ]
+
+
+def diff_entries(old_entries, new_entries):
+    by_fingerprint = {}
+    by_exam = {}
+    for old in old_entries:
+        by_fingerprint.setdefault(old["fingerprint"], []).append(old)
+        by_exam.setdefault(old["exam_key"], []).append(old)
+
+    matched = set()
+    pairs = [None] * len(new_entries)
+    pending = []
+    for index, new in enumerate(new_entries):
+        candidates = by_fingerprint.get(new["fingerprint"])
+        if candidates:
+            old = candidates.pop(0)
+            matched.add(id(old))
+            pairs[index] = old
+        else:
+            pending.append(index)
+
+    pending_per_exam = {}
+    for index in pending:
+        key = new_entries[index]["exam_key"]
+        pending_per_exam[key] = pending_per_exam.get(key, 0) + 1
+
+    unmatched = []
+    for index in pending:
+        new = new_entries[index]
+        group = [
+            old for old in by_exam.get(new["exam_key"], ()) if id(old) not in matched
+        ]
+        best, best_score = None, -1
+        for old in group:
+            score = match_score(old, new)
+            if score > best_score:
+                best, best_score = old, score
+        moved_alone = len(group) == 1 and pending_per_exam[new["exam_key"]] == 1
+        if best is not None and (best_score >= MIN_MATCH_SCORE or moved_alone):
+            matched.add(id(best))
+            pairs[index] = best
+        else:
+            unmatched.append(index)
+
+    by_slot = {}
+    for old in old_entries:
+        if id(old) not in matched:
+            event = old["event"]
+            slot = (event["datum"], event["startzeit"], old["room_key"])
+            by_slot.setdefault(slot, []).append(old)
+    for index in unmatched:
+        new = new_entries[index]
+        event = new["event"]
+        slot = (event["datum"], event["startzeit"], new["room_key"])
+        for old in by_slot.get(slot, ()):
+            if id(old) in matched:
+                continue
+            ratio = SequenceMatcher(None, old["exam_key"], new["exam_key"]).ratio()
+            if ratio >= FUZZY_NAME_RATIO:
+                matched.add(id(old))
+                pairs[index] = old
+                break
+
+    changes = []
+    for new, old in zip(new_entries, pairs):
+        if old is None:
+            changes.append(
+                {"status": CHANGE_ADDED, "old": None, "new": new, "fields": []}
+            )
+        elif old["fingerprint"] == new["fingerprint"]:
+            changes.append(
+                {"status": CHANGE_UNCHANGED, "old": old, "new": new, "fields": []}
+            )
+        else:
+            changes.append(
+                {
+                    "status": CHANGE_CHANGED,
+                    "old": old,
+                    "new": new,
+                    "fields": changed_fields(old["event"], new["event"]),
+                }
+            )
+    for old in old_entries:
+        if id(old) not in matched:
+            changes.append(
+                {"status": CHANGE_REMOVED, "old": old, "new": None, "fields": []}
+            )
+    return changes
@@ -0,0 +1,61 @@
+import os
+from urllib.parse import quote
+
+from flask import abort, current_app, send_from_directory
+from werkzeug.utils import secure_filename
+
+DOWNLOAD_OFFLOAD_MODES = {"", "x-accel", "x-sendfile"}
+BUNDLE_MIMETYPE = "application/zip"
+
+
+def check_download_config(config):
+    mode = config.get("DOWNLOAD_OFFLOAD", "")
+    if mode not in DOWNLOAD_OFFLOAD_MODES:
+        raise ValueError(
+            f"Unbekannter Wert fuer DOWNLOAD_OFFLOAD: {mode} "
+            "(erlaubt: leer, x-accel, x-sendfile)"
+        )
+
+
+def offload_response(mode, export_dir, safe_name):
+    response = current_app.response_class(mimetype=BUNDLE_MIMETYPE)
+    if mode == "x-accel":
+        prefix = current_app.config["DOWNLOAD_ACCEL_PREFIX"].rstrip("/")
+        response.headers["X-Accel-Redirect"] = f"{prefix}/{quote(safe_name)}"
+    else:
+        response.headers["X-Sendfile"] = os.path.abspath(
+            os.path.join(export_dir, safe_name)
+        )
+    response.headers["Content-Disposition"] = f"attachment; filename={safe_name}"
+    return response
+
+
+def send_bundle(filename):
+    safe_name = secure_filename(filename)
+    if not safe_name:
+        abort(404)
+
+    export_dir = current_app.config["EXPORT_FOLDER"]
+    if not os.path.isfile(os.path.join(export_dir, safe_name)):
+        abort(404)
+
+    max_age = current_app.config["DOWNLOAD_MAX_AGE"]
+    mode = current_app.config["DOWNLOAD_OFFLOAD"]
+    if mode:
+        response = offload_response(mode, export_dir, safe_name)
+    else:
+        response = send_from_directory(
+            export_dir,
+            safe_name,
+            mimetype=BUNDLE_MIMETYPE,
+            as_attachment=True,
+            max_age=max_age,
+        )
+
+    # Bundle-Namen sind eindeutig und werden nie ueberschrieben.
+    response.cache_control.no_cache = None
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    response.cache_control.immutable = True
+    return response
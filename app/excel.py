@@ -1,11 +1,18 @@
 import hashlib
+import os
+import posixpath
 import re
 import zipfile
 from datetime import date, datetime, time, timedelta
+from itertools import chain, islice
 from xml.etree import ElementTree as ET
 
-from openpyxl import load_workbook
-from openpyxl.utils.exceptions import InvalidFileException
+from .readers import read_csv_rows, read_ods_rows
+from .tokens import (
+    contains_name,
+    normalize_name,
+    split_names,
+)
 
 EXPECTED_COLUMNS = [
     "Pr\u00fcfungsname",
@@ -18,6 +25,8 @@ EXPECTED_COLUMNS = [
     "Raum",
 ]
 
+PERSON_COLUMNS = {"aufsicht": "Aufsicht", "abloesung": "Abl\u00f6sung"}
+
 COLUMN_ALIASES = {
     "Pr\u00fcfungsname": [
         "Pr\u00fcfungsname",
@@ -40,26 +49,96 @@ COLUMN_ALIASES = {
     "Raum": ["Raum", "R\u00e4ume", "R\u00e4ume vorgezogen"],
 }
 
+SCHEDULE_EXTENSIONS = (".xlsx", ".csv", ".ods")
+HEADER_SCAN_ROWS = 30
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d.%m.%y", "%d/%m/%Y")
+TIME_FORMATS = ("%H:%M", "%H:%M:%S", "%H.%M")
 
-def read_excel(file_path):
-    rows = None
+XLSX_WORKBOOK = "xl/workbook.xml"
+XLSX_WORKBOOK_RELS = "xl/_rels/workbook.xml.rels"
+XLSX_SHARED_STRINGS = "xl/sharedStrings.xml"
+
+_WEEKDAY_PREFIX = re.compile(r"^[^\W\d]{2,10}\.?,?\s+(?=\d)")
+_GERMAN_NUMBER = re.compile(r"^-?\d{1,3}(?:\.\d{3})*,\d+$|^-?\d+,\d+$")
+
+
+def read_sheet_rows(file_path):
+    extension = os.path.splitext(file_path.lower())[1]
+    if extension == ".csv":
+        return read_csv_rows(file_path)
+    if extension == ".ods":
+        return read_ods_rows(file_path)
+    return read_xlsx_rows(file_path)
+
+
+def read_xlsx_rows(file_path):
     try:
         rows = _read_rows_openpyxl(file_path)
     except Exception as exc:
         try:
             rows = _read_rows_fallback(file_path)
         except Exception:
+            from openpyxl.utils.exceptions import InvalidFileException
+
             if isinstance(exc, InvalidFileException):
                 raise ValueError(
                     "Excel-Datei konnte nicht gelesen werden (defektes XML). "
                     "Bitte die Datei in Excel/LibreOffice oeffnen und als .xlsx neu speichern."
                 ) from exc
             raise ValueError(f"Excel-Datei konnte nicht gelesen werden: {exc}") from exc
+    return rows
 
-    if not rows:
-        raise ValueError("Excel-Datei ist leer")
 
-    header_row_index, headers, score = _detect_header_row(rows)
+class _SharedIndex(int):
+    pass
+
+
+def read_sheet_head(file_path, limit=HEADER_SCAN_ROWS):
+    extension = os.path.splitext(file_path.lower())[1]
+    if extension not in (".csv", ".ods"):
+        return read_xlsx_head(file_path, limit)
+    rows = read_sheet_rows(file_path)
+    try:
+        return list(islice(rows, limit))
+    finally:
+        rows.close()
+
+
+def read_xlsx_head(file_path, limit=HEADER_SCAN_ROWS):
+    # Nur das aktive Blatt bis Zeile `limit` entpacken, Shared Strings nur bis
+    # zum hoechsten benoetigten Index.
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            rows = _stream_sheet_head(archive, _active_sheet_path(archive), limit)
+            needed = {
+                value
+                for row in rows
+                for value in row
+                if isinstance(value, _SharedIndex)
+            }
+            strings = _read_shared_string_subset(archive, needed)
+    except (zipfile.BadZipFile, KeyError, IndexError, ET.ParseError, ValueError):
+        # Ungewoehnlicher Aufbau oder defekte Datei: wie bisher komplett lesen.
+        return list(islice(read_xlsx_rows(file_path), limit))
+    return [
+        [
+            strings.get(value) if isinstance(value, _SharedIndex) else value
+            for value in row
+        ]
+        for row in rows
+    ]
+
+
+def probe_schedule(file_path):
+    # Falsche Dateien anhand der Kopfzeilen ablehnen, bevor alles gelesen wird.
+    return _check_header(read_sheet_head(file_path))
+
+
+def _check_header(head):
+    if not head:
+        raise ValueError("Datei ist leer")
+
+    header_row_index, headers, score = _detect_header_row(head)
     if score <= 0:
         raise ValueError(
             "Keine gueltige Kopfzeile gefunden. Bitte pruefen, ob die erste Zeile "
@@ -71,10 +150,19 @@ def read_excel(file_path):
     ]
     if missing:
         raise ValueError(f"Missing columns: {', '.join(missing)}")
+    return header_row_index, headers
+
+
+def read_excel(file_path):
+    # CSV/ODS werden gestreamt; nur die Zeilen fuer die Kopfzeilensuche puffern.
+    rows = iter(read_sheet_rows(file_path))
+    head = list(islice(rows, HEADER_SCAN_ROWS))
+    header_row_index, headers = _check_header(head)
 
     data_rows = []
-    for row in rows[header_row_index + 1 :]:
-        record = _build_record(headers, row)
+    plan = _column_plan(headers)
+    for row in chain(head[header_row_index + 1 :], rows):
+        record = _build_record(plan, row)
         if record is None:
             continue
         data_rows.append(record)
@@ -82,74 +170,6 @@ def read_excel(file_path):
     return data_rows
 
 
-def normalize_name(value):
-    if value is None:
-        return ""
-    return " ".join(str(value).strip().split()).casefold()
-
-
-def split_names(value):
-    if value is None:
-        return []
-    text = str(value).strip()
-    if not text:
-        return []
-
-    if any(sep in text for sep in [";", "/", "\n", "\r"]):
-        parts = re.split(r"[;/\n\r]+", text)
-        return [part.strip() for part in parts if part and part.strip()]
-
-    if text.count(",") >= 3:
-        parts = [part.strip() for part in text.split(",") if part.strip()]
-        if len(parts) % 2 == 0:
-            paired = []
-            for i in range(0, len(parts), 2):
-                paired.append(f"{parts[i]}, {parts[i + 1]}")
-            return paired
-
-    return [text]
-
-
-def split_display_names(value):
-    if value is None:
-        return []
-    text = str(value).strip()
-    if not text:
-        return []
-
-    pattern = (
-        r"[A-Za-z\u00c4\u00d6\u00dc\u00e4\u00f6\u00fc\u00df-]+"
-        r",\s*[A-Za-z\u00c4\u00d6\u00dc\u00e4\u00f6\u00fc\u00df-]+"
-    )
-    matches = [match.strip() for match in re.findall(pattern, text) if match.strip()]
-    if len(matches) >= 2:
-        return matches
-
-    return [name.strip() for name in split_names(text) if name and name.strip()]
-
-
-def split_display_rooms(value):
-    if value is None:
-        return []
-    text = str(value).strip()
-    if not text:
-        return []
-    parts = re.split(r"[;,\n\r/]+|\s+", text)
-    return [part.strip() for part in parts if part and part.strip()]
-
-
-def name_candidates(value):
-    names = split_names(value)
-    return [normalize_name(name) for name in names if name]
-
-
-def matches_name(cell_value, selected_name):
-    if not selected_name:
-        return False
-    target = normalize_name(selected_name)
-    return target in name_candidates(cell_value)
-
-
 def extract_aufsichten(rows):
     seen = {}
     for row in rows:
@@ -161,7 +181,10 @@ def extract_aufsichten(rows):
 
 
 def filter_rows_by_aufsicht(rows, selected_name):
-    return [row for row in rows if matches_name(row.get("Aufsicht"), selected_name)]
+    if not selected_name:
+        return []
+    target = normalize_name(selected_name)
+    return [row for row in rows if contains_name(row.get("Aufsicht"), target)]
 
 
 def display_value(value):
@@ -217,11 +240,11 @@ def parse_date_value(value):
         except Exception as exc:
             raise ValueError("Datum ungueltig") from exc
 
-    text = str(value).strip()
+    text = _WEEKDAY_PREFIX.sub("", str(value).strip())
     if not text:
         raise ValueError("Datum fehlt")
 
-    for fmt in ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y"):
+    for fmt in DATE_FORMATS:
         try:
             return datetime.strptime(text, fmt).date()
         except ValueError:
@@ -245,10 +268,12 @@ def parse_time_value(value):
         return (datetime(1900, 1, 1) + timedelta(seconds=seconds)).time()
 
     text = str(value).strip()
+    if text.lower().endswith("uhr"):
+        text = text[:-3].strip()
     if not text:
         raise ValueError("Startzeit fehlt")
 
-    for fmt in ("%H:%M", "%H:%M:%S"):
+    for fmt in TIME_FORMATS:
         try:
             return datetime.strptime(text, fmt).time()
         except ValueError:
@@ -289,6 +314,8 @@ def parse_duration_minutes(value):
             minutes = int(parts[1])
             return hours * 60 + minutes
 
+    if _GERMAN_NUMBER.match(text):
+        text = text.replace(".", "").replace(",", ".")
     try:
         return int(round(float(text)))
     except Exception as exc:
@@ -332,7 +359,7 @@ def row_fingerprint(event_data):
     return hashlib.sha256(joined.encode("utf-8")).hexdigest()
 
 
-def _detect_header_row(rows, scan_limit=30):
+def _detect_header_row(rows, scan_limit=HEADER_SCAN_ROWS):
     best_index = 0
     best_headers = []
     best_score = -1
@@ -392,18 +419,24 @@ def _resolve_indices(headers, field):
     return []
 
 
-def _first_value_by_alias(headers, row, aliases):
+def _alias_indices(headers, aliases):
+    indices = []
     for alias in aliases:
-        for idx in _find_indices_by_names(headers, [alias]):
-            value = row[idx] if idx < len(row) else None
-            if value is None:
-                continue
-            if str(value).strip():
-                return value
+        indices.extend(_find_indices_by_names(headers, [alias]))
+    return indices
+
+
+def _first_value(row, indices):
+    for idx in indices:
+        value = row[idx] if idx < len(row) else None
+        if value is None:
+            continue
+        if str(value).strip():
+            return value
     return None
 
 
-def _collect_values(headers, row, indices):
+def _collect_values(row, indices):
     values = []
     seen = set()
     for idx in indices:
@@ -418,21 +451,25 @@ def _collect_values(headers, row, indices):
     return ", ".join(values) if values else None
 
 
-def _build_record(headers, row):
-    record = {}
+def _column_plan(headers):
+    # Spaltenzuordnung einmal pro Datei statt fuer jede Zeile aufloesen.
+    plan = []
     for field in EXPECTED_COLUMNS:
-        aliases = COLUMN_ALIASES.get(field, [field])
-        if field == "Pr\u00fcfer":
-            indices = _resolve_indices(headers, field)
-            record[field] = _collect_values(headers, row, indices)
-            continue
-        if field == "Raum":
-            indices = _resolve_indices(headers, field)
-            record[field] = _collect_values(headers, row, indices)
-            continue
+        if field in ("Pr\u00fcfer", "Raum"):
+            plan.append((field, True, _resolve_indices(headers, field)))
+        else:
+            aliases = COLUMN_ALIASES.get(field, [field])
+            plan.append((field, False, _alias_indices(headers, aliases)))
+    return plan
 
-        value = _first_value_by_alias(headers, row, aliases)
-        record[field] = value
+
+def _build_record(plan, row):
+    record = {}
+    for field, collect, indices in plan:
+        if collect:
+            record[field] = _collect_values(row, indices)
+        else:
+            record[field] = _first_value(row, indices)
 
     if all(not str(value).strip() for value in record.values() if value is not None):
         return None
@@ -441,6 +478,8 @@ def _build_record(headers, row):
 
 
 def _load_workbook(file_path):
+    from openpyxl import load_workbook
+
     try:
         return load_workbook(file_path, data_only=True)
     except Exception:
@@ -477,6 +516,105 @@ def _find_sheet_path(archive):
     return sheet_names[0]
 
 
+def _active_sheet_path(archive):
+    # Dieselbe Blattwahl wie openpyxl (workbook.active).
+    workbook = ET.fromstring(archive.read(XLSX_WORKBOOK))
+    view = workbook.find("{*}bookViews/{*}workbookView")
+    active = int(view.get("activeTab", 0)) if view is not None else 0
+    sheet = workbook.findall("{*}sheets/{*}sheet")[active]
+    rel_id = next(
+        (value for key, value in sheet.attrib.items() if key.endswith("}id")), None
+    )
+    for rel in ET.fromstring(archive.read(XLSX_WORKBOOK_RELS)):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target", "")
+            break
+    else:
+        raise ValueError("Arbeitsblatt nicht gefunden")
+
+    if target.startswith("/"):
+        path = target[1:]
+    else:
+        path = posixpath.normpath(posixpath.join("xl", target))
+    if not path.startswith("xl/worksheets/"):
+        raise ValueError("Aktives Blatt ist kein Tabellenblatt")
+    return path
+
+
+def _stream_sheet_head(archive, sheet_path, limit):
+    rows = {}
+    row_number = 0
+    last = 0
+    with archive.open(sheet_path) as sheet:
+        for _, element in ET.iterparse(sheet, events=("end",)):
+            if not element.tag.endswith("}row"):
+                continue
+            row_number = int(element.get("r", row_number + 1))
+            if row_number > limit:
+                last = limit
+                break
+            rows[row_number] = _head_row_values(element)
+            last = row_number
+            element.clear()
+    if not last:
+        raise ValueError("Keine Zeilen im Arbeitsblatt")
+    # openpyxl liefert auch leere Zeilen; sie zaehlen fuer HEADER_SCAN_ROWS mit.
+    return [rows.get(number, []) for number in range(1, last + 1)]
+
+
+def _head_row_values(row):
+    row_values = {}
+    column = -1
+    for cell in row:
+        if not cell.tag.endswith("}c"):
+            continue
+        index = _col_to_index(cell.get("r", ""))
+        column = column + 1 if index is None else index
+        if cell.get("t") == "s":
+            node = cell.find("{*}v")
+            value = _SharedIndex(node.text) if node is not None and node.text else None
+        else:
+            value = _read_cell_value(cell, ())
+        row_values[column] = value
+
+    if not row_values:
+        return []
+    row_list = [None] * (max(row_values) + 1)
+    for idx, value in row_values.items():
+        row_list[idx] = value
+    return row_list
+
+
+def _read_shared_string_subset(archive, needed):
+    strings = {}
+    if not needed:
+        return strings
+    last = max(needed)
+    index = -1
+    with archive.open(XLSX_SHARED_STRINGS) as handle:
+        for _, element in ET.iterparse(handle, events=("end",)):
+            if not element.tag.endswith("}si"):
+                continue
+            index += 1
+            if index in needed:
+                strings[index] = _shared_string_text(element)
+            element.clear()
+            if index >= last:
+                break
+    return strings
+
+
+def _shared_string_text(item):
+    # Wie openpyxl: Lauftexte zusammenfuegen, Lautschrift (rPh) ignorieren.
+    parts = []
+    for child in item:
+        if child.tag.endswith("}t"):
+            parts.append(child.text or "")
+        elif child.tag.endswith("}r"):
+            parts.extend(node.text or "" for node in child if node.tag.endswith("}t"))
+    return "".join(parts)
+
+
 def _read_shared_strings(archive):
     if "xl/sharedStrings.xml" not in archive.namelist():
         return []
@@ -0,0 +1,212 @@
+import re
+import threading
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from .excel import normalize_name
+from .extensions import db
+from .models import DataVersion, Person, PersonAlias
+
+NGRAM_SIZE = 3
+DEFAULT_LIMIT = 3
+DEFAULT_MIN_SCORE = 0.5
+NAME_INDEX_VERSION = "name_index"
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def match_key(name):
+    return " ".join(sorted(_NON_WORD.sub(" ", normalize_name(name)).split()))
+
+
+def ngrams(text, size=NGRAM_SIZE):
+    if not text:
+        return frozenset()
+    padded = f"{' ' * (size - 1)}{text} "
+    return frozenset(padded[i : i + size] for i in range(len(padded) - size + 1))
+
+
+class TrigramIndex:
+    def __init__(self, version=0):
+        self.version = version
+        self._entries = {}
+        self._postings = {}
+        self._exact = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, key, name, person_id, person_name):
+        grams = ngrams(match_key(name))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = {
+                "name": name,
+                "name_norm": normalize_name(name),
+                "person_id": person_id,
+                "person_name": person_name,
+                "grams": grams,
+            }
+            self._exact.setdefault(normalize_name(name), key)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def remove_person(self, person_id):
+        with self._lock:
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if entry["person_id"] == person_id
+            ]
+            for key in stale:
+                self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for gram in entry["grams"]:
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+        if self._exact.get(entry["name_norm"]) == key:
+            del self._exact[entry["name_norm"]]
+            for other_key, other in self._entries.items():
+                if other["name_norm"] == entry["name_norm"]:
+                    self._exact[entry["name_norm"]] = other_key
+                    break
+
+    def lookup(self, name):
+        key = self._exact.get(normalize_name(name))
+        return self._entries[key]["person_id"] if key is not None else None
+
+    def search(self, name, limit=DEFAULT_LIMIT, min_score=DEFAULT_MIN_SCORE):
+        grams = ngrams(match_key(name))
+        if not grams:
+            return []
+        shared = {}
+        with self._lock:
+            for gram in grams:
+                for key in self._postings.get(gram, ()):
+                    shared[key] = shared.get(key, 0) + 1
+            best = {}
+            for key, count in shared.items():
+                entry = self._entries[key]
+                score = 2.0 * count / (len(grams) + len(entry["grams"]))
+                if score < min_score:
+                    continue
+                current = best.get(entry["person_id"])
+                if current is None or score > current["score"]:
+                    best[entry["person_id"]] = {
+                        "person_id": entry["person_id"],
+                        "person_name": entry["person_name"],
+                        "matched": entry["name"],
+                        "alias": key[0] == "alias",
+                        "score": round(score, 3),
+                    }
+        return sorted(
+            best.values(),
+            key=lambda item: (-item["score"], item["person_name"].casefold()),
+        )[:limit]
+
+    def add_person(self, person):
+        self.remove_person(person.id)
+        if not person.active:
+            return
+        self.add(("person", person.id), person.name, person.id, person.name)
+        for alias in person.aliases:
+            self.add(("alias", alias.id), alias.alias_name, person.id, person.name)
+
+    def add_alias(self, alias):
+        person = alias.person
+        if person is None or not person.active:
+            self.remove(("alias", alias.id))
+            return
+        self.add(("alias", alias.id), alias.alias_name, person.id, person.name)
+
+
+def build_name_index(version=0):
+    index = TrigramIndex(version)
+    persons = {}
+    for person in Person.query.filter(Person.active.is_(True)):
+        persons[person.id] = person
+        index.add(("person", person.id), person.name, person.id, person.name)
+    for alias in PersonAlias.query:
+        person = persons.get(alias.person_id)
+        if person is not None:
+            index.add(("alias", alias.id), alias.alias_name, person.id, person.name)
+    return index
+
+
+_build_lock = threading.Lock()
+
+
+def name_index_version():
+    return (
+        db.session.scalar(
+            db.select(DataVersion.version).where(
+                DataVersion.name == NAME_INDEX_VERSION
+            )
+        )
+        or 0
+    )
+
+
+def bump_name_index_version():
+    # Im selben Commit wie die Aenderung an Personen/Aliasen aufrufen.
+    statement = (
+        update(DataVersion)
+        .where(DataVersion.name == NAME_INDEX_VERSION)
+        .values(version=DataVersion.version + 1)
+    )
+    if db.session.execute(statement).rowcount == 0:
+        try:
+            with db.session.begin_nested():
+                db.session.add(DataVersion(name=NAME_INDEX_VERSION, version=1))
+        except IntegrityError:
+            db.session.execute(statement)
+    return name_index_version()
+
+
+def get_name_index(app):
+    # Jeder Worker vergleicht seinen Index mit dem Zaehler in der Datenbank, damit
+    # Aenderungen anderer Worker und von flask import-persons ankommen.
+    version = name_index_version()
+    index = app.extensions.get("name_index")
+    if index is None or index.version != version:
+        with _build_lock:
+            index = app.extensions.get("name_index")
+            if index is None or index.version != version:
+                index = build_name_index(version)
+                app.extensions["name_index"] = index
+    return index
+
+
+def update_name_index(app, version, change):
+    # Eigene Aenderung nur nachziehen, wenn der Index genau den Stand davor hat;
+    # sonst baut der naechste get_name_index neu auf.
+    index = app.extensions.get("name_index")
+    if index is not None and index.version == version - 1:
+        change(index)
+        index.version = version
+
+
+def suggest_persons(index, names, limit=DEFAULT_LIMIT, min_score=DEFAULT_MIN_SCORE):
+    unmatched = []
+    suggestions = []
+    for name in names:
+        if index.lookup(name) is not None:
+            continue
+        unmatched.append(name)
+        candidates = index.search(name, limit=limit, min_score=min_score)
+        if candidates:
+            suggestions.append({"name": name, "candidates": candidates})
+    return unmatched, suggestions
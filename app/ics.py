@@ -2,7 +2,8 @@
 from urllib.parse import urlparse
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from icalendar import Calendar, Event
+# Bei jeder Aenderung am Aufbau der ICS-Dateien erhoehen (verwirft den ICS-Cache).
+ICS_TEMPLATE_VERSION = 1
 
 
 def get_uid_domain(base_url):
@@ -53,7 +54,9 @@ def build_description(event_data):
     return "\n".join(lines)
 
 
-def build_ics_event(event_data, role, uid_domain=None, event_uid=None, calendar_name=None):
+def _build_event(event_data, role, uid_domain=None, event_uid=None, sequence=0):
+    from icalendar import Event
+
     tz = _get_timezone()
     if tz:
         dtstart = datetime.combine(event_data["datum"], event_data["startzeit"], tzinfo=tz)
@@ -68,15 +71,6 @@ def build_ics_event(event_data, role, uid_domain=None, event_uid=None, calendar_
         event_data["row_fingerprint"], role, uid_domain
     )
 
-    cal = Calendar()
-    cal.add("prodid", "-//AufsichtsHelper//DE")
-    cal.add("version", "2.0")
-    cal.add("method", "REQUEST")
-    cal.add("X-WR-TIMEZONE", "Europe/Berlin")
-    if calendar_name:
-        cal.add("X-WR-CALNAME", calendar_name)
-        cal.add("NAME", calendar_name)
-
     event = Event()
     event.add("uid", event_uid)
     event.add("summary", build_summary(event_data, role))
@@ -85,6 +79,49 @@ def build_ics_event(event_data, role, uid_domain=None, event_uid=None, calendar_
     event.add("dtstamp", dtstamp)
     event.add("location", event_data.get("raum", ""))
     event.add("description", build_description(event_data))
+    if sequence:
+        event.add("sequence", sequence)
+    return event, event_uid
+
+
+def _build_calendar(calendar_name=None, method="REQUEST"):
+    from icalendar import Calendar
+
+    cal = Calendar()
+    cal.add("prodid", "-//AufsichtsHelper//DE")
+    cal.add("version", "2.0")
+    cal.add("method", method)
+    cal.add("X-WR-TIMEZONE", "Europe/Berlin")
+    if calendar_name:
+        cal.add("X-WR-CALNAME", calendar_name)
+        cal.add("NAME", calendar_name)
+    return cal
+
 
+def build_ics_event(
+    event_data, role, uid_domain=None, event_uid=None, calendar_name=None, sequence=0
+):
+    event, event_uid = _build_event(event_data, role, uid_domain, event_uid, sequence)
+    cal = _build_calendar(calendar_name)
     cal.add_component(event)
     return cal.to_ical(), event_uid
+
+
+def build_ics_cancel(
+    event_data, role, uid_domain=None, event_uid=None, calendar_name=None, sequence=1
+):
+    event, event_uid = _build_event(event_data, role, uid_domain, event_uid, sequence)
+    event.add("status", "CANCELLED")
+    cal = _build_calendar(calendar_name, method="CANCEL")
+    cal.add_component(event)
+    return cal.to_ical(), event_uid
+
+
+def build_ics_calendar(events, role, uid_domain=None, calendar_name=None):
+    cal = _build_calendar(calendar_name)
+    event_uids = []
+    for event_data in events:
+        event, event_uid = _build_event(event_data, role, uid_domain)
+        cal.add_component(event)
+        event_uids.append(event_uid)
+    return cal.to_ical(), event_uids
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+from .ics import (
+    ICS_TEMPLATE_VERSION,
+    build_event_uid,
+    build_ics_cancel,
+    build_ics_event,
+)
+
+CACHE_FIELDS = (
+    "pruefungsname",
+    "pruefer",
+    "aufsicht",
+    "abloesung",
+    "raum",
+    "datum",
+    "startzeit",
+    "dauer_minuten",
+)
+EVICT_EVERY = 500
+EVICT_TARGET = 0.9
+
+_DTSTAMP = re.compile(rb"^DTSTAMP:\d{8}T\d{6}Z(?=\r?$)", re.MULTILINE)
+
+
+def ics_cache_key(
+    kind, event_data, role, uid_domain, event_uid, calendar_name, sequence
+):
+    parts = [
+        kind,
+        role,
+        uid_domain or "",
+        event_uid,
+        calendar_name or "",
+        str(sequence),
+        event_data["row_fingerprint"],
+    ]
+    parts.extend(str(event_data.get(field, "")) for field in CACHE_FIELDS)
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def refresh_dtstamp(payload):
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return _DTSTAMP.sub(b"DTSTAMP:" + stamp.encode("ascii"), payload, count=1)
+
+
+class IcsBlobCache:
+    def __init__(self, root, max_bytes, version=ICS_TEMPLATE_VERSION):
+        self.root = root
+        self.path = os.path.join(root, f"v{version}")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], f"{key}.ics")
+
+    def get(self, key):
+        path = self._file(key)
+        try:
+            with open(path, "rb") as handle:
+                payload = handle.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return payload
+
+    def put(self, key, payload):
+        path = self._file(key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            handle, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(handle, "wb") as tmp:
+                tmp.write(payload)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        if os.path.isdir(self.root):
+            for entry in os.scandir(self.root):
+                if entry.is_dir() and entry.path != self.path:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+
+        files = []
+        total = 0
+        if os.path.isdir(self.path):
+            for bucket in os.scandir(self.path):
+                if not bucket.is_dir():
+                    continue
+                for entry in os.scandir(bucket.path):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        target = self.max_bytes * EVICT_TARGET
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+def build_ics_cache(config):
+    root = config.get("ICS_CACHE_DIR")
+    max_mb = config.get("ICS_CACHE_MAX_MB", 0)
+    if not root or max_mb <= 0:
+        return None
+    return IcsBlobCache(root, max_mb * 1024 * 1024)
+
+
+def render_ics(
+    cache,
+    kind,
+    event_data,
+    role,
+    uid_domain=None,
+    event_uid=None,
+    calendar_name=None,
+    sequence=0,
+):
+    event_uid = event_uid or build_event_uid(
+        event_data["row_fingerprint"], role, uid_domain
+    )
+    key = None
+    if cache is not None:
+        key = ics_cache_key(
+            kind, event_data, role, uid_domain, event_uid, calendar_name, sequence
+        )
+        payload = cache.get(key)
+        if payload is not None:
+            return refresh_dtstamp(payload), event_uid
+
+    builder = build_ics_cancel if kind == "cancel" else build_ics_event
+    payload, event_uid = builder(
+        event_data,
+        role,
+        uid_domain,
+        event_uid,
+        calendar_name=calendar_name,
+        sequence=sequence,
+    )
+    if cache is not None:
+        cache.put(key, payload)
+    return payload, event_uid
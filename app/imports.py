@@ -0,0 +1,405 @@
+import hashlib
+import os
+
+from sqlalchemy import case, func, insert
+
+from .diff import (
+    CHANGE_ADDED,
+    CHANGE_CHANGED,
+    CHANGE_REMOVED,
+    CHANGE_UNCHANGED,
+    diff_entries,
+    event_entry,
+)
+from .excel import (
+    PERSON_COLUMNS,
+    SCHEDULE_EXTENSIONS,
+    display_value,
+    normalize_name,
+    parse_date_value,
+    parse_duration_minutes,
+    parse_time_value,
+)
+from .extensions import db
+from .models import Import, ImportRow, ImportRowPerson, Person, PersonAlias
+from .stats import ImportStats
+from .tokens import split_display_names, split_display_rooms, split_names
+
+
+def file_content_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_import_by_hash(content_hash):
+    return (
+        Import.query.filter_by(content_hash=content_hash)
+        .order_by(Import.id.desc())
+        .first()
+    )
+
+
+def get_import(import_id):
+    if not import_id:
+        return None
+    return db.session.get(Import, import_id)
+
+
+def _text_or_none(value):
+    if value is None:
+        return None
+    text = display_value(value)
+    return text if text.strip() else None
+
+
+def _parsed_or_none(parser, value):
+    try:
+        return parser(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_person_index():
+    index = {}
+    for person in Person.query.all():
+        if not person.active:
+            continue
+        key = normalize_name(person.name)
+        if key:
+            index.setdefault(key, person)
+
+    for alias in PersonAlias.query.all():
+        if not alias.person or not alias.person.active:
+            continue
+        key = normalize_name(alias.alias_name)
+        if key:
+            index.setdefault(key, alias.person)
+
+    return index
+
+
+def build_sort_keys(record):
+    return {
+        "pruefungsname_sort": display_value(record.get("Prüfungsname")).casefold()[
+            :255
+        ],
+        "pruefer_sort": " ".join(split_display_names(record.get("Prüfer")))
+        .casefold()[:255],
+        "raum_sort": " ".join(split_display_rooms(record.get("Raum"))).casefold()[
+            :255
+        ],
+    }
+
+
+def build_row_params(import_id, position, record):
+    params = {
+        "import_id": import_id,
+        "position": position,
+        "pruefungsname": _text_or_none(record.get("Prüfungsname")),
+        "datum": _parsed_or_none(parse_date_value, record.get("Datum")),
+        "datum_raw": _text_or_none(record.get("Datum")),
+        "startzeit": _parsed_or_none(parse_time_value, record.get("Startzeit")),
+        "startzeit_raw": _text_or_none(record.get("Startzeit")),
+        "dauer_minuten": _parsed_or_none(parse_duration_minutes, record.get("Dauer")),
+        "dauer_raw": _text_or_none(record.get("Dauer")),
+        "pruefer": _text_or_none(record.get("Prüfer")),
+        "aufsicht": _text_or_none(record.get("Aufsicht")),
+        "abloesung": _text_or_none(record.get("Ablösung")),
+        "raum": _text_or_none(record.get("Raum")),
+    }
+    params.update(build_sort_keys(record))
+    return params
+
+
+def build_person_params(row_id, record, person_index=None):
+    params = []
+    for role, column in PERSON_COLUMNS.items():
+        for name in split_names(record.get(column)):
+            name_norm = normalize_name(name)
+            if not name_norm:
+                continue
+            person = person_index.get(name_norm) if person_index else None
+            params.append(
+                {
+                    "import_row_id": row_id,
+                    "role": role,
+                    "name": name[:200],
+                    "name_norm": name_norm[:200],
+                    "person_id": person.id if person else None,
+                }
+            )
+    return params
+
+
+def latest_import(exclude_hash=None, filename=None):
+    query = Import.query
+    if exclude_hash:
+        query = query.filter(Import.content_hash != exclude_hash)
+    if filename is not None:
+        # Nur Fassungen desselben Plans (gleicher Dateiname, Endung egal).
+        stem = os.path.splitext(filename)[0].lower()
+        query = query.filter(
+            func.lower(Import.filename).in_(
+                [f"{stem}{extension}" for extension in SCHEDULE_EXTENSIONS]
+            )
+        )
+    return query.order_by(Import.id.desc()).first()
+
+
+def recent_imports(limit=20):
+    return Import.query.order_by(Import.id.desc()).limit(limit).all()
+
+
+def import_event_entries(import_id):
+    rows = ImportRow.query.filter(
+        ImportRow.import_id == import_id, ImportRow.row_fingerprint.isnot(None)
+    ).order_by(ImportRow.position.asc())
+    entries = []
+    for row in rows:
+        entry = event_entry(row.to_record(), ref=row)
+        if entry is not None:
+            entries.append(entry)
+    return entries
+
+
+def apply_lineage(row_params, new_entries, previous_import_id=None):
+    for params in row_params:
+        params["row_fingerprint"] = None
+        params["uid_fingerprint"] = None
+        params["sequence"] = 0
+        params["change"] = None
+        params["previous_row_id"] = None
+
+    for entry in new_entries:
+        params = row_params[entry["ref"]]
+        params["row_fingerprint"] = entry["fingerprint"]
+        params["uid_fingerprint"] = entry["fingerprint"]
+    if previous_import_id is None:
+        return
+
+    for change in diff_entries(import_event_entries(previous_import_id), new_entries):
+        if change["new"] is None:
+            continue
+        params = row_params[change["new"]["ref"]]
+        params["change"] = change["status"]
+        old = change["old"]
+        if old is None:
+            continue
+        previous_row = old["ref"]
+        params["previous_row_id"] = previous_row.id
+        params["uid_fingerprint"] = previous_row.uid_fingerprint or old["fingerprint"]
+        params["sequence"] = previous_row.sequence + (
+            1 if change["status"] == CHANGE_CHANGED else 0
+        )
+
+
+def create_import(
+    rows,
+    filename,
+    stored_name,
+    content_hash,
+    person_index=None,
+    previous_import=None,
+):
+    import_obj = Import(
+        filename=filename,
+        stored_name=stored_name,
+        content_hash=content_hash,
+        row_count=len(rows),
+        previous_import_id=previous_import.id if previous_import else None,
+    )
+    db.session.add(import_obj)
+    db.session.flush()
+
+    row_params = []
+    new_entries = []
+    stats = ImportStats()
+    for position, record in enumerate(rows):
+        params = build_row_params(import_obj.id, position, record)
+        row_params.append(params)
+        stats.add(params, record)
+        entry = event_entry(record, ref=position)
+        if entry is not None:
+            new_entries.append(entry)
+    apply_lineage(row_params, new_entries, import_obj.previous_import_id)
+    import_obj.stats = stats.result()
+    row_ids = []
+    if row_params:
+        row_ids = list(
+            db.session.scalars(
+                insert(ImportRow).returning(
+                    ImportRow.id, sort_by_parameter_order=True
+                ),
+                row_params,
+            )
+        )
+
+    person_params = []
+    for row_id, record in zip(row_ids, rows):
+        person_params.extend(build_person_params(row_id, record, person_index))
+    if person_params:
+        db.session.execute(insert(ImportRowPerson), person_params)
+
+    db.session.commit()
+    return import_obj
+
+
+def import_person_names(import_id, role=None):
+    names = (
+        db.session.query(ImportRowPerson.name_norm, ImportRowPerson.name)
+        .join(ImportRow, ImportRow.id == ImportRowPerson.import_row_id)
+        .filter(ImportRow.import_id == import_id)
+        .order_by(ImportRow.position.asc(), ImportRowPerson.id.asc())
+    )
+    if role is not None:
+        names = names.filter(ImportRowPerson.role == role)
+    seen = {}
+    for name_norm, name in names:
+        if name_norm not in seen:
+            seen[name_norm] = name
+    return [seen[key] for key in sorted(seen.keys())]
+
+
+def link_person_rows(person_id, name):
+    return (
+        ImportRowPerson.query.filter(
+            ImportRowPerson.name_norm == normalize_name(name)[:200],
+            ImportRowPerson.person_id.is_(None),
+        ).update({"person_id": person_id}, synchronize_session=False)
+    )
+
+
+def first_dated_record(import_id):
+    row = (
+        ImportRow.query.filter(
+            ImportRow.import_id == import_id, ImportRow.datum.isnot(None)
+        )
+        .order_by(ImportRow.position.asc())
+        .first()
+    )
+    return row.to_record() if row else None
+
+
+SORT_COLUMNS = {
+    "Prüfungsname": (ImportRow.pruefungsname_sort, False),
+    "Datum": (ImportRow.datum, True),
+    "Startzeit": (ImportRow.startzeit, True),
+    "Dauer": (ImportRow.dauer_minuten, True),
+    "Prüfer": (ImportRow.pruefer_sort, False),
+    "Raum": (ImportRow.raum_sort, False),
+}
+
+
+def parse_sort_spec(sort_value, dir_value, max_keys=3):
+    keys = [key.strip() for key in (sort_value or "").split(",") if key.strip()]
+    dirs = [value.strip() for value in (dir_value or "").split(",") if value.strip()]
+    spec = []
+    for index, key in enumerate(keys):
+        if key not in SORT_COLUMNS or any(key == item[0] for item in spec):
+            continue
+        direction = dirs[min(index, len(dirs) - 1)] if dirs else "asc"
+        if direction not in ("asc", "desc"):
+            direction = "asc"
+        spec.append((key, direction))
+        if len(spec) >= max_keys:
+            break
+    return spec
+
+
+def format_sort_spec(spec):
+    return ",".join(key for key, _ in spec), ",".join(direction for _, direction in spec)
+
+
+def _order_clauses(sort_spec):
+    clauses = []
+    for key, direction in sort_spec or []:
+        column, nullable = SORT_COLUMNS[key]
+        if nullable:
+            missing_last = case((column.is_(None), 1), else_=0)
+            clauses.append(
+                missing_last.desc() if direction == "desc" else missing_last.asc()
+            )
+        clauses.append(column.desc() if direction == "desc" else column.asc())
+    clauses.append(ImportRow.position.asc())
+    return clauses
+
+
+def _filtered_query(import_id, aufsicht=None):
+    query = ImportRow.query.filter(ImportRow.import_id == import_id)
+    if aufsicht is not None:
+        query = query.filter(
+            ImportRow.persons.any(
+                (ImportRowPerson.role == "aufsicht")
+                & (ImportRowPerson.name_norm == normalize_name(aufsicht))
+            )
+        )
+    return query
+
+
+def _removed_query(import_obj, aufsicht=None):
+    matched = db.select(ImportRow.previous_row_id).where(
+        ImportRow.import_id == import_obj.id, ImportRow.previous_row_id.isnot(None)
+    )
+    return _filtered_query(import_obj.previous_import_id, aufsicht).filter(
+        ImportRow.row_fingerprint.isnot(None), ImportRow.id.not_in(matched)
+    )
+
+
+def removed_import_rows(import_obj, aufsicht=None):
+    if import_obj.previous_import_id is None:
+        return []
+    return (
+        _removed_query(import_obj, aufsicht)
+        .order_by(*_order_clauses([("Datum", "asc"), ("Startzeit", "asc")]))
+        .all()
+    )
+
+
+def changed_import_rows(import_obj):
+    rows = (
+        ImportRow.query.filter(
+            ImportRow.import_id == import_obj.id,
+            ImportRow.change.in_([CHANGE_ADDED, CHANGE_CHANGED]),
+        )
+        .order_by(*_order_clauses([("Datum", "asc"), ("Startzeit", "asc")]))
+        .all()
+    )
+    previous_ids = [row.previous_row_id for row in rows if row.previous_row_id]
+    previous = {}
+    if previous_ids:
+        previous = {
+            row.id: row
+            for row in ImportRow.query.filter(ImportRow.id.in_(previous_ids))
+        }
+    return [(row, previous.get(row.previous_row_id)) for row in rows]
+
+
+def import_change_counts(import_obj):
+    if import_obj.previous_import_id is None:
+        return None
+    counts = {CHANGE_ADDED: 0, CHANGE_CHANGED: 0, CHANGE_UNCHANGED: 0}
+    rows = (
+        db.session.query(ImportRow.change, func.count(ImportRow.id))
+        .filter(ImportRow.import_id == import_obj.id, ImportRow.change.isnot(None))
+        .group_by(ImportRow.change)
+    )
+    for change, count in rows:
+        counts[change] = count
+    counts[CHANGE_REMOVED] = _removed_query(import_obj).count()
+    return counts
+
+
+def count_import_rows(import_id, aufsicht=None):
+    return _filtered_query(import_id, aufsicht).count()
+
+
+def query_import_rows(import_id, aufsicht=None, sort_spec=None, limit=None, offset=0):
+    query = _filtered_query(import_id, aufsicht).order_by(*_order_clauses(sort_spec))
+    if offset:
+        query = query.offset(offset)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
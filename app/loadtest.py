@@ -0,0 +1,370 @@
+import http.cookiejar
+import io
+import os
+import random
+import re
+import socketserver
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from html import unescape
+
+from flask import got_request_exception
+
+from config import Config
+from .extensions import db
+from .models import Person
+from .synthetic import build_people, write_schedule
+
+SHED_STATUSES = {429, 503}
+SORT_KEYS = ["", "Datum", "Startzeit", "Dauer", "Prüfer", "Raum", "Prüfungsname"]
+OPTION_PATTERN = re.compile(r'<option value="([^"]*)"')
+ROWS_URL_PATTERN = re.compile(r'data-rows-url="([^"]+)"')
+
+
+class SmtpSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        self.reply("220 aufsichtshelper-sink ESMTP")
+        in_data = False
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    in_data = False
+                    self.server.messages += 1
+                    self.reply("250 OK")
+                continue
+            command = line[:4].upper()
+            if command == "EHLO":
+                self.reply("250 aufsichtshelper-sink")
+            elif command == "DATA":
+                in_data = True
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), SmtpSinkHandler)
+        self.messages = 0
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class ClientSession:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.get_data(as_text=True)
+
+    def post(self, path, data, files=None):
+        payload = dict(data)
+        for name, (filename, content) in (files or {}).items():
+            payload[name] = (io.BytesIO(content), filename)
+        response = self.client.post(
+            path, data=payload, content_type="multipart/form-data"
+        )
+        return response.status_code, response.get_data(as_text=True)
+
+
+class HttpSession:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+
+    def _open(self, request):
+        try:
+            with self.opener.open(request, timeout=300) as response:
+                return response.status, response.read().decode("utf-8", "replace")
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read().decode("utf-8", "replace")
+
+    def get(self, path):
+        return self._open(urllib.request.Request(self.base_url + path))
+
+    def post(self, path, data, files=None):
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in data.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"'
+                f"\r\n\r\n{value}\r\n".encode("utf-8")
+            )
+        for name, (filename, content) in (files or {}).items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                f'filename="{filename}"\r\n'
+                "Content-Type: application/octet-stream\r\n\r\n".encode("utf-8")
+                + content
+                + b"\r\n"
+            )
+        parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=b"".join(parts),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+        return self._open(request)
+
+
+class LoadStats:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.shed = {}
+        self.lock_errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, ok, shed=False):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(seconds)
+            if shed:
+                self.shed[endpoint] = self.shed.get(endpoint, 0) + 1
+            elif not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def record_exception(self, exc):
+        if "database is locked" in str(exc):
+            with self._lock:
+                self.lock_errors += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            endpoints[endpoint] = {
+                "requests": len(ordered),
+                "errors": self.errors.get(endpoint, 0),
+                "shed": self.shed.get(endpoint, 0),
+                "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0,
+                "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+                "mean_ms": round(statistics.mean(ordered) * 1000, 1),
+            }
+        total = sum(item["requests"] for item in endpoints.values())
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0,
+            "db_lock_errors": self.lock_errors,
+            "shed": sum(item["shed"] for item in endpoints.values()),
+            "endpoints": endpoints,
+        }
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def prepare_workbooks(workdir, count, rows, supervisors, seed=0):
+    paths = []
+    for index in range(count):
+        path = os.path.join(workdir, f"loadtest_{rows}_{seed + index}.xlsx")
+        if not os.path.exists(path):
+            write_schedule(
+                path,
+                rows=rows,
+                supervisors=supervisors,
+                headers=["standard", "alias", "merged"][index % 3],
+                seed=seed + index,
+            )
+        paths.append(path)
+    return paths
+
+
+def build_loadtest_app(workdir):
+    from . import create_app
+
+    class LoadTestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(workdir, "loadtest.db")
+        UPLOAD_FOLDER = os.path.join(workdir, "uploads")
+        EXPORT_FOLDER = os.path.join(workdir, "exports")
+        ADMISSION_LOCK_DIR = os.path.join(workdir, "locks")
+        # Alle simulierten Nutzer kommen von derselben Adresse.
+        UPLOAD_RATE_LIMIT = ""
+
+    app = create_app(LoadTestConfig)
+    app.instance_path = workdir
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def seed_persons(app, supervisors, seed=0, with_email=0.7):
+    rng = random.Random(seed)
+    with app.app_context():
+        for name in build_people(max(supervisors, 2), random.Random(seed)):
+            email = None
+            if rng.random() < with_email:
+                email = f"{uuid.uuid4().hex[:10]}@example.invalid"
+            db.session.add(Person(name=name, email=email, active=True))
+        db.session.commit()
+
+
+def simulate_user(session, workbooks, iterations, send_ratio, stats, rng):
+    def timed(endpoint, func):
+        start = time.perf_counter()
+        try:
+            status, body = func()
+        except Exception as exc:
+            stats.record_exception(exc)
+            stats.record(endpoint, time.perf_counter() - start, False)
+            return None
+        stats.record(
+            endpoint,
+            time.perf_counter() - start,
+            status < 400,
+            shed=status in SHED_STATUSES,
+        )
+        return body
+
+    path = rng.choice(workbooks)
+    with open(path, "rb") as handle:
+        content = handle.read()
+    timed(
+        "upload",
+        lambda: session.post(
+            "/", {"calendar_name": ""}, {"file": (os.path.basename(path), content)}
+        ),
+    )
+    body = timed("preview", lambda: session.get("/preview"))
+    if body is None:
+        return
+    names = [unescape(name) for name in OPTION_PATTERN.findall(body)]
+    names = [name for name in names if name and not name.isdigit()]
+    rows_match = ROWS_URL_PATTERN.search(body)
+
+    for _ in range(iterations):
+        if not names:
+            break
+        name = rng.choice(names)
+        query = {"aufsicht": name, "page": rng.randint(1, 3)}
+        sort_key = rng.choice(SORT_KEYS)
+        if sort_key:
+            query["sort"] = sort_key
+            query["dir"] = rng.choice(["asc", "desc"])
+        encoded = urllib.parse.urlencode(query)
+        timed("preview", lambda: session.get(f"/preview?{encoded}"))
+        if rows_match:
+            timed("api_rows", lambda: session.get(f"{rows_match.group(1)}?{encoded}"))
+        if rng.random() < send_ratio:
+            force_resend = "1" if rng.random() < 0.2 else ""
+            timed(
+                "send",
+                lambda: session.post(
+                    "/send", {"aufsicht": name, "force_resend": force_resend}
+                ),
+            )
+
+
+def run_load_test(
+    users=30,
+    iterations=10,
+    rows=2000,
+    workbooks=3,
+    supervisors=80,
+    send_ratio=0.2,
+    base_url=None,
+    workdir=None,
+    seed=0,
+):
+    workdir = workdir or tempfile.mkdtemp(prefix="aufsichtshelper-load-")
+    os.makedirs(workdir, exist_ok=True)
+    paths = prepare_workbooks(workdir, workbooks, rows, supervisors, seed)
+    stats = LoadStats()
+
+    app = None
+    if base_url is None:
+        app = build_loadtest_app(workdir)
+        seed_persons(app, supervisors, seed)
+
+        def on_exception(sender, exception, **extra):
+            stats.record_exception(exception)
+
+        got_request_exception.connect(on_exception, app)
+
+    previous_env = {
+        key: os.environ.get(key) for key in ("SMTP_HOST", "SMTP_PORT", "SMTP_USE_TLS")
+    }
+    with SmtpSink() as sink:
+        os.environ["SMTP_HOST"] = "127.0.0.1"
+        os.environ["SMTP_PORT"] = str(sink.server_address[1])
+        os.environ["SMTP_USE_TLS"] = "false"
+        try:
+            threads = []
+            for index in range(users):
+                session = HttpSession(base_url) if base_url else ClientSession(app)
+                thread = threading.Thread(
+                    target=simulate_user,
+                    args=(
+                        session,
+                        paths,
+                        iterations,
+                        send_ratio,
+                        stats,
+                        random.Random(seed + index),
+                    ),
+                )
+                threads.append(thread)
+
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            for key, value in previous_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    report = stats.report(elapsed)
+    report["config"] = {
+        "users": users,
+        "iterations": iterations,
+        "rows": rows,
+        "workbooks": workbooks,
+        "supervisors": supervisors,
+        "send_ratio": send_ratio,
+        "target": base_url or "wsgi-test-client",
+        "workdir": workdir,
+    }
+    report["smtp_messages"] = sink.messages
+    return report
@@ -0,0 +1,301 @@
+import gzip
+import json
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, literal, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .models import (
+    CANCELLED_STATUSES,
+    EXPORTED_STATUSES,
+    MailLog,
+    MailLogArchive,
+    status_in,
+)
+from .people import keyset_page
+
+MAIL_LOG_KEY = ("row_fingerprint", "role", "recipient_email")
+UNIQUE_STATUSES = (EXPORTED_STATUSES, CANCELLED_STATUSES)
+UPSERT_COLUMNS = ("event_uid", "sent_at", "status", "error")
+DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+ARCHIVE_COLUMNS = (
+    "id",
+    "event_uid",
+    "role",
+    "recipient_email",
+    "row_fingerprint",
+    "sent_at",
+    "status",
+    "error",
+)
+MAIL_LOG_STATUSES = {
+    "generated": "Erstellt",
+    "sent": "Versendet",
+    "cancelled": "Abgesagt",
+    "error": "Fehler",
+}
+HISTORY_PAGE_SIZES = (25, 50, 100, 250)
+PREFIX_END = "\U0010ffff"
+
+
+def mail_log_params(event_uid, role, recipient_email, row_fp, status, error=None):
+    return {
+        "event_uid": event_uid,
+        "role": role,
+        "recipient_email": recipient_email,
+        "row_fingerprint": row_fp,
+        "sent_at": datetime.utcnow(),
+        "status": status,
+        "error": error,
+    }
+
+
+def unique_statuses(status):
+    # None = kein eindeutiger Schluessel (Fehler), die Zeile wird einfach angehaengt.
+    for statuses in UNIQUE_STATUSES:
+        if status in statuses:
+            return statuses
+    return None
+
+
+def _conflict_insert(replace, statuses):
+    dialect_insert = DIALECT_INSERTS.get(db.session.get_bind().dialect.name)
+    if dialect_insert is None:
+        return None
+    statement = dialect_insert(MailLog)
+    if statuses is None:
+        return statement
+    if replace:
+        return statement.on_conflict_do_update(
+            index_elements=MAIL_LOG_KEY,
+            index_where=status_in(statuses),
+            set_={column: statement.excluded[column] for column in UPSERT_COLUMNS},
+        )
+    return statement.on_conflict_do_nothing(
+        index_elements=MAIL_LOG_KEY, index_where=status_in(statuses)
+    )
+
+
+def _key_filter(params, statuses):
+    return [
+        *(getattr(MailLog, column) == params[column] for column in MAIL_LOG_KEY),
+        MailLog.status.in_(statuses),
+    ]
+
+
+def _insert_one_fallback(params, replace):
+    statuses = unique_statuses(params["status"])
+    try:
+        with db.session.begin_nested():
+            result = db.session.execute(insert(MailLog).values(params))
+        return result.inserted_primary_key[0]
+    except IntegrityError:
+        if statuses is None:
+            raise
+        if not replace:
+            return None
+    db.session.execute(
+        update(MailLog)
+        .where(*_key_filter(params, statuses))
+        .values({column: params[column] for column in UPSERT_COLUMNS})
+    )
+    return None
+
+
+def claim_mail_log(params):
+    # Legt den Eintrag nur an, wenn es ihn noch nicht gibt; None = bereits vorhanden.
+    statement = _conflict_insert(False, unique_statuses(params["status"]))
+    if statement is None:
+        log_id = _insert_one_fallback(params, replace=False)
+    else:
+        log_id = db.session.scalar(statement.values(params).returning(MailLog.id))
+    db.session.commit()
+    return log_id
+
+
+def store_mail_log(params):
+    statement = _conflict_insert(True, unique_statuses(params["status"]))
+    if statement is None:
+        _insert_one_fallback(params, replace=True)
+    else:
+        db.session.execute(statement.values(params))
+    db.session.commit()
+
+
+def release_mail_log(log_id):
+    db.session.execute(db.delete(MailLog).where(MailLog.id == log_id))
+    db.session.commit()
+
+
+def insert_mail_logs(params_list, replace=False):
+    groups = {}
+    for params in params_list:
+        groups.setdefault(unique_statuses(params["status"]), []).append(params)
+    for statuses, group in groups.items():
+        statement = _conflict_insert(replace, statuses)
+        if statement is None:
+            for params in group:
+                _insert_one_fallback(params, replace)
+        else:
+            db.session.execute(statement, group)
+    if groups:
+        db.session.commit()
+
+
+def was_exported(row_fp, role, recipient_email):
+    return (
+        db.session.scalar(
+            db.select(MailLog.id)
+            .where(
+                MailLog.row_fingerprint == row_fp,
+                MailLog.role == role,
+                MailLog.recipient_email == recipient_email,
+                MailLog.status.in_(EXPORTED_STATUSES),
+            )
+            .limit(1)
+        )
+        is not None
+    )
+
+
+def semester_start(day):
+    # Sommersemester ab 1. April, Wintersemester ab 1. Oktober.
+    if day.month >= 10:
+        return date(day.year, 10, 1)
+    if day.month >= 4:
+        return date(day.year, 4, 1)
+    return date(day.year - 1, 10, 1)
+
+
+def semester_label(day):
+    start = semester_start(day)
+    if start.month == 4:
+        return f"SoSe {start.year}"
+    return f"WiSe {start.year}/{(start.year + 1) % 100:02d}"
+
+
+def retention_cutoff(semesters, today=None):
+    start = semester_start(today or date.today())
+    for _ in range(semesters):
+        start = semester_start(start - timedelta(days=1))
+    return datetime.combine(start, datetime.min.time())
+
+
+def count_archivable(cutoff):
+    return db.session.scalar(
+        db.select(db.func.count(MailLog.id)).where(MailLog.sent_at < cutoff)
+    )
+
+
+def _archive_rows(ids):
+    rows = db.session.execute(
+        db.select(*(getattr(MailLog, column) for column in ARCHIVE_COLUMNS))
+        .where(MailLog.id.in_(ids))
+        .order_by(MailLog.id)
+    )
+    return [row._asdict() for row in rows]
+
+
+def _write_archive_file(handle, rows):
+    # Ein gzip-Member pro Stapel, damit ein Abbruch nur den letzten Stapel trifft.
+    with gzip.GzipFile(fileobj=handle, mode="wb") as archive:
+        for row in rows:
+            line = json.dumps(row, default=str, ensure_ascii=False)
+            archive.write(line.encode("utf-8") + b"\n")
+    handle.flush()
+
+
+def archive_mail_log(cutoff, batch_size=500, pause=0.0, archive_file=None):
+    # Kurze Transaktionen pro Stapel, damit Exporte zwischendurch schreiben koennen.
+    moved = 0
+    handle = open(archive_file, "ab") if archive_file else None
+    try:
+        while True:
+            ids = db.session.scalars(
+                db.select(MailLog.id)
+                .where(MailLog.sent_at < cutoff)
+                .order_by(MailLog.id)
+                .limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            if handle is not None:
+                _write_archive_file(handle, _archive_rows(ids))
+            else:
+                columns = [getattr(MailLog, column) for column in ARCHIVE_COLUMNS]
+                db.session.execute(
+                    insert(MailLogArchive).from_select(
+                        list(ARCHIVE_COLUMNS) + ["archived_at"],
+                        db.select(*columns, literal(datetime.utcnow())).where(
+                            MailLog.id.in_(ids)
+                        ),
+                    )
+                )
+            db.session.execute(db.delete(MailLog).where(MailLog.id.in_(ids)))
+            db.session.commit()
+            moved += len(ids)
+            if pause:
+                time.sleep(pause)
+    finally:
+        if handle is not None:
+            handle.close()
+    return moved
+
+
+def parse_history_date(value):
+    try:
+        return date.fromisoformat((value or "").strip())
+    except ValueError:
+        return None
+
+
+def history_filters(model, recipient=None, status=None, date_from=None, date_to=None):
+    filters = []
+    if recipient:
+        filters.append(model.recipient_email >= recipient)
+        filters.append(model.recipient_email < recipient + PREFIX_END)
+    if status:
+        filters.append(model.status == status)
+    if date_from:
+        filters.append(model.sent_at >= date_from)
+    if date_to:
+        filters.append(model.sent_at < date_to + timedelta(days=1))
+    return filters
+
+
+def history_cursor(model, entry_id):
+    if not entry_id:
+        return None
+    row = db.session.execute(
+        db.select(model.sent_at, model.id).where(model.id == entry_id)
+    ).first()
+    return tuple(row) if row and row.sent_at is not None else None
+
+
+def list_history_page(
+    archived=False,
+    recipient=None,
+    status=None,
+    date_from=None,
+    date_to=None,
+    per_page=50,
+    after=None,
+    before=None,
+):
+    model = MailLogArchive if archived else MailLog
+    query = model.query.filter(
+        model.sent_at.isnot(None),
+        *history_filters(model, recipient, status, date_from, date_to),
+    )
+    return keyset_page(
+        query,
+        model.sent_at,
+        model.id,
+        per_page,
+        after=history_cursor(model, after),
+        before=history_cursor(model, before),
+        descending=True,
+    )
@@ -0,0 +1,209 @@
+import io
+import json
+import linecache
+import tracemalloc
+import zipfile
+from contextlib import contextmanager, nullcontext
+
+from flask import current_app, g, has_request_context, render_template, request
+
+PROFILE_HEADER = "X-Memory-Profile"
+
+MEMORY_CEILINGS = {
+    "read_excel": (4 * 1024, 8.0),
+    "preview_format": (1024, 2.0),
+    "preview_render": (2 * 1024, 6.0),
+    "ics_generate": (1024, 2.0),
+    "zip_bundle": (1024, 2.5),
+}
+
+
+class MemoryProfiler:
+    def __init__(self, top=5):
+        self.top = top
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot() if self.top else None
+        start_current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            entry = {
+                "stage": name,
+                "peak_kib": round(max(peak - start_current, 0) / 1024, 1),
+                "retained_kib": round((current - start_current) / 1024, 1),
+                "top": [],
+            }
+            if before is not None:
+                entry["top"] = top_allocations(before, self.top)
+            self.stages.append(entry)
+            if started:
+                tracemalloc.stop()
+
+    def summary(self):
+        return [
+            {key: value for key, value in entry.items() if key != "top"}
+            for entry in self.stages
+        ]
+
+
+def top_allocations(before, limit):
+    after = tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),)
+    )
+    sites = []
+    for stat in after.compare_to(before, "lineno")[:limit]:
+        frame = stat.traceback[0]
+        sites.append(
+            {
+                "site": f"{frame.filename}:{frame.lineno}",
+                "code": linecache.getline(frame.filename, frame.lineno).strip(),
+                "size_diff_kib": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+            }
+        )
+    return sites
+
+
+def profile_stage(name):
+    if has_request_context():
+        profiler = g.get("memory_profiler")
+        if profiler is not None:
+            return profiler.stage(name)
+    return nullcontext()
+
+
+def init_request_profiling(app):
+    @app.before_request
+    def start_memory_profile():
+        if not app.config.get("MEMORY_PROFILING"):
+            return
+        if request.headers.get(PROFILE_HEADER) != "1":
+            return
+        g.memory_profiler = MemoryProfiler(
+            top=app.config.get("MEMORY_PROFILE_TOP", 5)
+        )
+        g.memory_profile_started = not tracemalloc.is_tracing()
+        if g.memory_profile_started:
+            tracemalloc.start()
+
+    @app.after_request
+    def finish_memory_profile(response):
+        profiler = g.pop("memory_profiler", None)
+        if profiler is None:
+            return response
+        if g.pop("memory_profile_started", False):
+            tracemalloc.stop()
+        response.headers[PROFILE_HEADER] = json.dumps(
+            profiler.summary(), separators=(",", ":")
+        )
+        for entry in profiler.stages:
+            current_app.logger.info(
+                "Speicherprofil %s %s: Spitze %.1f KiB, behalten %.1f KiB, Top: %s",
+                request.path,
+                entry["stage"],
+                entry["peak_kib"],
+                entry["retained_kib"],
+                "; ".join(
+                    f"{site['site']} {site['size_diff_kib']} KiB"
+                    for site in entry["top"]
+                ),
+            )
+        return response
+
+
+def ceiling_kib(stage, rows):
+    base_kib, kib_per_row = MEMORY_CEILINGS[stage]
+    return base_kib + kib_per_row * rows
+
+
+def profile_pipeline(workdir, rows, top=5, seed=0):
+    from .bench import ensure_schedule, fingerprint_rows
+    from .excel import read_excel
+    from .ics import build_ics_event
+    from .preview import (
+        MULTILINE_COLUMNS,
+        PREVIEW_COLUMNS,
+        SORTABLE_COLUMNS,
+        format_preview_rows,
+    )
+
+    profiler = MemoryProfiler(top=top)
+    path = ensure_schedule(workdir, rows, seed=seed)
+
+    with profiler.stage("read_excel"):
+        parsed = read_excel(path)
+
+    with profiler.stage("preview_format"):
+        formatted = format_preview_rows(parsed)
+
+    with profiler.stage("preview_render"):
+        with current_app.test_request_context("/preview"):
+            html = render_template(
+                "preview_content.html",
+                expected_columns=PREVIEW_COLUMNS,
+                total_rows=len(parsed),
+                filtered_count=len(formatted),
+                aufsicht_names=[],
+                selected_aufsicht="",
+                preview_rows=formatted,
+                missing_contacts=[],
+                filter_applied=True,
+                multiline_columns=MULTILINE_COLUMNS,
+                sortable_columns=SORTABLE_COLUMNS,
+                sort_key="",
+                sort_dir="asc",
+                sort_param="",
+                dir_param="",
+                sort_links={
+                    col: {"asc": "#", "desc": "#"} for col in SORTABLE_COLUMNS
+                },
+                pagination={
+                    "page": 1,
+                    "pages": 1,
+                    "per_page": len(formatted),
+                    "first_index": 1,
+                    "last_index": len(formatted),
+                    "prev_url": None,
+                    "next_url": None,
+                    "page_sizes": (),
+                },
+                rows_api_url="",
+            )
+    del html, formatted
+
+    events = fingerprint_rows(parsed)
+    with profiler.stage("ics_generate"):
+        generated_files = [
+            (
+                f"{event['row_fingerprint'][:12]}.ics",
+                build_ics_event(event, "aufsicht", "memprofile.local")[0],
+            )
+            for event in events
+        ]
+
+    with profiler.stage("zip_bundle"):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as bundle:
+            for filename, payload in generated_files:
+                bundle.writestr(filename, payload)
+
+    results = []
+    for entry in profiler.stages:
+        limit = ceiling_kib(entry["stage"], rows)
+        results.append(
+            dict(
+                entry,
+                rows=rows,
+                ceiling_kib=round(limit, 1),
+                within_ceiling=entry["peak_kib"] <= limit,
+            )
+        )
+    return results
@@ -1,13 +1,26 @@
 ﻿from datetime import datetime
 
+from sqlalchemy.orm import validates
+
+from .excel import normalize_name
 from .extensions import db
 
+# Exporte und Absagen einmal pro Zeile/Rolle/Empfaenger; Fehler beliebig oft.
+EXPORTED_STATUSES = ("generated", "sent")
+CANCELLED_STATUSES = ("cancelled",)
+
+
+def status_in(statuses):
+    # Als Literal, damit SQLite und PostgreSQL den Teilindex bei ON CONFLICT erkennen.
+    return db.text(f"status IN ({', '.join(repr(status) for status in statuses)})")
+
 
 class Person(db.Model):
     __tablename__ = "persons"
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), unique=True, nullable=False)
+    name_norm = db.Column(db.String(200), default="", nullable=False, index=True)
     email = db.Column(db.String(200), nullable=True)
     active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -16,17 +29,164 @@ class Person(db.Model):
         "PersonAlias", backref="person", cascade="all, delete-orphan", lazy=True
     )
 
+    @validates("name")
+    def _sync_name_norm(self, key, value):
+        self.name_norm = normalize_name(value)[:200]
+        return value
+
 
 class PersonAlias(db.Model):
     __tablename__ = "person_aliases"
 
     id = db.Column(db.Integer, primary_key=True)
-    person_id = db.Column(db.Integer, db.ForeignKey("persons.id"), nullable=False)
+    person_id = db.Column(
+        db.Integer, db.ForeignKey("persons.id"), nullable=False, index=True
+    )
     alias_name = db.Column(db.String(200), unique=True, nullable=False)
+    alias_norm = db.Column(db.String(200), default="", nullable=False, index=True)
+
+    @validates("alias_name")
+    def _sync_alias_norm(self, key, value):
+        self.alias_norm = normalize_name(value)[:200]
+        return value
+
+
+class Import(db.Model):
+    __tablename__ = "imports"
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    stored_name = db.Column(db.String(255), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False, index=True)
+    row_count = db.Column(db.Integer, default=0, nullable=False)
+    stats = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    previous_import_id = db.Column(
+        db.Integer,
+        db.ForeignKey("imports.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True,
+    )
+
+    previous_import = db.relationship("Import", remote_side=[id], lazy=True)
+    rows = db.relationship(
+        "ImportRow",
+        backref="import_",
+        cascade="all, delete-orphan",
+        lazy="dynamic",
+        order_by="ImportRow.position",
+    )
+
+
+class ImportRow(db.Model):
+    __tablename__ = "import_rows"
+    __table_args__ = (
+        db.UniqueConstraint("import_id", "position"),
+        db.Index("ix_import_rows_import_datum", "import_id", "datum", "startzeit"),
+        db.Index("ix_import_rows_import_startzeit", "import_id", "startzeit"),
+        db.Index("ix_import_rows_import_raum", "import_id", "raum"),
+        db.Index(
+            "ix_import_rows_import_pruefungsname_sort", "import_id", "pruefungsname_sort"
+        ),
+        db.Index("ix_import_rows_import_pruefer_sort", "import_id", "pruefer_sort"),
+        db.Index("ix_import_rows_import_raum_sort", "import_id", "raum_sort"),
+        db.Index("ix_import_rows_import_change", "import_id", "change"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    import_id = db.Column(db.Integer, db.ForeignKey("imports.id"), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    pruefungsname = db.Column(db.Text, nullable=True)
+    datum = db.Column(db.Date, nullable=True)
+    datum_raw = db.Column(db.String(100), nullable=True)
+    startzeit = db.Column(db.Time, nullable=True)
+    startzeit_raw = db.Column(db.String(100), nullable=True)
+    dauer_minuten = db.Column(db.Integer, nullable=True)
+    dauer_raw = db.Column(db.String(100), nullable=True)
+    pruefer = db.Column(db.Text, nullable=True)
+    aufsicht = db.Column(db.Text, nullable=True)
+    abloesung = db.Column(db.Text, nullable=True)
+    raum = db.Column(db.String(255), nullable=True)
+    pruefungsname_sort = db.Column(db.String(255), default="", nullable=False)
+    pruefer_sort = db.Column(db.String(255), default="", nullable=False)
+    raum_sort = db.Column(db.String(255), default="", nullable=False)
+    row_fingerprint = db.Column(db.String(64), nullable=True)
+    uid_fingerprint = db.Column(db.String(64), nullable=True)
+    sequence = db.Column(db.Integer, default=0, nullable=False)
+    change = db.Column(db.String(10), nullable=True)
+    previous_row_id = db.Column(
+        db.Integer,
+        db.ForeignKey("import_rows.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True,
+    )
+
+    persons = db.relationship(
+        "ImportRowPerson", backref="row", cascade="all, delete-orphan", lazy=True
+    )
+
+    def to_record(self):
+        return {
+            "Pr\u00fcfungsname": self.pruefungsname,
+            "Datum": self.datum if self.datum is not None else self.datum_raw,
+            "Startzeit": (
+                self.startzeit if self.startzeit is not None else self.startzeit_raw
+            ),
+            "Dauer": (
+                self.dauer_minuten if self.dauer_minuten is not None else self.dauer_raw
+            ),
+            "Pr\u00fcfer": self.pruefer,
+            "Aufsicht": self.aufsicht,
+            "Abl\u00f6sung": self.abloesung,
+            "Raum": self.raum,
+        }
+
+
+class ImportRowPerson(db.Model):
+    __tablename__ = "import_row_persons"
+    __table_args__ = (
+        db.Index("ix_import_row_persons_role_name", "role", "name_norm"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    import_row_id = db.Column(
+        db.Integer, db.ForeignKey("import_rows.id"), nullable=False, index=True
+    )
+    role = db.Column(db.String(20), nullable=False)
+    name = db.Column(db.String(200), nullable=False)
+    name_norm = db.Column(db.String(200), nullable=False)
+    person_id = db.Column(
+        db.Integer,
+        db.ForeignKey("persons.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True,
+    )
 
 
 class MailLog(db.Model):
     __tablename__ = "mail_log"
+    __table_args__ = (
+        db.Index(
+            "ux_mail_log_export",
+            "row_fingerprint",
+            "role",
+            "recipient_email",
+            unique=True,
+            sqlite_where=status_in(EXPORTED_STATUSES),
+            postgresql_where=status_in(EXPORTED_STATUSES),
+        ),
+        db.Index(
+            "ux_mail_log_cancel",
+            "row_fingerprint",
+            "role",
+            "recipient_email",
+            unique=True,
+            sqlite_where=status_in(CANCELLED_STATUSES),
+            postgresql_where=status_in(CANCELLED_STATUSES),
+        ),
+        db.Index("ix_mail_log_sent_at", "sent_at", "id"),
+        db.Index("ix_mail_log_recipient_sent_at", "recipient_email", "sent_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     event_uid = db.Column(db.String(255), nullable=False)
@@ -38,5 +198,42 @@ class MailLog(db.Model):
     error = db.Column(db.Text, nullable=True)
 
 
-__all__ = ["Person", "PersonAlias", "MailLog"]
+class MailLogArchive(db.Model):
+    __tablename__ = "mail_log_archive"
+    __table_args__ = (
+        db.Index("ix_mail_log_archive_sent_at", "sent_at", "id"),
+        db.Index(
+            "ix_mail_log_archive_recipient_sent_at", "recipient_email", "sent_at"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    event_uid = db.Column(db.String(255), nullable=False)
+    role = db.Column(db.String(20), nullable=False)
+    recipient_email = db.Column(db.String(200), nullable=False)
+    row_fingerprint = db.Column(db.String(64), nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    status = db.Column(db.String(20), nullable=False)
+    error = db.Column(db.Text, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class DataVersion(db.Model):
+    # Zaehler pro Datenbereich, damit alle Worker veraltete Caches erkennen.
+    __tablename__ = "data_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+
+__all__ = [
+    "Person",
+    "PersonAlias",
+    "Import",
+    "ImportRow",
+    "ImportRowPerson",
+    "MailLog",
+    "MailLogArchive",
+    "DataVersion",
+]
 
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from werkzeug.utils import secure_filename
+
+from .excel import parse_date_value
+
+
+def default_calendar_name(rows=None):
+    year = datetime.now().year
+    if rows:
+        for row in rows:
+            try:
+                year = parse_date_value(row.get("Datum")).year
+                break
+            except ValueError:
+                continue
+    return f"Prüfungsaufsicht_{year}"
+
+
+def build_ics_filename(prefix, event_data, name):
+    date_str = event_data["datum"].strftime("%Y-%m-%d")
+    time_str = event_data["startzeit"].strftime("%H-%M")
+    base_name = (
+        f"{prefix}_{date_str}_{time_str}_{event_data['pruefungsname']}_{name}.ics"
+    )
+    return secure_filename(base_name) or (
+        f"{prefix}_{event_data['row_fingerprint'][:12]}.ics"
+    )
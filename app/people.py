@@ -0,0 +1,135 @@
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import contains_eager
+
+from .excel import normalize_name
+from .extensions import db
+from .models import Person, PersonAlias
+
+PERSON_PAGE_SIZES = (25, 50, 100, 250)
+PREFIX_END = "\U0010ffff"
+
+
+def prefix_filter(column, term):
+    prefix = normalize_name(term)[:200]
+    return and_(column >= prefix, column < prefix + PREFIX_END)
+
+
+def _beyond(sort_column, id_column, cursor, backwards):
+    sort_value, row_id = cursor
+    if backwards:
+        return or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, id_column < row_id),
+        )
+    return or_(
+        sort_column > sort_value,
+        and_(sort_column == sort_value, id_column > row_id),
+    )
+
+
+def keyset_page(
+    query,
+    sort_column,
+    id_column,
+    per_page,
+    after=None,
+    before=None,
+    descending=False,
+):
+    if before is not None:
+        ordering = (sort_column.asc(), id_column.asc())
+        if not descending:
+            ordering = (sort_column.desc(), id_column.desc())
+        rows = (
+            query.filter(_beyond(sort_column, id_column, before, not descending))
+            .order_by(*ordering)
+            .limit(per_page + 1)
+            .all()
+        )
+        has_prev = len(rows) > per_page
+        return list(reversed(rows[:per_page])), has_prev, True
+
+    if after is not None:
+        query = query.filter(_beyond(sort_column, id_column, after, descending))
+    ordering = (sort_column.asc(), id_column.asc())
+    if descending:
+        ordering = (sort_column.desc(), id_column.desc())
+    rows = query.order_by(*ordering).limit(per_page + 1).all()
+    return rows[:per_page], after is not None, len(rows) > per_page
+
+
+def person_cursor(person_id):
+    if not person_id:
+        return None
+    row = db.session.execute(
+        db.select(Person.name_norm, Person.id).where(Person.id == person_id)
+    ).first()
+    return tuple(row) if row else None
+
+
+def alias_cursor(alias_id):
+    if not alias_id:
+        return None
+    row = db.session.execute(
+        db.select(PersonAlias.alias_norm, PersonAlias.id).where(
+            PersonAlias.id == alias_id
+        )
+    ).first()
+    return tuple(row) if row else None
+
+
+def search_persons(term=None):
+    query = Person.query
+    if term and normalize_name(term):
+        alias_matches = db.select(PersonAlias.person_id).where(
+            prefix_filter(PersonAlias.alias_norm, term)
+        )
+        query = query.filter(
+            or_(
+                prefix_filter(Person.name_norm, term),
+                Person.id.in_(alias_matches),
+            )
+        )
+    return query
+
+
+def search_aliases(term=None):
+    query = PersonAlias.query.join(Person, Person.id == PersonAlias.person_id).options(
+        contains_eager(PersonAlias.person)
+    )
+    if term and normalize_name(term):
+        query = query.filter(
+            or_(
+                prefix_filter(PersonAlias.alias_norm, term),
+                prefix_filter(Person.name_norm, term),
+            )
+        )
+    return query
+
+
+def list_persons_page(term=None, per_page=50, after=None, before=None):
+    return keyset_page(
+        search_persons(term),
+        Person.name_norm,
+        Person.id,
+        per_page,
+        after=person_cursor(after),
+        before=person_cursor(before),
+    )
+
+
+def list_aliases_page(term=None, per_page=50, after=None, before=None):
+    return keyset_page(
+        search_aliases(term),
+        PersonAlias.alias_norm,
+        PersonAlias.id,
+        per_page,
+        after=alias_cursor(after),
+        before=alias_cursor(before),
+    )
+
+
+def person_choices():
+    return db.session.execute(
+        db.select(Person.id, Person.name).order_by(Person.name_norm, Person.id)
+    ).all()
@@ -0,0 +1,285 @@
+import os
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from .excel import display_value, normalize_name, read_sheet_rows
+from .extensions import db
+from .fuzzy import bump_name_index_version
+from .models import Person, PersonAlias
+
+ROSTER_EXTENSIONS = {".csv", ".ods", ".xlsx"}
+ROSTER_COLUMNS = {
+    "name": ["Name", "Person", "Mitarbeiter"],
+    "email": ["E-Mail", "Email", "Mail", "E-Mail-Adresse"],
+    "active": ["Aktiv", "Active", "Status"],
+    "aliases": ["Alias", "Aliase", "Aliasse", "Alias-Namen"],
+}
+TRUE_VALUES = {"1", "ja", "j", "yes", "y", "true", "wahr", "x", "aktiv"}
+FALSE_VALUES = {"0", "nein", "n", "no", "false", "falsch", "inaktiv"}
+ALIAS_SEPARATORS = (";", "|", "\n")
+UPDATE_CHUNK = 500
+
+
+def _header_key(value):
+    return normalize_name(value).replace(" ", "")
+
+
+def read_roster(file_path):
+    extension = os.path.splitext(file_path.lower())[1]
+    if extension not in ROSTER_EXTENSIONS:
+        raise ValueError("Nur .csv-, .ods- und .xlsx-Dateien sind erlaubt.")
+    rows = list(read_sheet_rows(file_path))
+    if not rows:
+        raise ValueError("Datei ist leer")
+
+    targets = {
+        field: {_header_key(name) for name in names}
+        for field, names in ROSTER_COLUMNS.items()
+    }
+    columns = {}
+    for index, value in enumerate(rows[0]):
+        key = _header_key(value)
+        for field, names in targets.items():
+            if key in names and field not in columns:
+                columns[field] = index
+    if "name" not in columns:
+        raise ValueError("Spalte Name fehlt")
+
+    entries = []
+    for line, row in enumerate(rows[1:], start=2):
+        values = {
+            field: display_value(row[index]).strip() if index < len(row) else ""
+            for field, index in columns.items()
+        }
+        if not any(values.values()):
+            continue
+        values["row"] = line
+        entries.append(values)
+    return entries, sorted(columns)
+
+
+def parse_active(value):
+    text = normalize_name(value)
+    if not text:
+        return True
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"Unbekannter Wert fuer Aktiv: {value}")
+
+
+def split_aliases(value):
+    text = value or ""
+    for separator in ALIAS_SEPARATORS[1:]:
+        text = text.replace(separator, ALIAS_SEPARATORS[0])
+    return [part.strip() for part in text.split(ALIAS_SEPARATORS[0]) if part.strip()]
+
+
+def plan_roster(entries, columns, deactivate_missing=False):
+    persons = {normalize_name(person.name): person for person in Person.query}
+    aliases = {
+        normalize_name(alias.alias_name): alias.person_id for alias in PersonAlias.query
+    }
+    plan = {
+        "rows": len(entries),
+        "errors": [],
+        "insert": [],
+        "update": [],
+        "deactivate": [],
+        "aliases": [],
+        "unchanged": 0,
+    }
+
+    seen = {}
+    alias_owner = {}
+    for entry in entries:
+        name = entry.get("name", "")
+        name_norm = normalize_name(name)
+        if not name_norm:
+            plan["errors"].append({"row": entry["row"], "reason": "Name fehlt"})
+            continue
+        if len(name) > 200:
+            plan["errors"].append(
+                {"row": entry["row"], "reason": "Name laenger als 200 Zeichen"}
+            )
+            continue
+        if name_norm in seen:
+            plan["errors"].append(
+                {
+                    "row": entry["row"],
+                    "reason": f"{name} doppelt (bereits in Zeile {seen[name_norm]})",
+                }
+            )
+            continue
+        seen[name_norm] = entry["row"]
+
+        email = entry.get("email", "")
+        if email and ("@" not in email or any(char.isspace() for char in email)):
+            plan["errors"].append(
+                {"row": entry["row"], "reason": f"Ungueltige E-Mail: {email}"}
+            )
+            continue
+        try:
+            active = parse_active(entry.get("active"))
+        except ValueError as exc:
+            plan["errors"].append({"row": entry["row"], "reason": str(exc)})
+            continue
+
+        person = persons.get(name_norm)
+        if person is None:
+            plan["insert"].append(
+                {
+                    "row": entry["row"],
+                    "name": name,
+                    "email": email or None,
+                    "active": active,
+                }
+            )
+        else:
+            values = {
+                "name": name,
+                "email": email or person.email,
+                "active": active if "active" in columns else person.active,
+            }
+            changes = {
+                field: (getattr(person, field), value)
+                for field, value in values.items()
+                if getattr(person, field) != value
+            }
+            if changes:
+                plan["update"].append(
+                    {
+                        "row": entry["row"],
+                        "id": person.id,
+                        "name": name,
+                        "values": values,
+                        "changes": changes,
+                    }
+                )
+            else:
+                plan["unchanged"] += 1
+
+        for alias_name in split_aliases(entry.get("aliases")):
+            alias_norm = normalize_name(alias_name)
+            if alias_norm == name_norm or alias_owner.get(alias_norm) == name_norm:
+                continue
+            owner_id = aliases.get(alias_norm)
+            if owner_id is not None:
+                if person is None or owner_id != person.id:
+                    plan["errors"].append(
+                        {
+                            "row": entry["row"],
+                            "reason": f"Alias {alias_name} gehoert zu einer "
+                            "anderen Person",
+                        }
+                    )
+                continue
+            if alias_norm in persons or alias_norm in alias_owner:
+                plan["errors"].append(
+                    {
+                        "row": entry["row"],
+                        "reason": f"Alias {alias_name} ist bereits vergeben",
+                    }
+                )
+                continue
+            alias_owner[alias_norm] = name_norm
+            plan["aliases"].append(
+                {
+                    "row": entry["row"],
+                    "person_name": name,
+                    "person_norm": name_norm,
+                    "person_id": person.id if person else None,
+                    "alias_name": alias_name[:200],
+                }
+            )
+
+    for alias_norm in alias_owner:
+        if alias_norm in seen:
+            plan["errors"].append(
+                {
+                    "row": seen[alias_norm],
+                    "reason": "Name ist gleichzeitig Alias einer anderen Person",
+                }
+            )
+
+    if deactivate_missing:
+        plan["deactivate"] = [
+            {"id": person.id, "name": person.name}
+            for name_norm, person in sorted(persons.items())
+            if name_norm not in seen and person.active
+        ]
+    return plan
+
+
+def apply_roster(plan):
+    if plan["errors"]:
+        raise ValueError("Import enthaelt Fehler und wurde nicht uebernommen.")
+
+    try:
+        new_ids = {}
+        if plan["insert"]:
+            ids = db.session.scalars(
+                insert(Person).returning(Person.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "name": item["name"],
+                        "name_norm": normalize_name(item["name"])[:200],
+                        "email": item["email"],
+                        "active": item["active"],
+                    }
+                    for item in plan["insert"]
+                ],
+            )
+            for item, person_id in zip(plan["insert"], ids):
+                new_ids[normalize_name(item["name"])] = person_id
+        if plan["update"]:
+            db.session.execute(
+                update(Person),
+                [
+                    {
+                        "id": item["id"],
+                        "name_norm": normalize_name(item["values"]["name"])[:200],
+                        **item["values"],
+                    }
+                    for item in plan["update"]
+                ],
+            )
+        deactivate_ids = [item["id"] for item in plan["deactivate"]]
+        for start in range(0, len(deactivate_ids), UPDATE_CHUNK):
+            db.session.execute(
+                update(Person)
+                .where(Person.id.in_(deactivate_ids[start : start + UPDATE_CHUNK]))
+                .values(active=False)
+            )
+        if plan["aliases"]:
+            db.session.execute(
+                insert(PersonAlias),
+                [
+                    {
+                        "person_id": item["person_id"] or new_ids[item["person_norm"]],
+                        "alias_name": item["alias_name"],
+                        "alias_norm": normalize_name(item["alias_name"])[:200],
+                    }
+                    for item in plan["aliases"]
+                ],
+            )
+        bump_name_index_version()
+        db.session.commit()
+    except IntegrityError as exc:
+        db.session.rollback()
+        raise ValueError(f"Import konnte nicht uebernommen werden: {exc.orig}") from exc
+    return summarize_roster(plan)
+
+
+def summarize_roster(plan):
+    return {
+        "rows": plan["rows"],
+        "errors": len(plan["errors"]),
+        "inserts": len(plan["insert"]),
+        "updates": len(plan["update"]),
+        "deactivations": len(plan["deactivate"]),
+        "aliases": len(plan["aliases"]),
+        "unchanged": plan["unchanged"],
+    }
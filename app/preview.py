@@ -0,0 +1,140 @@
+from flask import url_for
+
+from .excel import EXPECTED_COLUMNS, preview_rows
+from .imports import (
+    count_import_rows,
+    format_sort_spec,
+    import_person_names,
+    parse_sort_spec,
+    query_import_rows,
+)
+from .tokens import split_display_names, split_display_rooms
+
+PREVIEW_PAGE_SIZES = (50, 100, 250, 500)
+PREVIEW_COLUMNS = [col for col in EXPECTED_COLUMNS if col != "Ablösung"]
+SORTABLE_COLUMNS = [
+    "Prüfungsname",
+    "Datum",
+    "Startzeit",
+    "Dauer",
+    "Prüfer",
+    "Raum",
+]
+MULTILINE_COLUMNS = ["Prüfer", "Aufsicht", "Raum"]
+
+
+def parse_preview_args(args, aufsicht_names, default_page_size):
+    selected = args.get("aufsicht") or (aufsicht_names[0] if aufsicht_names else "")
+    sort_spec = parse_sort_spec(args.get("sort"), args.get("dir"))
+
+    per_page = args.get("per_page", type=int)
+    if per_page not in PREVIEW_PAGE_SIZES:
+        per_page = default_page_size
+    offset = args.get("offset", type=int)
+    page = args.get("page", type=int) or 1
+    if offset is not None and offset >= 0:
+        page = offset // per_page + 1
+
+    return {
+        "selected": selected,
+        "filter_applied": bool(args.get("aufsicht")),
+        "sort_spec": sort_spec,
+        "per_page": per_page,
+        "page": page,
+    }
+
+
+def format_preview_rows(records):
+    formatted_rows = preview_rows(records)
+    for row in formatted_rows:
+        row["Prüfer"] = split_display_names(row.get("Prüfer"))
+        row["Aufsicht"] = split_display_names(row.get("Aufsicht"))
+        row["Raum"] = split_display_rooms(row.get("Raum"))
+    return formatted_rows
+
+
+def build_sort_links(selected, sort_spec, per_page, endpoint="main.preview"):
+    sort_links = {}
+    for col in SORTABLE_COLUMNS:
+        sort_links[col] = {}
+        for direction in ("asc", "desc"):
+            link_spec = [(col, direction)] + [
+                item for item in sort_spec if item[0] != col
+            ]
+            link_sort, link_dir = format_sort_spec(link_spec[:3])
+            sort_links[col][direction] = url_for(
+                endpoint,
+                aufsicht=selected,
+                sort=link_sort,
+                dir=link_dir,
+                per_page=per_page,
+            )
+    return sort_links
+
+
+def build_preview(import_obj, args, default_page_size, endpoint="main.preview"):
+    aufsicht_names = import_person_names(import_obj.id, role="aufsicht")
+    params = parse_preview_args(args, aufsicht_names, default_page_size)
+    selected = params["selected"]
+    sort_spec = params["sort_spec"]
+    per_page = params["per_page"]
+
+    filtered_count = 0
+    records = []
+    if selected:
+        filtered_count = count_import_rows(import_obj.id, aufsicht=selected)
+    page_count = max((filtered_count + per_page - 1) // per_page, 1)
+    page = min(max(params["page"], 1), page_count)
+    if filtered_count:
+        records = [
+            row.to_record()
+            for row in query_import_rows(
+                import_obj.id,
+                aufsicht=selected,
+                sort_spec=sort_spec,
+                limit=per_page,
+                offset=(page - 1) * per_page,
+            )
+        ]
+
+    sort_key, sort_dir = sort_spec[0] if sort_spec else ("", "asc")
+    sort_param, dir_param = format_sort_spec(sort_spec)
+
+    def page_url(number):
+        return url_for(
+            endpoint,
+            aufsicht=selected,
+            sort=sort_param or None,
+            dir=dir_param or None,
+            per_page=per_page,
+            page=number,
+        )
+
+    pagination = {
+        "page": page,
+        "pages": page_count,
+        "per_page": per_page,
+        "first_index": (page - 1) * per_page + 1 if records else 0,
+        "last_index": (page - 1) * per_page + len(records),
+        "prev_url": page_url(page - 1) if page > 1 else None,
+        "next_url": page_url(page + 1) if page < page_count else None,
+        "page_sizes": PREVIEW_PAGE_SIZES,
+    }
+
+    return {
+        "expected_columns": PREVIEW_COLUMNS,
+        "total_rows": import_obj.row_count,
+        "filtered_count": filtered_count,
+        "aufsicht_names": aufsicht_names,
+        "selected_aufsicht": selected,
+        "preview_rows": format_preview_rows(records),
+        "filter_applied": params["filter_applied"],
+        "multiline_columns": MULTILINE_COLUMNS,
+        "sortable_columns": SORTABLE_COLUMNS,
+        "sort_key": sort_key,
+        "sort_dir": sort_dir,
+        "sort_param": sort_param,
+        "dir_param": dir_param,
+        "sort_links": build_sort_links(selected, sort_spec, per_page, endpoint),
+        "pagination": pagination,
+    }
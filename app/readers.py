@@ -0,0 +1,169 @@
+import codecs
+import csv
+import re
+import zipfile
+from datetime import datetime, timedelta
+from xml.etree import ElementTree as ET
+
+CSV_SAMPLE_BYTES = 64 * 1024
+CSV_SNIFF_CHARS = 8192
+CSV_DELIMITERS = ";,\t"
+ODS_CONTENT = "content.xml"
+ODS_TABLE = "{urn:oasis:names:tc:opendocument:xmlns:table:1.0}"
+ODS_OFFICE = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+ODS_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+ODS_CELLS = {ODS_TABLE + "table-cell", ODS_TABLE + "covered-table-cell"}
+ODS_NUMBER_TYPES = {"float", "percentage", "currency"}
+# LibreOffice schreibt leere Restzeilen/-spalten als eine Zeile mit riesigem Repeat.
+MAX_REPEAT = 1000
+
+_ODS_DURATION = re.compile(r"^-?PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?$")
+
+
+class _CsvDialect(csv.excel):
+    delimiter = ";"
+
+
+def detect_encoding(sample):
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        # Ein am Probenende abgeschnittenes Zeichen ist kein Hinweis auf cp1252.
+        if exc.reason != "unexpected end of data":
+            return "cp1252"
+    return "utf-8"
+
+
+def sniff_dialect(text):
+    sample = text[:CSV_SNIFF_CHARS]
+    if len(text) > CSV_SNIFF_CHARS and "\n" in sample:
+        sample = sample[: sample.rindex("\n")]
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+    except csv.Error:
+        pass
+    # Kurze Dateien mit Titelzeilen: haeufigstes Trennzeichen, im Zweifel ";".
+    counts = {delimiter: sample.count(delimiter) for delimiter in CSV_DELIMITERS}
+    delimiter = max(CSV_DELIMITERS, key=counts.get)
+    if not counts[delimiter]:
+        delimiter = ";"
+    return type("_SniffedDialect", (_CsvDialect,), {"delimiter": delimiter})
+
+
+def read_csv_rows(file_path):
+    with open(file_path, "rb") as handle:
+        sample = handle.read(CSV_SAMPLE_BYTES)
+    encoding = detect_encoding(sample)
+    dialect = sniff_dialect(sample.decode(encoding, errors="ignore"))
+    with open(file_path, encoding=encoding, newline="") as handle:
+        try:
+            yield from csv.reader(handle, dialect)
+        except UnicodeDecodeError as exc:
+            raise ValueError(
+                f"CSV-Datei hat keine einheitliche Zeichenkodierung ({encoding}). "
+                "Bitte als CSV UTF-8 speichern."
+            ) from exc
+        except csv.Error as exc:
+            raise ValueError(f"CSV-Datei konnte nicht gelesen werden: {exc}") from exc
+
+
+def read_ods_rows(file_path):
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            with archive.open(ODS_CONTENT) as content:
+                yield from _iter_ods_rows(content)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, ValueError) as exc:
+        raise ValueError(f"ODS-Datei konnte nicht gelesen werden: {exc}") from exc
+
+
+def _iter_ods_rows(content):
+    pending = 0
+    for _, element in ET.iterparse(content, events=("end",)):
+        if element.tag == ODS_TABLE + "table-row":
+            values = _ods_row_values(element)
+            repeat = int(element.get(ODS_TABLE + "number-rows-repeated", 1))
+            element.clear()
+            if not values:
+                pending += repeat
+                continue
+            for _ in range(pending):
+                yield []
+            pending = 0
+            for _ in range(min(repeat, MAX_REPEAT)):
+                yield list(values)
+        elif element.tag == ODS_TABLE + "table":
+            return
+
+
+def _ods_row_values(row):
+    values = []
+    width = 0
+    for cell in row:
+        if cell.tag not in ODS_CELLS:
+            continue
+        repeat = int(cell.get(ODS_TABLE + "number-columns-repeated", 1))
+        value = _ods_cell_value(cell)
+        if value is None:
+            width += repeat
+            continue
+        values.extend([None] * (width - len(values)))
+        values.extend([value] * min(repeat, MAX_REPEAT))
+        width = len(values)
+    return values
+
+
+def _ods_cell_value(cell):
+    kind = cell.get(ODS_OFFICE + "value-type")
+    if kind in ODS_NUMBER_TYPES:
+        return _ods_number(cell.get(ODS_OFFICE + "value", ""))
+    if kind == "date":
+        return datetime.fromisoformat(cell.get(ODS_OFFICE + "date-value", ""))
+    if kind == "time":
+        return _ods_time(cell.get(ODS_OFFICE + "time-value", ""))
+    if kind == "boolean":
+        return cell.get(ODS_OFFICE + "boolean-value") == "true"
+    text = cell.get(ODS_OFFICE + "string-value")
+    if text is None:
+        text = "\n".join(
+            _ods_text(paragraph)
+            for paragraph in cell
+            if paragraph.tag in (ODS_TEXT + "p", ODS_TEXT + "h")
+        )
+    return text or None
+
+
+def _ods_number(text):
+    number = float(text)
+    return int(number) if number.is_integer() else number
+
+
+def _ods_time(text):
+    match = _ODS_DURATION.match(text)
+    if not match:
+        raise ValueError(f"ODS-Zeitangabe ungueltig: {text}")
+    hours, minutes, seconds = match.groups()
+    value = timedelta(
+        hours=int(hours or 0), minutes=int(minutes or 0), seconds=float(seconds or 0)
+    )
+    if value >= timedelta(days=1):
+        return value
+    return (datetime.min + value).time().replace(microsecond=0)
+
+
+def _ods_text(element):
+    parts = [element.text or ""]
+    for child in element:
+        if child.tag == ODS_TEXT + "s":
+            parts.append(" " * int(child.get(ODS_TEXT + "c", 1)))
+        elif child.tag == ODS_TEXT + "tab":
+            parts.append("\t")
+        elif child.tag == ODS_TEXT + "line-break":
+            parts.append("\n")
+        else:
+            parts.append(_ods_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
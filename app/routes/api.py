@@ -0,0 +1,118 @@
+import hashlib
+
+from flask import Blueprint, abort, current_app, jsonify, request
+
+from ..imports import find_import_by_hash, import_person_names
+from ..preview import build_preview
+from ..search import build_search
+
+bp = Blueprint("api", __name__, url_prefix="/api")
+
+API_VERSION = "1"
+
+
+def get_import_or_404(content_hash):
+    import_obj = find_import_by_hash(content_hash)
+    if import_obj is None:
+        abort(404)
+    return import_obj
+
+
+def build_etag(content_hash, *parts):
+    key = "|".join((API_VERSION, content_hash) + parts)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def normalized_args(args):
+    return "&".join(
+        f"{key}={value}" for key, value in sorted(args.items(multi=True))
+    )
+
+
+def conditional_json(etag, build_payload):
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build_payload())
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@bp.errorhandler(404)
+def not_found(error):
+    return jsonify({"error": "Import nicht gefunden"}), 404
+
+
+@bp.route("/imports/<content_hash>", methods=["GET"])
+def import_summary(content_hash):
+    import_obj = get_import_or_404(content_hash)
+    etag = build_etag(content_hash, "summary")
+
+    def payload():
+        return {
+            "content_hash": import_obj.content_hash,
+            "filename": import_obj.filename,
+            "row_count": import_obj.row_count,
+            "aufsichten": import_person_names(import_obj.id, role="aufsicht"),
+        }
+
+    return conditional_json(etag, payload)
+
+
+@bp.route("/imports/<content_hash>/rows", methods=["GET"])
+def import_rows(content_hash):
+    import_obj = get_import_or_404(content_hash)
+    page_size = current_app.config["PREVIEW_PAGE_SIZE"]
+    etag = build_etag(
+        content_hash, "rows", str(page_size), normalized_args(request.args)
+    )
+
+    def payload():
+        context = build_preview(import_obj, request.args, page_size)
+        return {
+            "content_hash": import_obj.content_hash,
+            "columns": context["expected_columns"],
+            "multiline_columns": context["multiline_columns"],
+            "total_rows": context["total_rows"],
+            "filtered_count": context["filtered_count"],
+            "selected_aufsicht": context["selected_aufsicht"],
+            "sort": context["sort_param"],
+            "dir": context["dir_param"],
+            "rows": context["preview_rows"],
+            "sort_links": context["sort_links"],
+            "pagination": context["pagination"],
+        }
+
+    return conditional_json(etag, payload)
+
+
+@bp.route("/imports/<content_hash>/search", methods=["GET"])
+def import_search(content_hash):
+    import_obj = get_import_or_404(content_hash)
+    page_size = current_app.config["PREVIEW_PAGE_SIZE"]
+    etag = build_etag(
+        content_hash, "search", str(page_size), normalized_args(request.args)
+    )
+    timing = {}
+
+    def payload():
+        context = build_search(import_obj, request.args, page_size)
+        timing["search"] = context["took_ms"]
+        return {
+            "content_hash": import_obj.content_hash,
+            "query": context["query"],
+            "columns": context["columns"],
+            "multiline_columns": context["multiline_columns"],
+            "total_rows": context["total_rows"],
+            "match_count": context["match_count"],
+            "positions": context["positions"],
+            "rows": context["rows"],
+            "pagination": context["pagination"],
+        }
+
+    response = conditional_json(etag, payload)
+    # Laufzeit nicht im Body, sonst aendern sich die Bytes unter demselben ETag.
+    if timing:
+        response.headers["Server-Timing"] = f"search;dur={timing['search']}"
+    return response
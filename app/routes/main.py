@@ -5,76 +5,94 @@ from datetime import datetime
 
 from flask import (
     Blueprint,
-    abort,
+    Response,
     current_app,
     flash,
     redirect,
     render_template,
     request,
-    send_from_directory,
     session,
     url_for,
 )
+from markupsafe import Markup
 from werkzeug.utils import secure_filename
 
+from ..admission import admit, release_admission_ticket
+from ..cache import get_cache
 from ..excel import (
-    EXPECTED_COLUMNS,
-    extract_aufsichten,
-    filter_rows_by_aufsicht,
+    SCHEDULE_EXTENSIONS,
     display_value,
     normalize_name,
-    parse_date_value,
-    parse_duration_minutes,
-    parse_time_value,
     prepare_event_data,
-    preview_rows,
+    probe_schedule,
     read_excel,
     row_fingerprint,
-    split_display_names,
-    split_display_rooms,
-    split_names,
 )
-from ..extensions import db
-from ..ics import build_event_uid, build_ics_event, get_uid_domain
-from ..models import MailLog, Person, PersonAlias
+from ..fuzzy import get_name_index, suggest_persons
+from ..conflicts import (
+    conflicts_csv,
+    conflicts_for_person,
+    import_conflicts,
+    summarize_conflicts,
+)
+from ..diff import (
+    CHANGE_CHANGED,
+    CHANGE_LABELS,
+    CHANGE_REMOVED,
+    changed_fields,
+)
+from ..downloads import send_bundle
+from ..ics import build_event_uid, get_uid_domain
+from ..icscache import render_ics
+from ..imports import (
+    build_person_index,
+    changed_import_rows,
+    create_import,
+    file_content_hash,
+    find_import_by_hash,
+    first_dated_record,
+    get_import,
+    import_change_counts,
+    import_person_names,
+    latest_import,
+    query_import_rows,
+    recent_imports,
+    removed_import_rows,
+)
+from ..memprofile import profile_stage
+from ..maillog import (
+    HISTORY_PAGE_SIZES,
+    MAIL_LOG_STATUSES,
+    claim_mail_log,
+    was_exported,
+    list_history_page,
+    mail_log_params,
+    parse_history_date,
+    release_mail_log,
+    store_mail_log,
+)
+from ..naming import build_ics_filename, default_calendar_name
+from ..preview import build_preview
+from ..search import build_search, schedule_index
+from ..stats import import_stats
+from ..tokens import split_names
 
 bp = Blueprint("main", __name__)
 
-ALLOWED_EXTENSIONS = {".xlsx"}
+ALLOWED_EXTENSIONS = set(SCHEDULE_EXTENSIONS)
 
 
 def allowed_file(filename):
     return os.path.splitext(filename.lower())[1] in ALLOWED_EXTENSIONS
 
 
-def store_upload_path(filename):
-    session["upload_path"] = os.path.join("uploads", filename)
-
-
-def get_upload_path():
-    rel_path = session.get("upload_path")
-    if not rel_path:
-        return None
-    return os.path.join(current_app.instance_path, rel_path)
-
-
-def build_person_index():
-    index = {}
-    for person in Person.query.all():
-        if not person.active:
-            continue
-        key = normalize_name(person.name)
-        if key:
-            index.setdefault(key, person)
+def store_import(import_obj):
+    session["import_id"] = import_obj.id
+    session["import_hash"] = import_obj.content_hash
 
-    for alias in PersonAlias.query.all():
-        if not alias.person or not alias.person.active:
-            continue
-        key = normalize_name(alias.alias_name)
-        if key:
-            index.setdefault(key, alias.person)
 
-    return index
+def get_current_import():
+    return get_import(session.get("import_id"))
 
 
 def parse_missing_columns(error_message):
@@ -92,16 +110,44 @@ def build_bundle_filename(aufsicht_name):
     return f"{unique_prefix}_{safe_name}"
 
 
-def default_calendar_name(rows=None):
-    year = datetime.now().year
-    if rows:
-        for row in rows:
-            try:
-                year = parse_date_value(row.get("Datum")).year
-                break
-            except ValueError:
-                continue
-    return f"Pr\u00fcfungsaufsicht_{year}"
+def build_conflict_context(import_obj, selected_aufsicht):
+    conflicts = import_conflicts(import_obj)
+    return {
+        "conflict_summary": summarize_conflicts(conflicts),
+        "person_conflicts": conflicts_for_person(conflicts, selected_aufsicht),
+    }
+
+
+def build_name_suggestions(import_id, content_hash):
+    cache = get_cache(current_app, "names")
+    names = cache.get((content_hash, import_id))
+    if names is None:
+        names = import_person_names(import_id)
+        cache.set((content_hash, import_id), names)
+    unmatched, suggestions = suggest_persons(
+        get_name_index(current_app),
+        names,
+        min_score=current_app.config["NAME_MATCH_MIN_SCORE"],
+    )
+    return {"unmatched_count": len(unmatched), "name_suggestions": suggestions}
+
+
+def resolve_previous_import(choice, content_hash, filename):
+    # Ohne ausdrueckliche Auswahl kein Vergleich, sonst Absagen fuer fremde Plaene.
+    if choice == "auto":
+        return latest_import(exclude_hash=content_hash, filename=filename)
+    if choice and choice.isdigit():
+        previous = get_import(int(choice))
+        if previous is not None and previous.content_hash != content_hash:
+            return previous
+    return None
+
+
+def build_event_label(event_data):
+    return (
+        f"{event_data['pruefungsname']} ({event_data['datum'].isoformat()} "
+        f"{event_data['startzeit'].strftime('%H:%M')})"
+    )
 
 
 def store_calendar_name(value):
@@ -115,44 +161,126 @@ def get_calendar_name(rows=None):
     return default_calendar_name(rows)
 
 
+def parse_history_args():
+    default = current_app.config["PERSONS_PAGE_SIZE"]
+    per_page = request.args.get("per_page", type=int) or default
+    if per_page not in HISTORY_PAGE_SIZES:
+        per_page = default if default in HISTORY_PAGE_SIZES else HISTORY_PAGE_SIZES[1]
+    status = request.args.get("status") or None
+    return {
+        "archived": request.args.get("archiv") == "1",
+        "recipient": (request.args.get("empfaenger") or "").strip()[:200] or None,
+        "status": status if status in MAIL_LOG_STATUSES else None,
+        "date_from": parse_history_date(request.args.get("von")),
+        "date_to": parse_history_date(request.args.get("bis")),
+        "per_page": per_page,
+        "after": request.args.get("after", type=int),
+        "before": request.args.get("before", type=int),
+    }
+
+
+def build_history_nav(args, entries, has_prev, has_next):
+    params = {
+        "archiv": "1" if args["archived"] else None,
+        "empfaenger": args["recipient"],
+        "status": args["status"],
+        "von": args["date_from"].isoformat() if args["date_from"] else None,
+        "bis": args["date_to"].isoformat() if args["date_to"] else None,
+        "per_page": args["per_page"],
+    }
+    endpoint = "main.history"
+    return {
+        "params": params,
+        "page_sizes": HISTORY_PAGE_SIZES,
+        "first_url": url_for(endpoint, **params) if has_prev else None,
+        "prev_url": (
+            url_for(endpoint, before=entries[0].id, **params)
+            if has_prev and entries
+            else None
+        ),
+        "next_url": (
+            url_for(endpoint, after=entries[-1].id, **params)
+            if has_next and entries
+            else None
+        ),
+    }
+
+
+def import_calendar_rows(import_id):
+    record = first_dated_record(import_id)
+    return [record] if record else None
+
+
 @bp.route("/", methods=["GET", "POST"])
 def index():
     if request.method == "POST":
         file = request.files.get("file")
         if not file or not file.filename:
-            flash("Bitte eine .xlsx-Datei auswaehlen.")
+            flash("Bitte eine .xlsx-, .ods- oder .csv-Datei auswaehlen.")
             return render_template("index.html")
         if not allowed_file(file.filename):
-            flash("Nur .xlsx-Dateien sind erlaubt.")
+            flash("Nur .xlsx-, .ods- und .csv-Dateien sind erlaubt.")
             return render_template("index.html")
 
         filename = secure_filename(file.filename)
         unique_name = f"{uuid.uuid4().hex}_{filename}"
         upload_path = os.path.join(current_app.config["UPLOAD_FOLDER"], unique_name)
         file.save(upload_path)
-        store_upload_path(unique_name)
 
-        try:
-            rows = read_excel(upload_path)
-        except ValueError as exc:
-            missing = parse_missing_columns(str(exc))
-            if missing:
+        content_hash = file_content_hash(upload_path)
+        import_obj = find_import_by_hash(content_hash)
+        if import_obj is None:
+            try:
+                with profile_stage("probe"):
+                    probe_schedule(upload_path)
+                with profile_stage("read_excel"):
+                    rows = read_excel(upload_path)
+            except ValueError as exc:
+                missing = parse_missing_columns(str(exc))
+                if missing:
+                    return render_template(
+                        "error.html",
+                        title="Fehlende Spalten",
+                        message="Die hochgeladene Datei hat nicht alle benoetigten Spalten.",
+                        missing=missing,
+                    )
                 return render_template(
                     "error.html",
-                    title="Fehlende Spalten",
-                    message="Die hochgeladene Datei hat nicht alle benoetigten Spalten.",
-                    missing=missing,
+                    title="Fehler beim Einlesen",
+                    message=str(exc),
+                    missing=[],
+                )
+            with profile_stage("import_insert"):
+                import_obj = create_import(
+                    rows,
+                    filename=filename,
+                    stored_name=unique_name,
+                    content_hash=content_hash,
+                    person_index=build_person_index(),
+                    previous_import=resolve_previous_import(
+                        request.form.get("previous_import"), content_hash, filename
+                    ),
                 )
-            return render_template(
-                "error.html",
-                title="Excel-Fehler",
-                message=str(exc),
-                missing=[],
+            get_cache(current_app, "preview").invalidate(content_hash)
+            get_cache(current_app, "conflicts").invalidate(content_hash)
+            get_cache(current_app, "search").invalidate(content_hash)
+        store_import(import_obj)
+
+        with profile_stage("conflicts"):
+            conflict_summary = summarize_conflicts(import_conflicts(import_obj))
+        with profile_stage("search_index"):
+            schedule_index(import_obj)
+        if conflict_summary["total"]:
+            flash(
+                f"Achtung: {conflict_summary['person']} Ueberschneidung(en) bei "
+                f"{conflict_summary['persons_affected']} Person(en) und "
+                f"{conflict_summary['room']} Doppelbelegung(en) in "
+                f"{conflict_summary['rooms_affected']} Raum/Raeumen gefunden."
             )
 
         calendar_name = (request.form.get("calendar_name") or "").strip()
         if not calendar_name:
-            calendar_name = default_calendar_name(rows)
+            calendar_name = default_calendar_name(import_calendar_rows(import_obj.id))
         store_calendar_name(calendar_name)
 
         return redirect(url_for("main.preview"))
@@ -161,6 +289,7 @@ def index():
         "index.html",
         calendar_name=session.get("calendar_name", ""),
         default_calendar_name=default_calendar_name(),
+        recent_imports=recent_imports(),
     )
 
 
@@ -176,97 +305,58 @@ def privacy():
 
 @bp.route("/preview", methods=["GET"])
 def preview():
-    upload_path = get_upload_path()
-    if not upload_path or not os.path.exists(upload_path):
-        flash("Bitte zuerst eine Excel-Datei hochladen.")
-        return redirect(url_for("main.index"))
-
-    try:
-        df = read_excel(upload_path)
-    except ValueError as exc:
-        missing = parse_missing_columns(str(exc))
-        return render_template(
-            "error.html",
-            title="Fehlende Spalten",
-            message=str(exc),
-            missing=missing,
-        )
-
-    aufsicht_names = extract_aufsichten(df)
-    selected = request.args.get("aufsicht") or (
-        aufsicht_names[0] if aufsicht_names else ""
-    )
-    filter_applied = bool(request.args.get("aufsicht"))
-    sort_key = request.args.get("sort") or ""
-    sort_dir = request.args.get("dir") or "asc"
-    if sort_dir not in ("asc", "desc"):
-        sort_dir = "asc"
-    filtered_rows = filter_rows_by_aufsicht(df, selected) if selected else []
-
-    preview_columns = [col for col in EXPECTED_COLUMNS if col != "Ablösung"]
-    sortable_columns = [
-        "Pr\u00fcfungsname",
-        "Datum",
-        "Startzeit",
-        "Dauer",
-        "Pr\u00fcfer",
-        "Raum",
-    ]
-
-    if sort_key in sortable_columns:
-        def sort_value(row):
-            try:
-                if sort_key == "Datum":
-                    return (0, parse_date_value(row.get("Datum")))
-                if sort_key == "Startzeit":
-                    return (0, parse_time_value(row.get("Startzeit")))
-                if sort_key == "Dauer":
-                    return (0, parse_duration_minutes(row.get("Dauer")))
-                if sort_key == "Pr\u00fcfer":
-                    items = split_display_names(row.get("Pr\u00fcfer"))
-                    return (0, " ".join(items).casefold())
-                if sort_key == "Raum":
-                    items = split_display_rooms(row.get("Raum"))
-                    return (0, " ".join(items).casefold())
-                value = display_value(row.get(sort_key)).casefold()
-                return (0, value)
-            except ValueError:
-                return (1, "")
-
-        filtered_rows = sorted(
-            filtered_rows,
-            key=sort_value,
-            reverse=sort_dir == "desc",
+    cache = get_cache(current_app, "preview")
+    args_key = tuple(sorted(request.args.items(multi=True)))
+    content_hash = session.get("import_hash")
+    preview_html = cache.get((content_hash, args_key)) if content_hash else None
+
+    if preview_html is None:
+        import_obj = get_current_import()
+        if import_obj is None:
+            flash("Bitte zuerst eine Excel-Datei hochladen.")
+            return redirect(url_for("main.index"))
+
+        # Nur ohne Cache-Treffer einen Platz belegen; Treffer kosten kaum Zeit.
+        rejected = admit("preview")
+        if rejected is not None:
+            return rejected
+        with profile_stage("build_preview"):
+            context = build_preview(
+                import_obj, request.args, current_app.config["PREVIEW_PAGE_SIZE"]
+            )
+        with profile_stage("render_preview"):
+            preview_html = Markup(
+                render_template(
+                    "preview_content.html",
+                    missing_contacts=[],
+                    rows_api_url=url_for(
+                        "api.import_rows", content_hash=import_obj.content_hash
+                    ),
+                    change_counts=import_change_counts(import_obj),
+                    previous_import=import_obj.previous_import,
+                    **build_conflict_context(import_obj, context["selected_aufsicht"]),
+                    **context,
+                )
+            )
+        release_admission_ticket()
+        if content_hash != import_obj.content_hash:
+            session["import_hash"] = import_obj.content_hash
+        cache.set((import_obj.content_hash, args_key), preview_html)
+        content_hash = import_obj.content_hash
+
+    with profile_stage("name_suggestions"):
+        suggestion_context = build_name_suggestions(
+            session.get("import_id"), content_hash
         )
-
-    formatted_rows = preview_rows(filtered_rows)
-    multiline_columns = ["Pr\u00fcfer", "Aufsicht", "Raum"]
-    for row in formatted_rows:
-        row["Pr\u00fcfer"] = split_display_names(row.get("Pr\u00fcfer"))
-        row["Aufsicht"] = split_display_names(row.get("Aufsicht"))
-        row["Raum"] = split_display_rooms(row.get("Raum"))
-
     return render_template(
-        "preview.html",
-        expected_columns=preview_columns,
-        total_rows=len(df),
-        filtered_count=len(filtered_rows),
-        aufsicht_names=aufsicht_names,
-        selected_aufsicht=selected,
-        preview_rows=formatted_rows,
-        missing_contacts=[],
-        filter_applied=filter_applied,
-        multiline_columns=multiline_columns,
-        sortable_columns=sortable_columns,
-        sort_key=sort_key,
-        sort_dir=sort_dir,
+        "preview.html", preview_html=preview_html, **suggestion_context
     )
 
 
 @bp.route("/send", methods=["POST"])
 def send():
-    upload_path = get_upload_path()
-    if not upload_path or not os.path.exists(upload_path):
+    import_obj = get_current_import()
+    if import_obj is None:
         flash("Bitte zuerst eine Excel-Datei hochladen.")
         return redirect(url_for("main.index"))
 
@@ -277,180 +367,259 @@ def send():
 
     force_resend = request.form.get("force_resend") == "1"
 
-    try:
-        df = read_excel(upload_path)
-    except ValueError as exc:
-        missing = parse_missing_columns(str(exc))
-        return render_template(
-            "error.html",
-            title="Fehlende Spalten",
-            message=str(exc),
-            missing=missing,
-        )
-
-    filtered_rows = filter_rows_by_aufsicht(df, aufsicht_name)
+    with profile_stage("query_rows"):
+        import_rows = query_import_rows(import_obj.id, aufsicht=aufsicht_name)
+        cancelled_rows = []
+        if import_obj.previous_import_id is not None:
+            kept_ids = {row.previous_row_id for row in import_rows}
+            cancelled_rows = [
+                row
+                for row in query_import_rows(
+                    import_obj.previous_import_id, aufsicht=aufsicht_name
+                )
+                if row.row_fingerprint and row.id not in kept_ids
+            ]
     person_index = build_person_index()
 
     results = {"generated": [], "skipped": [], "errors": []}
     uid_domain = get_uid_domain(current_app.config.get("APP_BASE_URL", ""))
-    calendar_name = get_calendar_name(df)
+    calendar_name = get_calendar_name(import_calendar_rows(import_obj.id))
     generated_files = []
     seen_exports = set()
+    ics_cache = current_app.extensions["ics_cache"]
 
     target_norm = normalize_name(aufsicht_name)
 
-    for idx, row in enumerate(filtered_rows, start=1):
-        try:
-            event_data = prepare_event_data(row)
-            event_data["row_fingerprint"] = row_fingerprint(event_data)
-        except ValueError as exc:
-            results["errors"].append(
-                {
-                    "row": idx,
-                    "name": row.get("Prüfungsname", ""),
-                    "role": "-",
-                    "email": "-",
-                    "reason": str(exc),
-                }
-            )
-            continue
-
-        row_fp = event_data["row_fingerprint"]
-        label = (
-            f"{event_data['pruefungsname']} ({event_data['datum'].isoformat()} "
-            f"{event_data['startzeit'].strftime('%H:%M')})"
-        )
+    with profile_stage("generate_events"):
+        for idx, import_row in enumerate(import_rows, start=1):
+            row = import_row.to_record()
+            try:
+                event_data = prepare_event_data(row)
+                event_data["row_fingerprint"] = row_fingerprint(event_data)
+            except ValueError as exc:
+                results["errors"].append(
+                    {
+                        "row": idx,
+                        "name": row.get("Prüfungsname", ""),
+                        "role": "-",
+                        "email": "-",
+                        "reason": str(exc),
+                    }
+                )
+                continue
 
-        role = "aufsicht"
-        names = split_names(row.get("Aufsicht"))
-        names = [name for name in names if normalize_name(name) == target_norm]
-        if not names:
-            results["errors"].append(
-                {
-                    "row": idx,
-                    "name": label,
-                    "role": role,
-                    "email": "-",
-                    "reason": "Aufsicht fehlt",
-                }
-            )
-            continue
+            row_fp = event_data["row_fingerprint"]
+            label = build_event_label(event_data)
 
-        for name in names:
-            name_key = normalize_name(name)
-            export_key = (row_fp, role, name_key)
-            if export_key in seen_exports:
-                results["skipped"].append(
+            role = "aufsicht"
+            names = split_names(row.get("Aufsicht"))
+            names = [name for name in names if normalize_name(name) == target_norm]
+            if not names:
+                results["errors"].append(
                     {
                         "row": idx,
                         "name": label,
                         "role": role,
                         "email": "-",
-                        "reason": "Duplikat im Import",
+                        "reason": "Aufsicht fehlt",
                     }
                 )
                 continue
-            seen_exports.add(export_key)
-            person = person_index.get(normalize_name(name))
-            recipient_email = ""
-            if person and person.email:
-                recipient_email = person.email
-
-            existing = None
-            if recipient_email:
-                existing = (
-                    MailLog.query.filter_by(
-                        row_fingerprint=row_fp,
-                        role=role,
-                        recipient_email=recipient_email,
+
+            for name in names:
+                name_key = normalize_name(name)
+                export_key = (row_fp, role, name_key)
+                if export_key in seen_exports:
+                    results["skipped"].append(
+                        {
+                            "row": idx,
+                            "name": label,
+                            "role": role,
+                            "email": "-",
+                            "reason": "Duplikat im Import",
+                        }
                     )
-                    .filter(MailLog.status.in_(["sent", "generated"]))
-                    .first()
+                    continue
+                seen_exports.add(export_key)
+                person = person_index.get(normalize_name(name))
+                recipient_email = ""
+                if person and person.email:
+                    recipient_email = person.email
+
+                event_uid = build_event_uid(
+                    import_row.uid_fingerprint or row_fp, role, uid_domain
                 )
-            if existing and not force_resend:
+                claim_id = None
+                if recipient_email and not force_resend:
+                    claim_id = claim_mail_log(
+                        mail_log_params(
+                            event_uid, role, recipient_email, row_fp, "generated"
+                        )
+                    )
+                    if claim_id is None:
+                        results["skipped"].append(
+                            {
+                                "row": idx,
+                                "name": label,
+                                "role": role,
+                                "email": recipient_email,
+                                "reason": "Bereits erstellt",
+                            }
+                        )
+                        continue
+
+                event_data["row_fingerprint"] = row_fp
+                try:
+                    ics_bytes, event_uid = render_ics(
+                        ics_cache,
+                        "event",
+                        event_data,
+                        role,
+                        uid_domain,
+                        event_uid,
+                        calendar_name=calendar_name,
+                        sequence=import_row.sequence,
+                    )
+                    generated_files.append(
+                        (build_ics_filename("Aufsicht", event_data, name), ics_bytes)
+                    )
+                    if not person:
+                        reason = "ICS erzeugt (Stammdaten fehlen)"
+                    elif not recipient_email:
+                        reason = "ICS erzeugt (E-Mail fehlt)"
+                    else:
+                        reason = "ICS erzeugt"
+                    if import_row.change == CHANGE_CHANGED:
+                        reason = f"{reason}, Aktualisierung"
+
+                    results["generated"].append(
+                        {
+                            "row": idx,
+                            "name": label,
+                            "role": role,
+                            "email": recipient_email or "-",
+                            "reason": reason,
+                        }
+                    )
+
+                    if recipient_email and force_resend:
+                        store_mail_log(
+                            mail_log_params(
+                                event_uid, role, recipient_email, row_fp, "generated"
+                            )
+                        )
+                except Exception as exc:
+                    if claim_id is not None:
+                        release_mail_log(claim_id)
+                    if recipient_email:
+                        store_mail_log(
+                            mail_log_params(
+                                event_uid,
+                                role,
+                                recipient_email,
+                                row_fp,
+                                "error",
+                                error=str(exc),
+                            )
+                        )
+                    results["errors"].append(
+                        {
+                            "row": idx,
+                            "name": label,
+                            "role": role,
+                            "email": recipient_email or "-",
+                            "reason": str(exc),
+                        }
+                    )
+
+        role = "aufsicht"
+        person = person_index.get(target_norm)
+        recipient_email = person.email if person and person.email else ""
+        for prev_row in cancelled_rows:
+            try:
+                event_data = prepare_event_data(prev_row.to_record())
+            except ValueError:
+                continue
+            row_fp = prev_row.row_fingerprint
+            event_data["row_fingerprint"] = row_fp
+            label = build_event_label(event_data)
+
+            event_uid = build_event_uid(
+                prev_row.uid_fingerprint or row_fp, role, uid_domain
+            )
+            if not recipient_email or not was_exported(row_fp, role, recipient_email):
                 results["skipped"].append(
                     {
-                        "row": idx,
+                        "row": "-",
                         "name": label,
                         "role": role,
                         "email": recipient_email or "-",
-                        "reason": "Bereits erstellt",
+                        "reason": "Keine Absage (alte Fassung nicht exportiert)",
                     }
                 )
                 continue
+            params = mail_log_params(
+                event_uid, role, recipient_email, row_fp, "cancelled"
+            )
+            claim_id = None
+            if not force_resend:
+                claim_id = claim_mail_log(params)
+                if claim_id is None:
+                    results["skipped"].append(
+                        {
+                            "row": "-",
+                            "name": label,
+                            "role": role,
+                            "email": recipient_email,
+                            "reason": "Absage bereits erstellt",
+                        }
+                    )
+                    continue
 
-            event_uid = build_event_uid(row_fp, role, uid_domain)
-            event_data["row_fingerprint"] = row_fp
             try:
-                ics_bytes, event_uid = build_ics_event(
+                ics_bytes, event_uid = render_ics(
+                    ics_cache,
+                    "cancel",
                     event_data,
                     role,
                     uid_domain,
                     event_uid,
                     calendar_name=calendar_name,
+                    sequence=prev_row.sequence + 1,
                 )
-                prefix = "Aufsicht"
-                date_str = event_data["datum"].strftime("%Y-%m-%d")
-                time_str = event_data["startzeit"].strftime("%H-%M")
-                base_name = (
-                    f"{prefix}_{date_str}_{time_str}_"
-                    f"{event_data['pruefungsname']}_{name}.ics"
+                generated_files.append(
+                    (build_ics_filename("Absage", event_data, aufsicht_name), ics_bytes)
                 )
-                ics_filename = secure_filename(base_name)
-                if not ics_filename:
-                    ics_filename = f"{prefix}_{row_fp[:12]}.ics"
-
-                generated_files.append((ics_filename, ics_bytes))
-                if not person:
-                    reason = "ICS erzeugt (Stammdaten fehlen)"
-                elif not recipient_email:
-                    reason = "ICS erzeugt (E-Mail fehlt)"
-                else:
-                    reason = "ICS erzeugt"
-
                 results["generated"].append(
                     {
-                        "row": idx,
+                        "row": "-",
                         "name": label,
                         "role": role,
-                        "email": recipient_email or "-",
-                        "reason": reason,
+                        "email": recipient_email,
+                        "reason": "Absage erzeugt (entfaellt oder verlegt)",
                     }
                 )
-
-                if recipient_email:
-                    db.session.add(
-                        MailLog(
-                            event_uid=event_uid,
-                            role=role,
-                            recipient_email=recipient_email,
-                            row_fingerprint=row_fp,
-                            sent_at=datetime.utcnow(),
-                            status="generated",
-                            error=None,
-                        )
-                    )
-                    db.session.commit()
+                if force_resend:
+                    store_mail_log(params)
             except Exception as exc:
-                if recipient_email:
-                    db.session.add(
-                        MailLog(
-                            event_uid=event_uid,
-                            role=role,
-                            recipient_email=recipient_email,
-                            row_fingerprint=row_fp,
-                            sent_at=datetime.utcnow(),
-                            status="error",
-                            error=str(exc),
-                        )
+                if claim_id is not None:
+                    release_mail_log(claim_id)
+                store_mail_log(
+                    mail_log_params(
+                        event_uid,
+                        role,
+                        recipient_email,
+                        row_fp,
+                        "error",
+                        error=str(exc),
                     )
-                    db.session.commit()
+                )
                 results["errors"].append(
                     {
-                        "row": idx,
+                        "row": "-",
                         "name": label,
                         "role": role,
-                        "email": recipient_email or "-",
+                        "email": recipient_email,
                         "reason": str(exc),
                     }
                 )
@@ -462,7 +631,9 @@ def send():
         download_filename = build_bundle_filename(aufsicht_name)
         bundle_path = os.path.join(export_dir, download_filename)
 
-        with zipfile.ZipFile(bundle_path, "w", zipfile.ZIP_DEFLATED) as bundle:
+        with profile_stage("zip_bundle"), zipfile.ZipFile(
+            bundle_path, "w", zipfile.ZIP_DEFLATED
+        ) as bundle:
             for filename, payload in generated_files:
                 bundle.writestr(filename, payload)
 
@@ -474,15 +645,125 @@ def send():
     )
 
 
-@bp.route("/download/<path:filename>")
-def download(filename):
-    safe_name = secure_filename(filename)
-    if not safe_name:
-        abort(404)
+@bp.route("/changes", methods=["GET"])
+def changes():
+    import_obj = get_current_import()
+    if import_obj is None:
+        flash("Bitte zuerst eine Excel-Datei hochladen.")
+        return redirect(url_for("main.index"))
+    if import_obj.previous_import_id is None:
+        flash("Fuer diesen Import gibt es keine vorherige Version.")
+        return redirect(url_for("main.preview"))
+
+    entries = []
+    for row, previous_row in changed_import_rows(import_obj):
+        record = row.to_record()
+        fields = []
+        if previous_row is not None:
+            try:
+                fields = changed_fields(
+                    prepare_event_data(previous_row.to_record()),
+                    prepare_event_data(record),
+                )
+            except ValueError:
+                fields = []
+        entries.append(
+            {
+                "status": row.change,
+                "record": record,
+                "previous": previous_row.to_record() if previous_row else None,
+                "fields": fields,
+            }
+        )
+    for row in removed_import_rows(import_obj):
+        entries.append(
+            {
+                "status": CHANGE_REMOVED,
+                "record": None,
+                "previous": row.to_record(),
+                "fields": [],
+            }
+        )
+
+    return render_template(
+        "changes.html",
+        title="Aenderungen",
+        import_obj=import_obj,
+        previous_import=import_obj.previous_import,
+        counts=import_change_counts(import_obj),
+        entries=entries,
+        labels=CHANGE_LABELS,
+        display=display_value,
+    )
+
+
+@bp.route("/stats", methods=["GET"])
+def stats():
+    import_obj = get_current_import()
+    if import_obj is None:
+        flash("Bitte zuerst eine Excel-Datei hochladen.")
+        return redirect(url_for("main.index"))
+
+    data = import_stats(import_obj)
+    return render_template(
+        "stats.html",
+        title="Statistik",
+        import_obj=import_obj,
+        stats=data,
+        max_person_minutes=max(
+            (item["minutes"] for item in data["persons"]), default=0
+        ),
+        max_day_events=max((item["events"] for item in data["days"]), default=0),
+        max_room_minutes=max((item["minutes"] for item in data["rooms"]), default=0),
+        max_hour_events=max((item["events"] for item in data["hours"]), default=0),
+    )
+
+
+@bp.route("/search", methods=["GET"])
+def search():
+    import_obj = get_current_import()
+    if import_obj is None:
+        flash("Bitte zuerst eine Excel-Datei hochladen.")
+        return redirect(url_for("main.index"))
+
+    with profile_stage("search"):
+        context = build_search(
+            import_obj, request.args, current_app.config["PREVIEW_PAGE_SIZE"]
+        )
+    return render_template("search.html", title="Suche", **context)
+
+
+@bp.route("/history", methods=["GET"])
+def history():
+    args = parse_history_args()
+    entries, has_prev, has_next = list_history_page(**args)
+    return render_template(
+        "history.html",
+        title="Export-Verlauf",
+        entries=entries,
+        statuses=MAIL_LOG_STATUSES,
+        nav=build_history_nav(args, entries, has_prev, has_next),
+    )
+
+
+@bp.route("/conflicts.csv", methods=["GET"])
+def conflicts_report():
+    import_obj = get_current_import()
+    if import_obj is None:
+        flash("Bitte zuerst eine Excel-Datei hochladen.")
+        return redirect(url_for("main.index"))
+
+    stem = os.path.splitext(import_obj.filename)[0]
+    filename = (
+        secure_filename(f"ueberschneidungen_{stem}.csv") or "ueberschneidungen.csv"
+    )
+    return Response(
+        conflicts_csv(import_conflicts(import_obj)),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
-    export_dir = current_app.config["EXPORT_FOLDER"]
-    bundle_path = os.path.join(export_dir, safe_name)
-    if not os.path.exists(bundle_path):
-        abort(404)
 
-    return send_from_directory(export_dir, safe_name, as_attachment=True)
+@bp.route("/download/<path:filename>")
+def download(filename):
+    return send_bundle(filename)
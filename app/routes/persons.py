@@ -1,16 +1,109 @@
-﻿from flask import Blueprint, flash, redirect, render_template, request, url_for
+﻿import os
+import uuid
+
+from flask import (
+    Blueprint,
+    current_app,
+    flash,
+    redirect,
+    render_template,
+    request,
+    session,
+    url_for,
+)
 from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
 
 from ..extensions import db
+from ..fuzzy import bump_name_index_version, update_name_index
+from ..imports import link_person_rows
 from ..models import Person, PersonAlias
+from ..people import (
+    PERSON_PAGE_SIZES,
+    list_aliases_page,
+    list_persons_page,
+    person_choices,
+)
+from ..person_import import (
+    ROSTER_EXTENSIONS,
+    apply_roster,
+    plan_roster,
+    read_roster,
+    summarize_roster,
+)
 
 bp = Blueprint("persons", __name__)
 
 
+def index_person(person, version):
+    update_name_index(current_app, version, lambda index: index.add_person(person))
+
+
+def unindex_person(person_id, version):
+    update_name_index(
+        current_app, version, lambda index: index.remove_person(person_id)
+    )
+
+
+def index_alias(alias, version):
+    update_name_index(current_app, version, lambda index: index.add_alias(alias))
+
+
+def unindex_alias(alias_id, version):
+    update_name_index(
+        current_app, version, lambda index: index.remove(("alias", alias_id))
+    )
+
+
+def parse_list_args():
+    default = current_app.config["PERSONS_PAGE_SIZE"]
+    per_page = request.args.get("per_page", type=int) or default
+    if per_page not in PERSON_PAGE_SIZES:
+        per_page = default if default in PERSON_PAGE_SIZES else PERSON_PAGE_SIZES[1]
+    return {
+        "term": (request.args.get("q") or "").strip(),
+        "per_page": per_page,
+        "after": request.args.get("after", type=int),
+        "before": request.args.get("before", type=int),
+    }
+
+
+def build_list_nav(endpoint, rows, has_prev, has_next, term, per_page):
+    params = {"q": term or None, "per_page": per_page}
+    return {
+        "query": term,
+        "per_page": per_page,
+        "page_sizes": PERSON_PAGE_SIZES,
+        "first_url": url_for(endpoint, **params) if has_prev else None,
+        "prev_url": (
+            url_for(endpoint, before=rows[0].id, **params)
+            if has_prev and rows
+            else None
+        ),
+        "next_url": (
+            url_for(endpoint, after=rows[-1].id, **params)
+            if has_next and rows
+            else None
+        ),
+    }
+
+
 @bp.route("/persons")
 def list_persons():
-    persons = Person.query.order_by(Person.name.asc()).all()
-    return render_template("persons_list.html", persons=persons)
+    args = parse_list_args()
+    persons, has_prev, has_next = list_persons_page(**args)
+    return render_template(
+        "persons_list.html",
+        persons=persons,
+        nav=build_list_nav(
+            "persons.list_persons",
+            persons,
+            has_prev,
+            has_next,
+            args["term"],
+            args["per_page"],
+        ),
+    )
 
 
 @bp.route("/persons/new", methods=["GET", "POST"])
@@ -27,17 +120,96 @@ def create_person():
         person = Person(name=name, email=email or None, active=active)
         db.session.add(person)
         try:
+            db.session.flush()
+            version = bump_name_index_version()
             db.session.commit()
         except IntegrityError:
             db.session.rollback()
             flash("Name ist bereits vorhanden.")
             return render_template("persons_form.html", person=None)
 
+        index_person(person, version)
         return redirect(url_for("persons.list_persons"))
 
     return render_template("persons_form.html", person=None)
 
 
+def roster_path():
+    stored_name = session.get("roster_upload")
+    if not stored_name:
+        return None
+    path = os.path.join(current_app.config["UPLOAD_FOLDER"], stored_name)
+    return path if os.path.exists(path) else None
+
+
+def discard_roster():
+    path = roster_path()
+    session.pop("roster_upload", None)
+    if path:
+        os.remove(path)
+
+
+@bp.route("/persons/import", methods=["GET", "POST"])
+def import_persons():
+    if request.method == "GET":
+        return render_template(
+            "persons_import.html", title="Personen importieren", plan=None
+        )
+
+    deactivate_missing = request.form.get("deactivate_missing") == "1"
+    apply = request.form.get("action") == "apply"
+    if apply:
+        path = roster_path()
+        if path is None:
+            flash("Bitte die Datei erneut hochladen.")
+            return redirect(url_for("persons.import_persons"))
+    else:
+        file = request.files.get("file")
+        if not file or not file.filename:
+            flash("Bitte eine .csv-, .ods- oder .xlsx-Datei auswaehlen.")
+            return redirect(url_for("persons.import_persons"))
+        filename = secure_filename(file.filename) or "personen.csv"
+        if os.path.splitext(filename.lower())[1] not in ROSTER_EXTENSIONS:
+            flash("Nur .csv-, .ods- und .xlsx-Dateien sind erlaubt.")
+            return redirect(url_for("persons.import_persons"))
+        discard_roster()
+        stored_name = f"{uuid.uuid4().hex}_{filename}"
+        path = os.path.join(current_app.config["UPLOAD_FOLDER"], stored_name)
+        file.save(path)
+        session["roster_upload"] = stored_name
+
+    try:
+        entries, columns = read_roster(path)
+    except ValueError as exc:
+        discard_roster()
+        flash(str(exc))
+        return redirect(url_for("persons.import_persons"))
+    plan = plan_roster(entries, columns, deactivate_missing=deactivate_missing)
+
+    if apply and not plan["errors"]:
+        try:
+            summary = apply_roster(plan)
+        except ValueError as exc:
+            flash(str(exc))
+        else:
+            discard_roster()
+            flash(
+                f"Import uebernommen: {summary['inserts']} neu, "
+                f"{summary['updates']} geaendert, "
+                f"{summary['deactivations']} deaktiviert, {summary['aliases']} Aliase."
+            )
+            return redirect(url_for("persons.list_persons"))
+
+    return render_template(
+        "persons_import.html",
+        title="Personen importieren",
+        plan=plan,
+        summary=summarize_roster(plan),
+        columns=columns,
+        deactivate_missing=deactivate_missing,
+    )
+
+
 @bp.route("/persons/<int:person_id>/edit", methods=["GET", "POST"])
 def edit_person(person_id):
     person = Person.query.get_or_404(person_id)
@@ -55,12 +227,15 @@ def edit_person(person_id):
         person.email = email or None
         person.active = active
         try:
+            db.session.flush()
+            version = bump_name_index_version()
             db.session.commit()
         except IntegrityError:
             db.session.rollback()
             flash("Name ist bereits vorhanden.")
             return render_template("persons_form.html", person=person)
 
+        index_person(person, version)
         return redirect(url_for("persons.list_persons"))
 
     return render_template("persons_form.html", person=person)
@@ -70,41 +245,87 @@ def edit_person(person_id):
 def delete_person(person_id):
     person = Person.query.get_or_404(person_id)
     db.session.delete(person)
+    version = bump_name_index_version()
     db.session.commit()
+    unindex_person(person_id, version)
     return redirect(url_for("persons.list_persons"))
 
 
 @bp.route("/aliases", methods=["GET", "POST"])
 def list_aliases():
-    persons = Person.query.order_by(Person.name.asc()).all()
-    aliases = PersonAlias.query.order_by(PersonAlias.alias_name.asc()).all()
-
     if request.method == "POST":
         person_id = request.form.get("person_id")
         alias_name = (request.form.get("alias_name") or "").strip()
 
         if not person_id or not alias_name:
             flash("Person und Alias sind erforderlich.")
-            return render_template(
-                "aliases_list.html", persons=persons, aliases=aliases
-            )
+            return redirect(url_for("persons.list_aliases"))
 
         alias = PersonAlias(person_id=int(person_id), alias_name=alias_name)
         db.session.add(alias)
         try:
+            db.session.flush()
+            version = bump_name_index_version()
             db.session.commit()
         except IntegrityError:
             db.session.rollback()
             flash("Alias ist bereits vorhanden.")
+        else:
+            index_alias(alias, version)
         return redirect(url_for("persons.list_aliases"))
 
-    return render_template("aliases_list.html", persons=persons, aliases=aliases)
+    args = parse_list_args()
+    aliases, has_prev, has_next = list_aliases_page(**args)
+    return render_template(
+        "aliases_list.html",
+        persons=person_choices(),
+        aliases=aliases,
+        nav=build_list_nav(
+            "persons.list_aliases",
+            aliases,
+            has_prev,
+            has_next,
+            args["term"],
+            args["per_page"],
+        ),
+    )
 
 
 @bp.route("/aliases/<int:alias_id>/delete", methods=["POST"])
 def delete_alias(alias_id):
     alias = PersonAlias.query.get_or_404(alias_id)
     db.session.delete(alias)
+    version = bump_name_index_version()
     db.session.commit()
+    unindex_alias(alias_id, version)
     return redirect(url_for("persons.list_aliases"))
 
+
+@bp.route("/aliases/suggested", methods=["POST"])
+def create_suggested_alias():
+    person = Person.query.get_or_404(request.form.get("person_id", type=int))
+    alias_name = (request.form.get("alias_name") or "").strip()
+    next_url = request.form.get("next") or ""
+    if not next_url.startswith("/preview"):
+        next_url = url_for("main.preview")
+
+    if not alias_name:
+        flash("Alias ist erforderlich.")
+        return redirect(next_url)
+
+    alias = PersonAlias(person_id=person.id, alias_name=alias_name)
+    db.session.add(alias)
+    try:
+        db.session.flush()
+        link_person_rows(person.id, alias_name)
+        version = bump_name_index_version()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        flash("Alias ist bereits vorhanden.")
+        return redirect(next_url)
+
+    index_alias(alias, version)
+    flash(f"Alias {alias_name} fuer {person.name} angelegt.")
+    return redirect(next_url)
+
@@ -0,0 +1,204 @@
+import bisect
+import re
+import time
+
+from flask import current_app, url_for
+
+from .cache import get_cache
+from .excel import EXPECTED_COLUMNS, display_value, normalize_name
+from .extensions import db
+from .models import ImportRow
+from .preview import MULTILINE_COLUMNS, PREVIEW_PAGE_SIZES, format_preview_rows
+from .tokens import split_display_names, split_display_rooms
+
+SEARCH_FIELDS = {
+    "pruefung": ("Prüfungsname", None),
+    "pruefer": ("Prüfer", split_display_names),
+    "aufsicht": ("Aufsicht", split_display_names),
+    "abloesung": ("Ablösung", split_display_names),
+    "raum": ("Raum", split_display_rooms),
+}
+FIELD_ALIASES = {
+    "prüfung": "pruefung",
+    "prüfungsname": "pruefung",
+    "pruefungsname": "pruefung",
+    "modul": "pruefung",
+    "prüfer": "pruefer",
+    "ablösung": "abloesung",
+    "räume": "raum",
+}
+SEARCH_COLUMNS = list(EXPECTED_COLUMNS)
+SEARCH_MULTILINE_COLUMNS = MULTILINE_COLUMNS + ["Ablösung"]
+PREFIX_END = "\U0010ffff"
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(value):
+    return _TOKEN.findall(normalize_name(value))
+
+
+def field_tokens(field, value):
+    _, splitter = SEARCH_FIELDS[field]
+    parts = splitter(value) if splitter else [display_value(value)]
+    tokens = set()
+    for part in parts:
+        tokens.update(tokenize(part))
+    return tokens
+
+
+def parse_query(query):
+    terms = []
+    for part in (query or "").split():
+        field = None
+        if ":" in part:
+            name, _, value = part.partition(":")
+            name = normalize_name(name)
+            name = FIELD_ALIASES.get(name, name)
+            if name in SEARCH_FIELDS:
+                field, part = name, value
+        for token in tokenize(part):
+            terms.append((field, token))
+    return terms
+
+
+class ScheduleIndex:
+    def __init__(self):
+        self.size = 0
+        self._postings = {}
+        self._tokens = {}
+        self._seen = {}
+
+    def add(self, position, record):
+        self.size += 1
+        for field, (column, _) in SEARCH_FIELDS.items():
+            value = record.get(column)
+            tokens = self._seen.get((field, value))
+            if tokens is None:
+                tokens = field_tokens(field, value)
+                self._seen[(field, value)] = tokens
+            for token in tokens:
+                self._postings.setdefault((field, token), set()).add(position)
+                self._postings.setdefault((None, token), set()).add(position)
+
+    def freeze(self):
+        self._seen = {}
+        tokens = {}
+        for field, token in self._postings:
+            tokens.setdefault(field, []).append(token)
+        self._tokens = {field: sorted(values) for field, values in tokens.items()}
+        return self
+
+    def match(self, field, prefix):
+        tokens = self._tokens.get(field, [])
+        start = bisect.bisect_left(tokens, prefix)
+        end = bisect.bisect_left(tokens, prefix + PREFIX_END, lo=start)
+        if end - start == 1:
+            return self._postings[(field, tokens[start])]
+        matched = set()
+        for token in tokens[start:end]:
+            matched |= self._postings[(field, token)]
+        return matched
+
+    def search(self, query):
+        terms = parse_query(query)
+        if not terms:
+            return []
+        sets = sorted(
+            (self.match(field, token) for field, token in terms), key=len
+        )
+        result = set(sets[0])
+        for positions in sets[1:]:
+            if not result:
+                break
+            result &= positions
+        return sorted(result)
+
+
+def index_records(records):
+    index = ScheduleIndex()
+    for position, record in enumerate(records):
+        index.add(position, record)
+    return index.freeze()
+
+
+def build_schedule_index(import_id):
+    index = ScheduleIndex()
+    rows = db.session.execute(
+        db.select(
+            ImportRow.position,
+            ImportRow.pruefungsname.label("Prüfungsname"),
+            ImportRow.pruefer.label("Prüfer"),
+            ImportRow.aufsicht.label("Aufsicht"),
+            ImportRow.abloesung.label("Ablösung"),
+            ImportRow.raum.label("Raum"),
+        ).where(ImportRow.import_id == import_id)
+    )
+    for row in rows:
+        index.add(row.position, row._mapping)
+    return index.freeze()
+
+
+def schedule_index(import_obj):
+    cache = get_cache(current_app, "search")
+    key = (import_obj.content_hash, import_obj.id)
+    index = cache.get(key)
+    if index is None:
+        index = build_schedule_index(import_obj.id)
+        cache.set(key, index)
+    return index
+
+
+def search_positions(import_obj, query):
+    return schedule_index(import_obj).search(query)
+
+
+def build_search(import_obj, args, default_page_size, endpoint="main.search"):
+    query = (args.get("q") or "").strip()[:200]
+    per_page = args.get("per_page", type=int)
+    if per_page not in PREVIEW_PAGE_SIZES:
+        per_page = default_page_size
+
+    started = time.perf_counter()
+    positions = search_positions(import_obj, query) if query else []
+    took_ms = (time.perf_counter() - started) * 1000
+
+    page_count = max((len(positions) + per_page - 1) // per_page, 1)
+    page = min(max(args.get("page", type=int) or 1, 1), page_count)
+    page_positions = positions[(page - 1) * per_page : page * per_page]
+    records = []
+    if page_positions:
+        records = [
+            row.to_record()
+            for row in ImportRow.query.filter(
+                ImportRow.import_id == import_obj.id,
+                ImportRow.position.in_(page_positions),
+            ).order_by(ImportRow.position.asc())
+        ]
+    rows = format_preview_rows(records)
+    for row in rows:
+        row["Ablösung"] = split_display_names(row.get("Ablösung"))
+
+    def page_url(number):
+        return url_for(endpoint, q=query, per_page=per_page, page=number)
+
+    return {
+        "query": query,
+        "columns": SEARCH_COLUMNS,
+        "multiline_columns": SEARCH_MULTILINE_COLUMNS,
+        "total_rows": import_obj.row_count,
+        "match_count": len(positions),
+        "positions": page_positions,
+        "rows": rows,
+        "took_ms": round(took_ms, 2),
+        "pagination": {
+            "page": page,
+            "pages": page_count,
+            "per_page": per_page,
+            "first_index": (page - 1) * per_page + 1 if rows else 0,
+            "last_index": (page - 1) * per_page + len(rows),
+            "prev_url": page_url(page - 1) if page > 1 else None,
+            "next_url": page_url(page + 1) if page < page_count else None,
+            "page_sizes": PREVIEW_PAGE_SIZES,
+        },
+    }
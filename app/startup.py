@@ -0,0 +1,84 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+COLD_START_BUDGET_MS = 1200
+LAZY_MODULES = ("openpyxl", "icalendar")
+
+STARTUP_SCRIPT = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+from app import create_app
+
+create_app()
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({
+    "create_app_ms": elapsed_ms,
+    "loaded": sorted(name for name in %r if name in sys.modules),
+}))
+"""
+
+
+def project_root():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_startup(importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command.extend(["-X", "importtime"])
+    command.extend(["-c", STARTUP_SCRIPT % (LAZY_MODULES,)])
+    result = subprocess.run(
+        command,
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=project_root(),
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def parse_importtime(output):
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        modules.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+    return modules
+
+
+def profile_startup(runs=5, top=20, max_depth=None):
+    timings = []
+    loaded = set()
+    for _ in range(runs):
+        info, _ = run_startup()
+        timings.append(info["create_app_ms"])
+        loaded.update(info["loaded"])
+
+    _, importtime = run_startup(importtime=True)
+    modules = parse_importtime(importtime)
+    if max_depth is not None:
+        modules = [item for item in modules if item["depth"] <= max_depth]
+    modules.sort(key=lambda item: item["cumulative_ms"], reverse=True)
+
+    return {
+        "runs": runs,
+        "min_ms": round(min(timings), 1),
+        "median_ms": round(statistics.median(timings), 1),
+        "max_ms": round(max(timings), 1),
+        "eager_lazy_modules": sorted(loaded),
+        "modules": modules[:top],
+    }
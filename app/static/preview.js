@@ -0,0 +1,104 @@
+(function () {
+  var container = document.getElementById("preview-table");
+  if (!container || !window.fetch || !window.history.pushState) {
+    return;
+  }
+  var rowsUrl = container.getAttribute("data-rows-url");
+
+  function escapeHtml(value) {
+    return String(value === null || value === undefined ? "" : value)
+      .replace(/&/g, "&amp;")
+      .replace(/</g, "&lt;")
+      .replace(/>/g, "&gt;")
+      .replace(/"/g, "&quot;");
+  }
+
+  function queryString(url) {
+    var index = url.indexOf("?");
+    return index === -1 ? "" : url.slice(index);
+  }
+
+  function renderRows(data) {
+    var html = data.rows.map(function (row) {
+      var cells = data.columns.map(function (col) {
+        var value = row[col];
+        if (data.multiline_columns.indexOf(col) !== -1) {
+          return "<td>" + (value || []).map(escapeHtml).join("<br>") + "</td>";
+        }
+        return "<td>" + escapeHtml(value) + "</td>";
+      });
+      return "<tr>" + cells.join("") + "</tr>";
+    });
+    container.querySelector("tbody").innerHTML = html.join("");
+  }
+
+  function renderSortLinks(data) {
+    var primary = data.sort.split(",")[0];
+    var primaryDir = data.dir.split(",")[0];
+    container.querySelectorAll("a.sort-arrow").forEach(function (link) {
+      var col = link.getAttribute("data-sort-col");
+      var dir = link.getAttribute("data-sort-dir");
+      link.setAttribute("href", data.sort_links[col][dir]);
+      link.classList.toggle("is-active", primary === col && primaryDir === dir);
+    });
+    document.querySelectorAll("[data-preview-sort]").forEach(function (input) {
+      input.value = data.sort;
+    });
+    document.querySelectorAll("[data-preview-dir]").forEach(function (input) {
+      input.value = data.dir;
+    });
+  }
+
+  function renderPagination(data) {
+    var pagination = data.pagination;
+    container.querySelector("[data-preview-range]").textContent =
+      "Zeilen " + pagination.first_index + "-" + pagination.last_index +
+      " von " + data.filtered_count +
+      " (Seite " + pagination.page + " von " + pagination.pages + ")";
+    container.querySelectorAll("a[data-preview-page]").forEach(function (link) {
+      var url = pagination[link.getAttribute("data-preview-page") + "_url"];
+      link.setAttribute("href", url || "#");
+      link.parentNode.classList.toggle("disabled", !url);
+    });
+  }
+
+  function load(previewUrl, push) {
+    return fetch(rowsUrl + queryString(previewUrl), {
+      credentials: "same-origin",
+      headers: { Accept: "application/json" },
+    })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        return response.json();
+      })
+      .then(function (data) {
+        renderRows(data);
+        renderSortLinks(data);
+        renderPagination(data);
+        if (push) {
+          window.history.pushState({ preview: true }, "", previewUrl);
+        }
+      })
+      .catch(function () {
+        window.location.href = previewUrl;
+      });
+  }
+
+  container.addEventListener("click", function (event) {
+    var link = event.target.closest("a.sort-arrow, a[data-preview-page]");
+    if (!link || link.getAttribute("href") === "#") {
+      return;
+    }
+    if (event.ctrlKey || event.metaKey || event.shiftKey || event.button !== 0) {
+      return;
+    }
+    event.preventDefault();
+    load(link.href, true);
+  });
+
+  window.addEventListener("popstate", function () {
+    load(window.location.href, false);
+  });
+})();
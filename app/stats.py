@@ -0,0 +1,160 @@
+from .diff import exam_key, room_key
+from .excel import PERSON_COLUMNS, normalize_name
+from .extensions import db
+from .models import ImportRow
+from .tokens import split_display_rooms, split_names
+
+STATS_VERSION = 1
+
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.events = 0
+        self.minutes = 0
+        self.exams = set()
+        self.persons = {}
+        self.days = {}
+        self.rooms = {}
+        self.hours = {}
+
+    def add(self, params, record):
+        self.rows += 1
+        datum = params.get("datum")
+        startzeit = params.get("startzeit")
+        minutes = params.get("dauer_minuten") or 0
+        if datum is None or startzeit is None:
+            return
+        self.events += 1
+        self.minutes += minutes
+        exam = exam_key(params.get("pruefungsname"))
+        if exam:
+            self.exams.add(exam)
+        day_key = datum.isoformat()
+
+        day = self.days.setdefault(
+            day_key, {"date": day_key, "events": 0, "minutes": 0, "persons": set()}
+        )
+        day["events"] += 1
+        day["minutes"] += minutes
+        self.hours[startzeit.hour] = self.hours.get(startzeit.hour, 0) + 1
+
+        counted = set()
+        for role, column in PERSON_COLUMNS.items():
+            for name in split_names(record.get(column)):
+                name_norm = normalize_name(name)
+                if not name_norm:
+                    continue
+                person = self.persons.setdefault(
+                    name_norm,
+                    {
+                        "name": name,
+                        "aufsicht": 0,
+                        "abloesung": 0,
+                        "minutes": 0,
+                        "days": set(),
+                    },
+                )
+                person[role] += 1
+                if name_norm in counted:
+                    continue
+                counted.add(name_norm)
+                person["minutes"] += minutes
+                person["days"].add(day_key)
+                day["persons"].add(name_norm)
+
+        seen = set()
+        for label in split_display_rooms(params.get("raum")):
+            key = room_key(label)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            room = self.rooms.setdefault(
+                key, {"room": label, "events": 0, "minutes": 0, "days": set()}
+            )
+            room["events"] += 1
+            room["minutes"] += minutes
+            room["days"].add(day_key)
+
+    def result(self):
+        persons = sorted(
+            (
+                {
+                    "name": item["name"],
+                    "aufsicht": item["aufsicht"],
+                    "abloesung": item["abloesung"],
+                    "minutes": item["minutes"],
+                    "days": len(item["days"]),
+                }
+                for item in self.persons.values()
+            ),
+            key=lambda item: (-item["minutes"], item["name"].casefold()),
+        )
+        days = [
+            {
+                "date": item["date"],
+                "events": item["events"],
+                "minutes": item["minutes"],
+                "persons": len(item["persons"]),
+            }
+            for _, item in sorted(self.days.items())
+        ]
+        rooms = sorted(
+            (
+                {
+                    "room": item["room"],
+                    "events": item["events"],
+                    "minutes": item["minutes"],
+                    "days": len(item["days"]),
+                }
+                for item in self.rooms.values()
+            ),
+            key=lambda item: (-item["minutes"], item["room"].casefold()),
+        )
+        return {
+            "version": STATS_VERSION,
+            "totals": {
+                "rows": self.rows,
+                "events": self.events,
+                "invalid": self.rows - self.events,
+                "exams": len(self.exams),
+                "persons": len(persons),
+                "rooms": len(rooms),
+                "days": len(days),
+                "minutes": self.minutes,
+            },
+            "persons": persons,
+            "days": days,
+            "rooms": rooms,
+            "hours": [
+                {"hour": hour, "events": count}
+                for hour, count in sorted(self.hours.items())
+            ],
+        }
+
+
+def compute_import_stats(import_id):
+    stats = ImportStats()
+    for row in ImportRow.query.filter(ImportRow.import_id == import_id).order_by(
+        ImportRow.position.asc()
+    ):
+        stats.add(
+            {
+                "pruefungsname": row.pruefungsname,
+                "datum": row.datum,
+                "startzeit": row.startzeit,
+                "dauer_minuten": row.dauer_minuten,
+                "raum": row.raum,
+            },
+            row.to_record(),
+        )
+    return stats.result()
+
+
+def import_stats(import_obj):
+    stats = import_obj.stats
+    if not stats or stats.get("version") != STATS_VERSION:
+        stats = compute_import_stats(import_obj.id)
+        import_obj.stats = stats
+        db.session.commit()
+    return stats
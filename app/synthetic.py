@@ -0,0 +1,349 @@
+import csv
+import os
+import random
+import shutil
+import tempfile
+import zipfile
+from datetime import date, datetime, time, timedelta
+from itertools import chain
+from xml.sax.saxutils import escape, quoteattr
+
+HEADER_VARIANTS = {
+    "standard": [
+        "Prüfungsname",
+        "Datum",
+        "Startzeit",
+        "Dauer",
+        "Prüfer",
+        "Aufsicht",
+        "Ablösung",
+        "Raum",
+    ],
+    "alias": [
+        "Modul LV-Nr.",
+        "Prüfungstag",
+        "Uhrzeit",
+        "Dauer",
+        "Prüfer",
+        "Aufsicht",
+        "Ablösung/ Beisitzer",
+        "Räume",
+    ],
+    "merged": [
+        "Fach",
+        "Tag",
+        "Startzeit",
+        "Dauer",
+        "Prüfer 1",
+        "Prüfer 2",
+        "Aufsicht",
+        "Ablösung/Beisitzer",
+        "Raum",
+        "Räume vorgezogen",
+    ],
+    # Falsche Datei (Raumplan ohne Aufsicht/Abloesung) fuer die Kopfzeilenpruefung.
+    "incomplete": [
+        "Prüfungsname",
+        "Datum",
+        "Startzeit",
+        "Dauer",
+        "Prüfer",
+        "Beisitz",
+        "Protokoll",
+        "Raum",
+    ],
+}
+DATE_MODES = ("date", "serial", "text")
+SCHEDULE_FORMATS = (".xlsx", ".csv", ".ods")
+ODS_MIMETYPE = "application/vnd.oasis.opendocument.spreadsheet"
+ODS_MANIFEST = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:'
+    'manifest:1.0" manifest:version="1.2">'
+    '<manifest:file-entry manifest:full-path="/" manifest:version="1.2" '
+    f'manifest:media-type="{ODS_MIMETYPE}"/>'
+    '<manifest:file-entry manifest:full-path="content.xml" '
+    'manifest:media-type="text/xml"/>'
+    "</manifest:manifest>"
+)
+ODS_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    "<office:document-content "
+    'xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+    'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+    'office:version="1.2"><office:body><office:spreadsheet>'
+)
+ODS_TAIL = "</office:spreadsheet></office:body></office:document-content>"
+
+LAST_NAMES = [
+    "Müller",
+    "Schmidt",
+    "Schneider",
+    "Fischer",
+    "Weber",
+    "Meyer",
+    "Wagner",
+    "Becker",
+    "Schulz",
+    "Hoffmann",
+    "Schäfer",
+    "Koch",
+    "Bauer",
+    "Richter",
+    "Klein",
+    "Wolf",
+    "Schröder",
+    "Neumann",
+    "Schwarz",
+    "Zimmermann",
+    "Braun",
+    "Krüger",
+    "Hofmann",
+    "Hartmann",
+]
+FIRST_NAMES = [
+    "Anna",
+    "Jonas",
+    "Lea",
+    "Lukas",
+    "Marie",
+    "Paul",
+    "Sophie",
+    "Felix",
+    "Jürgen",
+    "Katrin",
+    "Stefan",
+    "Uwe",
+]
+SUBJECTS = [
+    "Mathematik",
+    "Informatik",
+    "Physik",
+    "Betriebswirtschaft",
+    "Elektrotechnik",
+    "Mechanik",
+    "Statistik",
+    "Programmierung",
+    "Datenbanken",
+    "Regelungstechnik",
+]
+ROOMS = ["A", "B", "C", "H", "L"]
+START_TIMES = [time(8, 0), time(9, 30), time(11, 0), time(13, 30), time(15, 0)]
+DURATIONS = [60, 90, 120, 180]
+
+
+def build_people(count, rng):
+    people = []
+    seen = set()
+    while len(people) < count:
+        last = rng.choice(LAST_NAMES)
+        first = rng.choice(FIRST_NAMES)
+        if len(seen) >= len(LAST_NAMES) * len(FIRST_NAMES):
+            last = f"{last}{len(people)}"
+        name = f"{last}, {first}"
+        if name in seen:
+            continue
+        seen.add(name)
+        people.append(name)
+    return people
+
+
+def _date_cell(value, date_mode):
+    if date_mode == "serial":
+        return (value - date(1899, 12, 30)).days
+    if date_mode == "text":
+        return value.strftime("%d.%m.%Y")
+    return datetime.combine(value, time())
+
+
+def _time_cell(value, date_mode):
+    if date_mode == "serial":
+        return (value.hour * 60 + value.minute) / 1440
+    if date_mode == "text":
+        return value.strftime("%H:%M")
+    return value
+
+
+def _join_names(names, rng):
+    if len(names) == 1:
+        return names[0]
+    return rng.choice(["; ", "\n", " / "]).join(names)
+
+
+def generate_rows(
+    rows=1000,
+    supervisors=60,
+    headers="standard",
+    date_mode="date",
+    seed=0,
+    start_date=date(2026, 7, 6),
+):
+    rng = random.Random(seed)
+    people = build_people(max(supervisors, 2), rng)
+    examiners = build_people(max(supervisors // 2, 2), random.Random(seed + 1))
+    rooms = [
+        f"{rng.choice(ROOMS)}{rng.randint(1, 4)}.{rng.randint(1, 40):02d}"
+        for _ in range(40)
+    ]
+    merged = headers == "merged"
+
+    for index in range(rows):
+        exam_date = start_date + timedelta(days=(index // 40) % 28)
+        start = rng.choice(START_TIMES)
+        aufsicht = _join_names(rng.sample(people, rng.choice([1, 1, 2, 3])), rng)
+        abloesung = rng.choice(people) if rng.random() < 0.6 else None
+        subject = f"{rng.choice(SUBJECTS)} {index % 97 + 1}"
+        values = [
+            subject,
+            _date_cell(exam_date, date_mode),
+            _time_cell(start, date_mode),
+            rng.choice(DURATIONS),
+        ]
+        if merged:
+            values.append(rng.choice(examiners))
+            values.append(rng.choice(examiners) if rng.random() < 0.4 else None)
+        else:
+            values.append(_join_names(rng.sample(examiners, rng.choice([1, 2])), rng))
+        values.extend([aufsicht, abloesung])
+        if merged:
+            values.append(rng.choice(rooms))
+            values.append(rng.choice(rooms) if rng.random() < 0.3 else None)
+        else:
+            values.append(" ".join(rng.sample(rooms, rng.choice([1, 1, 2]))))
+        yield values
+
+
+def write_schedule(
+    path,
+    rows=1000,
+    supervisors=60,
+    headers="standard",
+    date_mode="date",
+    title_rows=0,
+    broken_xml=False,
+    seed=0,
+):
+    if headers not in HEADER_VARIANTS:
+        raise ValueError(f"Unbekannte Kopfzeilen-Variante: {headers}")
+    if date_mode not in DATE_MODES:
+        raise ValueError(f"Unbekanntes Datumsformat: {date_mode}")
+    extension = os.path.splitext(path.lower())[1]
+    if extension not in SCHEDULE_FORMATS:
+        raise ValueError(f"Unbekanntes Dateiformat: {extension or path}")
+    if extension == ".csv" and date_mode == "serial":
+        raise ValueError("CSV-Dateien enthalten Datum und Uhrzeit nur als Text")
+    if broken_xml and extension != ".xlsx":
+        raise ValueError("Defektes XML gibt es nur fuer .xlsx")
+
+    titles = [
+        [f"Prüfungsplan Sommersemester (Stand {index + 1})"]
+        for index in range(title_rows)
+    ]
+    values = generate_rows(rows, supervisors, headers, date_mode, seed)
+    if extension == ".csv":
+        return write_csv(path, titles + [HEADER_VARIANTS[headers]], values)
+    if extension == ".ods":
+        return write_ods(path, titles + [HEADER_VARIANTS[headers]], values)
+
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Prüfungsplan")
+    for title in titles:
+        sheet.append(title)
+    sheet.append(HEADER_VARIANTS[headers])
+    for row in values:
+        sheet.append(row)
+    workbook.save(path)
+
+    if broken_xml:
+        break_styles_xml(path)
+    return path
+
+
+def _csv_cell(value):
+    # Wie ein Export aus einem deutschen Planungssystem: Text mit Dezimalkomma.
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%d.%m.%Y")
+    if isinstance(value, time):
+        return value.strftime("%H:%M")
+    if isinstance(value, float):
+        return f"{value:g}".replace(".", ",")
+    return str(value)
+
+
+def write_csv(path, head, values):
+    with open(path, "w", encoding="utf-8-sig", newline="") as handle:
+        writer = csv.writer(handle, delimiter=";")
+        writer.writerows(head)
+        for row in values:
+            writer.writerow([_csv_cell(value) for value in row])
+    return path
+
+
+def _ods_cell(value):
+    if value is None:
+        return "<table:table-cell/>"
+    if isinstance(value, datetime):
+        return (
+            '<table:table-cell office:value-type="date" '
+            f'office:date-value="{value.date().isoformat()}">'
+            f"<text:p>{value:%d.%m.%Y}</text:p></table:table-cell>"
+        )
+    if isinstance(value, time):
+        return (
+            '<table:table-cell office:value-type="time" '
+            f'office:time-value="PT{value:%H}H{value:%M}M{value:%S}S">'
+            f"<text:p>{value:%H:%M}</text:p></table:table-cell>"
+        )
+    if isinstance(value, (int, float)):
+        return (
+            '<table:table-cell office:value-type="float" '
+            f"office:value={quoteattr(str(value))}>"
+            f"<text:p>{value}</text:p></table:table-cell>"
+        )
+    paragraphs = "".join(
+        f"<text:p>{escape(line)}</text:p>" for line in str(value).split("\n")
+    )
+    return (
+        f'<table:table-cell office:value-type="string">{paragraphs}</table:table-cell>'
+    )
+
+
+def write_ods(path, head, values):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("mimetype", ODS_MIMETYPE, compress_type=zipfile.ZIP_STORED)
+        archive.writestr("META-INF/manifest.xml", ODS_MANIFEST)
+        with archive.open("content.xml", "w") as content:
+            content.write(ODS_HEAD.encode("utf-8"))
+            content.write('<table:table table:name="Prüfungsplan">'.encode("utf-8"))
+            for row in chain(head, values):
+                cells = "".join(_ods_cell(value) for value in row)
+                row_xml = f"<table:table-row>{cells}</table:table-row>"
+                content.write(row_xml.encode("utf-8"))
+            content.write(f"</table:table>{ODS_TAIL}".encode("utf-8"))
+    return path
+
+
+def break_styles_xml(path):
+    handle, tmp_path = tempfile.mkstemp(
+        suffix=".xlsx", dir=os.path.dirname(path) or None
+    )
+    os.close(handle)
+    try:
+        with zipfile.ZipFile(path) as source, zipfile.ZipFile(
+            tmp_path, "w", zipfile.ZIP_DEFLATED
+        ) as target:
+            for item in source.infolist():
+                payload = source.read(item.filename)
+                if item.filename == "xl/styles.xml":
+                    payload = payload.replace(b"</styleSheet>", b"<broken></styleSheet")
+                target.writestr(item, payload)
+        shutil.move(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
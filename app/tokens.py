@@ -0,0 +1,123 @@
+import re
+import sys
+from functools import lru_cache
+
+# Ein Plan enthaelt nur wenige hundert verschiedene Namens- und Raumzellen,
+# die sich ueber tausende Zeilen wiederholen.
+TOKEN_CACHE_SIZE = 16384
+NAME_SEPARATORS = (";", "/", "\n", "\r")
+
+_NAME_SPLIT = re.compile(r"[;/\n\r]+")
+_DISPLAY_NAME = re.compile(
+    r"[A-Za-z\u00c4\u00d6\u00dc\u00e4\u00f6\u00fc\u00df-]+"
+    r",\s*[A-Za-z\u00c4\u00d6\u00dc\u00e4\u00f6\u00fc\u00df-]+"
+)
+_ROOM_SPLIT = re.compile(r"[;,\n\r/]+|\s+")
+
+
+def _cell_text(value):
+    return value if isinstance(value, str) else str(value)
+
+
+def _interned(parts):
+    return tuple(sys.intern(part) for part in parts if part)
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _normalized(text):
+    return sys.intern(" ".join(text.split()).casefold())
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _names(text):
+    text = text.strip()
+    if not text:
+        return ()
+
+    if any(sep in text for sep in NAME_SEPARATORS):
+        return _interned(part.strip() for part in _NAME_SPLIT.split(text))
+
+    if text.count(",") >= 3:
+        parts = [part.strip() for part in text.split(",") if part.strip()]
+        if len(parts) % 2 == 0:
+            return _interned(
+                f"{parts[i]}, {parts[i + 1]}" for i in range(0, len(parts), 2)
+            )
+
+    return (sys.intern(text),)
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _display_names(text):
+    text = text.strip()
+    if not text:
+        return ()
+    matches = _interned(match.strip() for match in _DISPLAY_NAME.findall(text))
+    if len(matches) >= 2:
+        return matches
+    return _names(text)
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _rooms(text):
+    return _interned(part.strip() for part in _ROOM_SPLIT.split(text.strip()))
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _candidates(text):
+    return tuple(_normalized(name) for name in _names(text))
+
+
+def normalize_name(value):
+    if value is None:
+        return ""
+    return _normalized(_cell_text(value))
+
+
+def split_names(value):
+    if value is None:
+        return []
+    return list(_names(_cell_text(value)))
+
+
+def split_display_names(value):
+    if value is None:
+        return []
+    return list(_display_names(_cell_text(value)))
+
+
+def split_display_rooms(value):
+    if value is None:
+        return []
+    return list(_rooms(_cell_text(value)))
+
+
+def name_candidates(value):
+    if value is None:
+        return []
+    return list(_candidates(_cell_text(value)))
+
+
+def contains_name(value, target):
+    # target ist bereits normalisiert; spart die Listenkopie pro Zeile.
+    if value is None:
+        return False
+    return target in _candidates(_cell_text(value))
+
+
+TOKEN_CACHES = {
+    "normalize": _normalized,
+    "names": _names,
+    "display_names": _display_names,
+    "rooms": _rooms,
+    "candidates": _candidates,
+}
+
+
+def token_cache_info():
+    return {name: cache.cache_info()._asdict() for name, cache in TOKEN_CACHES.items()}
+
+
+def clear_token_caches():
+    for cache in TOKEN_CACHES.values():
+        cache.cache_clear()
@@ -17,4 +17,42 @@ class Config:
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024
     TIMEZONE = os.environ.get("APP_TIMEZONE", "Europe/Berlin")
     APP_BASE_URL = os.environ.get("APP_BASE_URL", "")
+    PREVIEW_PAGE_SIZE = int(os.environ.get("PREVIEW_PAGE_SIZE", "100"))
+    PERSONS_PAGE_SIZE = int(os.environ.get("PERSONS_PAGE_SIZE", "50"))
+    PREVIEW_CACHE_SIZE = int(os.environ.get("PREVIEW_CACHE_SIZE", "256"))
+    CONFLICT_CACHE_SIZE = int(os.environ.get("CONFLICT_CACHE_SIZE", "16"))
+    NAME_CACHE_SIZE = int(os.environ.get("NAME_CACHE_SIZE", "16"))
+    SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", "8"))
+    MAIL_LOG_RETENTION_SEMESTERS = int(
+        os.environ.get("MAIL_LOG_RETENTION_SEMESTERS", "2")
+    )
+    MAIL_LOG_ARCHIVE_BATCH = int(os.environ.get("MAIL_LOG_ARCHIVE_BATCH", "500"))
+    ICS_CACHE_DIR = os.environ.get("ICS_CACHE_DIR") or os.path.join(
+        basedir, "instance", "ics-cache"
+    )
+    ICS_CACHE_MAX_MB = int(os.environ.get("ICS_CACHE_MAX_MB", "256"))
+    DOWNLOAD_OFFLOAD = os.environ.get("DOWNLOAD_OFFLOAD", "").strip().lower()
+    DOWNLOAD_ACCEL_PREFIX = os.environ.get("DOWNLOAD_ACCEL_PREFIX", "/_exports/")
+    DOWNLOAD_MAX_AGE = int(os.environ.get("DOWNLOAD_MAX_AGE", "86400"))
+    ADMISSION_PARSE_LIMIT = int(os.environ.get("ADMISSION_PARSE_LIMIT", "2"))
+    ADMISSION_PREVIEW_LIMIT = int(os.environ.get("ADMISSION_PREVIEW_LIMIT", "4"))
+    ADMISSION_EXPORT_LIMIT = int(os.environ.get("ADMISSION_EXPORT_LIMIT", "2"))
+    ADMISSION_GLOBAL_LIMIT = int(
+        os.environ.get("ADMISSION_GLOBAL_LIMIT", str(os.cpu_count() or 2))
+    )
+    ADMISSION_LOCK_DIR = os.environ.get("ADMISSION_LOCK_DIR") or os.path.join(
+        basedir, "instance", "locks"
+    )
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "5"))
+    ADMISSION_RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", "10"))
+    UPLOAD_RATE_LIMIT = os.environ.get("UPLOAD_RATE_LIMIT", "10/60")
+    PROXY_FIX_X_FOR = int(os.environ.get("PROXY_FIX_X_FOR", "0"))
+    NAME_MATCH_MIN_SCORE = float(os.environ.get("NAME_MATCH_MIN_SCORE", "0.5"))
+    MEMORY_PROFILING = os.environ.get("MEMORY_PROFILING", "").lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    MEMORY_PROFILE_TOP = int(os.environ.get("MEMORY_PROFILE_TOP", "5"))
 
@@ -0,0 +1,50 @@
+import importlib
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _int_env(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+bind = os.environ.get(
+    "GUNICORN_BIND",
+    f"{os.environ.get('APP_HOST', '0.0.0.0')}:{os.environ.get('APP_PORT', '5000')}",
+)
+workers = _int_env("GUNICORN_WORKERS", min(multiprocessing.cpu_count() * 2 + 1, 8))
+threads = _int_env("GUNICORN_THREADS", 4)
+worker_class = "gthread" if threads > 1 else "sync"
+timeout = _int_env("GUNICORN_TIMEOUT", 120)
+graceful_timeout = 30
+max_requests = _int_env("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = max(max_requests // 10, 0)
+preload_app = True
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+wsgi_app = "run:app"
+_warm_imports = os.environ.get("GUNICORN_WARM_IMPORTS", "true").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+
+
+def when_ready(server):
+    # openpyxl/icalendar werden in der App erst bei Bedarf importiert. Im Master
+    # vorladen, damit neue Worker (auch nach max_requests) sie per fork erben.
+    if not (preload_app and _warm_imports):
+        return
+    from app.startup import LAZY_MODULES
+
+    for name in LAZY_MODULES:
+        importlib.import_module(name)
+